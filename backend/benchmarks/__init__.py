@@ -0,0 +1,11 @@
+"""
+Benchmarks fuer das Backend. Aus backend/ starten, z.B.:
+    python -m benchmarks.async_concurrency
+    python -m benchmarks.datagen --scale 100k     # synthetische Daten (10k/100k/1m)
+    pytest benchmarks/micro.py                    # Micro-Benchmarks (pytest-benchmark)
+    python -m benchmarks.load --db sqlite,postgres
+    python -m benchmarks.writes --db sqlite,postgres  # Schreib-Latenz, Statements pro Request
+    python -m benchmarks.startup
+
+Zusaetzliche Abhaengigkeiten: pip install -r benchmarks/requirements.txt
+"""
@@ -0,0 +1,87 @@
+"""
+Micro-Benchmarks (pytest-benchmark) fuer die CPU-Pfade ohne Datenbank.
+
+    cd backend
+    pip install -r benchmarks/requirements.txt
+    pytest benchmarks/micro.py --benchmark-columns=min,median,ops
+    pytest benchmarks/micro.py --benchmark-autosave            # .benchmarks/ zum Vergleichen
+    pytest benchmarks/micro.py --benchmark-compare --benchmark-compare-fail=median:10%
+
+Die Datei heisst bewusst nicht test_*.py: sie laeuft nur, wenn man sie explizit angibt.
+Eingaben kommen aus benchmarks.datagen (fester Seed), Laeufe sind damit vergleichbar.
+"""
+import os
+import random
+import tempfile
+from datetime import datetime, timezone
+
+import pytest
+
+os.environ.setdefault("DATABASE_URL", "sqlite:///" + os.path.join(tempfile.mkdtemp(), "micro.db"))
+
+from benchmarks.datagen import SEED, export_string, guild_row, player_row, wpe_payload  # noqa: E402
+from import_wpe import decode_and_summarize, decode_export_string, summarize_payload  # noqa: E402
+
+NOW = datetime(2026, 10, 1, tzinfo=timezone.utc)
+
+
+@pytest.fixture(scope="module")
+def payload():
+    rng = random.Random(SEED)
+    return wpe_payload(rng, player_row(rng, 1, NOW), 1)
+
+
+@pytest.fixture(scope="module")
+def guilds():
+    from models import Guild
+
+    rng = random.Random(SEED)
+    return [Guild(id=i + 1, **guild_row(rng, i, NOW)) for i in range(100)]
+
+
+@pytest.fixture(scope="module")
+def players():
+    from models import Player
+
+    rng = random.Random(SEED)
+    return [Player(id=i + 1, **player_row(rng, i, NOW)) for i in range(100)]
+
+
+@pytest.mark.parametrize("fmt", ["WPE2", "WPE2J"])
+def test_decode_export_string(benchmark, payload, fmt):
+    s = export_string(payload, fmt)
+    assert benchmark(decode_export_string, s) == payload
+
+
+def test_summarize_payload(benchmark, payload):
+    summary = benchmark(summarize_payload, payload)
+    assert summary["name"] == payload["character"]["core"]["name"]
+
+
+@pytest.mark.parametrize("compress", [False, True])
+def test_decode_and_summarize(benchmark, payload, compress):
+    s = export_string(payload, "WPE2")
+    _, summary, blob = benchmark(decode_and_summarize, s, compress)
+    assert (blob is not None) == compress
+
+
+def test_guild_to_out(benchmark, guilds):
+    from main import guild_to_out
+
+    out = benchmark(lambda: [guild_to_out(g) for g in guilds])
+    assert len(out) == len(guilds)
+
+
+def test_player_to_out(benchmark, players):
+    from main import player_to_out
+
+    out = benchmark(lambda: [player_to_out(p) for p in players])
+    assert len(out) == len(players)
+
+
+def test_encode_page_guilds(benchmark, guilds):
+    # Schneller Listenpfad (serialize.py) zum Vergleich mit guild_to_out
+    from serialize import GUILD_ROWS, encode_page
+
+    rows = [tuple(getattr(g, f) for f in GUILD_ROWS.fields) for g in guilds]
+    assert benchmark(encode_page, GUILD_ROWS, rows, None)
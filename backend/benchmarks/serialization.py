@@ -0,0 +1,100 @@
+"""
+Micro-Benchmark: Serialisierung einer Liste von 10k Gilden.
+
+    cd backend
+    python -m benchmarks.serialization [--rows 10000] [--repeat 5]
+
+  orm:  select(Guild) -> guild_to_out -> GuildPage Validierung (wie response_model)
+        -> jsonable_encoder -> json.dumps (wie JSONResponse)
+  fast: select(GuildOut-Spalten) -> dicts -> orjson (serialize.py)
+
+Laeuft gegen eine frische SQLite-Datei (oder DATABASE_URL), misst die Zeit ab dem Query.
+"""
+import argparse
+import json
+import os
+import statistics
+import tempfile
+import time
+
+
+def seed(n: int) -> None:
+    from db import SessionLocal
+    from models import Guild
+
+    with SessionLocal() as db:
+        if db.query(Guild).count() >= n:
+            return
+        needs = [{"class": "Priest", "spec": "Holy", "role": "Heal", "prio": 4}, {"class": "Warrior", "role": "Tank", "prio": 3}]
+        db.add_all([
+            Guild(
+                name=f"Bench Guild {i}", realm="Spineshatter", faction="Horde", language="DE", edit_token="bench",
+                raid_days=["Wed", "Thu", "Sun"], progress={"SSC": "4/6", "TK": "2/4"}, needs=needs,
+                description="Wir raiden entspannt, suchen Verstaerkung fuer SSC und TK. " * 10,
+            )
+            for i in range(n)
+        ])
+        db.commit()
+
+
+def run_orm(n: int) -> int:
+    from fastapi.encoders import jsonable_encoder
+    from sqlalchemy import select
+
+    from db import SessionLocal
+    from main import guild_to_out
+    from models import Guild
+    from schemas import GuildPage
+
+    with SessionLocal() as db:
+        guilds = db.execute(select(Guild).order_by(Guild.id).limit(n)).scalars().all()
+        page = {"items": [guild_to_out(g) for g in guilds], "next_cursor": None}
+        validated = GuildPage.model_validate(jsonable_encoder(page))
+        body = json.dumps(jsonable_encoder(validated), ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    return len(body)
+
+
+def run_fast(n: int) -> int:
+    from sqlalchemy import select
+
+    from db import SessionLocal
+    from models import Guild
+    from serialize import GUILD_ROWS, encode_page
+
+    with SessionLocal() as db:
+        rows = db.execute(select(*GUILD_ROWS.columns).order_by(Guild.id).limit(n)).all()
+        body = encode_page(GUILD_ROWS, rows, None)
+    return len(body)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    if not os.getenv("DATABASE_URL"):
+        os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(tempfile.mkdtemp(), "bench.db")
+    import migrate
+
+    migrate.upgrade()
+
+    seed(args.rows)
+    results = {}
+    for name, fn in (("orm", run_orm), ("fast", run_fast)):
+        fn(args.rows)   # Warm-up
+        times = []
+        for _ in range(args.repeat):
+            t0 = time.perf_counter()
+            size = fn(args.rows)
+            times.append(time.perf_counter() - t0)
+        results[name] = (statistics.median(times), size)
+
+    print(f"{'path':<6}{'median ms':>12}{'bytes':>12}")
+    for name, (t, size) in results.items():
+        print(f"{name:<6}{t * 1000:>12.1f}{size:>12}")
+    print(f"speedup: {results['orm'][0] / results['fast'][0]:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Startzeit-Budget fuer "uvicorn main:app": Importzeit von main per python -X importtime.
+
+    cd backend
+    python -m benchmarks.startup [--runs 7]    # messen und pruefen, Exit 1 bei Regression
+    python -m benchmarks.startup --update      # Baseline in startup_budget.json neu schreiben
+
+Geprueft wird:
+  - kumulierte Importzeit von main (Minimum ueber --runs frische Prozesse, robuster gegen
+    Rauschen als der Median) gegen import_ms * (1 + tolerance) aus startup_budget.json
+  - keines der DEFERRED Module wird beim Import von main geladen
+
+Die Baseline ist maschinenabhaengig; nach Umzug auf einen anderen Runner mit --update neu
+schreiben.
+"""
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+from typing import Dict, List, Tuple
+
+BUDGET_FILE = os.path.join(os.path.dirname(__file__), "startup_budget.json")
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# nur in selten genutzten Endpunkten importiert (main.py)
+DEFERRED = ("import_wpe", "bulk_import", "scoring", "numpy")
+
+_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|\s+(\S+)$")
+
+
+def measure(db_url: str) -> Tuple[float, Dict[str, int]]:
+    """
+    Ein frischer Prozess. Liefert (main kumuliert ms, {modul: self us}).
+    """
+    env = dict(os.environ, DATABASE_URL=db_url)
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True, check=True,
+    )
+    total_us = None
+    self_us: Dict[str, int] = {}
+    for line in proc.stderr.splitlines():
+        m = _LINE.match(line)
+        if m is None:
+            continue
+        own, cumulative, name = int(m.group(1)), int(m.group(2)), m.group(3)
+        self_us[name] = own
+        if name == "main":
+            total_us = cumulative
+    if total_us is None:
+        raise RuntimeError("main not found in -X importtime output")
+    return total_us / 1000, self_us
+
+
+def load_budget() -> Dict[str, float]:
+    with open(BUDGET_FILE) as f:
+        return json.load(f)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=7)
+    parser.add_argument("--top", type=int, default=10, help="teuerste Module (self time) anzeigen")
+    parser.add_argument("--update", action="store_true", help="Baseline neu schreiben")
+    args = parser.parse_args()
+
+    db_url = os.getenv("DATABASE_URL") or "sqlite:///" + os.path.join(tempfile.mkdtemp(), "startup.db")
+    totals: List[float] = []
+    self_us: Dict[str, int] = {}
+    for _ in range(args.runs):
+        total, self_us = measure(db_url)
+        totals.append(total)
+    best, median = min(totals), statistics.median(totals)
+
+    print(f"import main: min {best:.1f} ms, median {median:.1f} ms ({args.runs} runs)")
+    for name, us in sorted(self_us.items(), key=lambda kv: -kv[1])[:args.top]:
+        print(f"  {us / 1000:>8.1f} ms  {name}")
+
+    if args.update:
+        budget = {"import_ms": round(best, 1), "tolerance": 0.25}
+        if os.path.exists(BUDGET_FILE):
+            budget["tolerance"] = load_budget().get("tolerance", 0.25)
+        with open(BUDGET_FILE, "w") as f:
+            json.dump(budget, f, indent=2)
+            f.write("\n")
+        print(f"baseline written: {BUDGET_FILE}")
+        return
+
+    failures = []
+    eager = [m for m in DEFERRED if m in self_us]
+    if eager:
+        failures.append(f"deferred modules imported at startup: {', '.join(eager)}")
+    budget = load_budget()
+    limit = budget["import_ms"] * (1 + budget["tolerance"])
+    print(f"budget: {budget['import_ms']:.1f} ms + {budget['tolerance']:.0%} = {limit:.1f} ms")
+    if best > limit:
+        failures.append(f"import main took {best:.1f} ms, budget {limit:.1f} ms")
+
+    for msg in failures:
+        print(f"FAIL: {msg}")
+    if failures:
+        sys.exit(1)
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+"""
+Latenz der Schreib-Endpunkte (Anlegen/Bearbeiten von Gilden und Spielern) und SQL-Statements
+pro Request.
+
+    cd backend
+    python -m benchmarks.writes --db sqlite --scale 10k
+    python -m benchmarks.writes --db sqlite,postgres --requests 500 --json writes.json
+
+Wie benchmarks.load: ein Prozess pro Datenbank, Daten aus benchmarks.datagen. Die SQLite-Datei
+ist eine eigene (tbc-bench-writes-*.db), weil der Lauf Gilden und Spieler anlegt. Die Requests
+laufen nacheinander (SQLite serialisiert Schreiber ohnehin) ueber httpx mit ASGITransport.
+Die Statements pro Request kommen aus dem Query-Zaehler in metrics (Differenz vor/nach dem
+Request); mitgezaehlt werden auch Match-Refresh und Changefeed.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List
+
+from benchmarks.load import POSTGRES_URL, percentile
+
+SCENARIOS = ("create_guild", "update_guild", "create_player", "update_player", "update_bad_token")
+
+
+def guild_payload(rng: random.Random, run: str, i: int) -> Dict[str, Any]:
+    from benchmarks.datagen import guild_row
+
+    row = guild_row(rng, i, None)
+    row["name"] = f"Write {run} {i}"
+    return {k: v for k, v in row.items() if k not in ("edit_token", "created_at", "updated_at")}
+
+
+def player_payload(rng: random.Random, run: str, i: int) -> Dict[str, Any]:
+    from benchmarks.datagen import player_row
+
+    row = player_row(rng, i, None)
+    row["name"] = f"Write{run}x{i}"
+    return {k: v for k, v in row.items() if k not in ("edit_token", "created_at", "updated_at")}
+
+
+async def drive(requests: int, seed_value: int) -> Dict[str, Any]:
+    import httpx
+
+    from main import app
+    from metrics import metrics
+
+    rng = random.Random(seed_value)
+    run = str(int(time.time()))
+    latencies: Dict[str, List[float]] = {name: [] for name in SCENARIOS}
+    errors: Dict[str, int] = {}
+    queries: Dict[str, List[int]] = {name: [] for name in SCENARIOS}
+    guilds: List[tuple] = []
+    players: List[tuple] = []
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        async def timed(name: str, method: str, path: str, expect: int, **kw):
+            q0, t0 = metrics.queries, time.perf_counter()
+            r = await client.request(method, path, **kw)
+            latencies[name].append(time.perf_counter() - t0)
+            queries[name].append(metrics.queries - q0)
+            if r.status_code != expect:
+                errors[name] = errors.get(name, 0) + 1
+            return r
+
+        async def step(i: int):
+            r = await timed("create_guild", "POST", "/api/guilds", 200, json=guild_payload(rng, run, i))
+            guilds.append((r.json()["guild"]["id"], r.json()["edit_token"]))
+            r = await timed("create_player", "POST", "/api/players", 200, json=player_payload(rng, run, i))
+            players.append((r.json()["player"]["id"], r.json()["edit_token"]))
+
+            gid, token = rng.choice(guilds)
+            await timed(
+                "update_guild", "PUT", f"/api/guilds/{gid}", 200,
+                json=guild_payload(rng, run, 10**6 + i), headers={"X-Edit-Token": token},
+            )
+            pid, token = rng.choice(players)
+            await timed(
+                "update_player", "PUT", f"/api/players/{pid}", 200,
+                json=player_payload(rng, run, 10**6 + i), headers={"X-Edit-Token": token},
+            )
+            await timed(
+                "update_bad_token", "PUT", f"/api/players/{pid}", 401,
+                json=player_payload(rng, run, 10**6 + i), headers={"X-Edit-Token": "wrong"},
+            )
+
+        for i in range(5):   # Warm-up: Imports, Pool, Statement-Caches
+            await step(-i - 1)
+        for samples in (*latencies.values(), *queries.values()):
+            samples.clear()
+
+        started = time.perf_counter()
+        for i in range(requests):
+            await step(i)
+        elapsed = time.perf_counter() - started
+
+    out: Dict[str, Any] = {"wall_s": round(elapsed, 3), "endpoints": {}}
+    for name in SCENARIOS:
+        values = sorted(latencies[name])
+        out["endpoints"][name] = {
+            "n": len(values),
+            "errors": errors.get(name, 0),
+            "p50_ms": round(percentile(values, 50) * 1000, 2),
+            "p95_ms": round(percentile(values, 95) * 1000, 2),
+            "p99_ms": round(percentile(values, 99) * 1000, 2),
+            "queries": round(sum(queries[name]) / len(queries[name]), 1) if queries[name] else None,
+        }
+    return out
+
+
+def run_child(args) -> Dict[str, Any]:
+    from benchmarks.datagen import SCALES, seed
+
+    counts = seed(SCALES[args.scale])
+    result = asyncio.run(drive(args.requests, args.seed))
+    result["rows"] = counts
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--db", default="sqlite", help="sqlite, postgres oder beides: sqlite,postgres")
+    parser.add_argument("--scale", choices=("10k", "100k", "1m"), default="10k")
+    parser.add_argument("--requests", type=int, default=200, help="Durchlaeufe, je einer pro Szenario")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", default="", help="Ergebnis zusaetzlich als JSON schreiben")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_child(args)))
+        return
+
+    results = {}
+    for db in [d.strip() for d in args.db.split(",") if d.strip()]:
+        env = dict(os.environ, RATE_LIMIT_PER_MINUTE="100000000", WARMUP_PATHS="", SLOW_QUERY_MS="0")
+        if db == "postgres":
+            env["DATABASE_URL"] = POSTGRES_URL
+        else:
+            env["DATABASE_URL"] = "sqlite:///" + os.path.join(tempfile.gettempdir(), f"tbc-bench-writes-{args.scale}.db")
+        proc = subprocess.run(
+            [sys.executable, "-m", "benchmarks.writes", "--child", *sys.argv[1:]],
+            env=env, stdout=subprocess.PIPE, text=True,
+        )
+        if proc.returncode != 0:
+            print(f"{db}: failed (exit {proc.returncode})", file=sys.stderr)
+            continue
+        results[db] = json.loads(proc.stdout.strip().splitlines()[-1])
+
+    for db, r in results.items():
+        print(f"\n{db}: {args.requests} x {len(SCENARIOS)} requests in {r['wall_s']}s, rows {r['rows']}")
+        print(f"  {'endpoint':<18}{'n':>6}{'err':>5}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'queries':>9}")
+        for name, e in r["endpoints"].items():
+            print(f"  {name:<18}{e['n']:>6}{e['errors']:>5}{e['p50_ms']:>10}{e['p95_ms']:>10}{e['p99_ms']:>10}{e['queries']!s:>9}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+"""
+Mehrzeilige Upserts fuer /api/import und /api/import/batch.
+
+Ein Statement pro Tabelle und Chunk (INSERT ... VALUES (...), (...) ON CONFLICT DO UPDATE).
+Innerhalb eines Statements darf ein Konflikt-Key nur einmal vorkommen, daher wird vorher
+dedupliziert (letzter Export gewinnt).
+
+character_imports wird nur ueberschrieben, wenn sich payload_hash geaendert hat; fuer
+unveraenderte Exporte wird auch die players-Zeile nicht neu geschrieben.
+"""
+import json
+import os
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from fastapi import Request
+from sqlalchemy import select, tuple_
+from sqlalchemy.dialects import postgresql, sqlite
+
+from import_wpe import MAX_EXPORT_CHARS
+from models import Player, CharacterImport, utcnow
+
+IMPORT_BATCH_CHUNK = int(os.getenv("IMPORT_BATCH_CHUNK", "200"))
+IMPORT_BATCH_MAX_ITEMS = int(os.getenv("IMPORT_BATCH_MAX_ITEMS", "1000"))
+# Obergrenze fuer den ganzen Request-Body, gilt vor dem Parsen (Content-Length bzw. mitgezaehlt)
+IMPORT_BATCH_MAX_BYTES = int(os.getenv("IMPORT_BATCH_MAX_BYTES", str(32 * 1024 * 1024)))
+# eine NDJSON-Zeile: Exportstring plus Luft fuer JSON-Huelle und Escaping
+IMPORT_MAX_LINE_BYTES = int(os.getenv("IMPORT_MAX_LINE_BYTES", str(2 * MAX_EXPORT_CHARS + 1024)))
+
+LINE_TOO_LONG = f"Export line too long (max {IMPORT_MAX_LINE_BYTES} bytes)"
+
+
+class BodyTooLarge(Exception):
+    pass
+
+
+def dialect_insert(db):
+    if db.get_bind().dialect.name == "sqlite":
+        return sqlite.insert
+    return postgresql.insert
+
+
+def _dedupe(rows: List[Dict[str, Any]], key) -> List[Dict[str, Any]]:
+    out: Dict[Any, Dict[str, Any]] = {}
+    for r in rows:
+        out[key(r)] = r
+    return list(out.values())
+
+
+def upsert_players(db, rows: List[Dict[str, Any]], update: bool = True) -> None:
+    """
+    update=False: nur fehlende Spieler anlegen (ON CONFLICT DO NOTHING, kein Row-Rewrite).
+    """
+    if not rows:
+        return
+    rows = _dedupe(rows, lambda r: (r["name"], r["realm"]))
+    stmt = dialect_insert(db)(Player).values(rows)
+    if not update:
+        db.execute(stmt.on_conflict_do_nothing(index_elements=[Player.name, Player.realm]))
+        return
+    # edit_token NICHT überschreiben bei Update
+    set_vals = {c: stmt.excluded[c] for c in rows[0] if c != "edit_token"}
+    set_vals["updated_at"] = utcnow()
+    stmt = stmt.on_conflict_do_update(index_elements=[Player.name, Player.realm], set_=set_vals)
+    db.execute(stmt)
+
+
+def upsert_character_imports(db, rows: List[Dict[str, Any]]) -> Dict[Tuple[str, str], int]:
+    """
+    Liefert {(name, realm): id} der eingefuegten oder geaenderten Zeilen; Exporte, deren
+    payload_hash unveraendert ist, fehlen im Ergebnis.
+    Exporte mit guid kollidieren auf guid, ohne auf (name, realm).
+    """
+    ids: Dict[Tuple[str, str], int] = {}
+    with_guid = _dedupe([r for r in rows if r.get("guid")], lambda r: r["guid"])
+    without_guid = _dedupe([r for r in rows if not r.get("guid")], lambda r: (r["name"], r["realm"]))
+
+    for group, index_elements in (
+        (with_guid, [CharacterImport.guid]),
+        (without_guid, [CharacterImport.name, CharacterImport.realm]),
+    ):
+        if not group:
+            continue
+        stmt = dialect_insert(db)(CharacterImport).values(group)
+        update = {c: stmt.excluded[c] for c in group[0]}
+        update["updated_at"] = utcnow()
+        stmt = stmt.on_conflict_do_update(
+            index_elements=index_elements,
+            set_=update,
+            where=CharacterImport.payload_hash.is_distinct_from(stmt.excluded.payload_hash),
+        ).returning(
+            CharacterImport.id, CharacterImport.name, CharacterImport.realm,
+        )
+        for row in db.execute(stmt):
+            ids[(row.name, row.realm)] = int(row.id)
+    return ids
+
+
+def character_import_ids(db, keys: List[Tuple[str, str]]) -> Dict[Tuple[str, str], int]:
+    if not keys:
+        return {}
+    stmt = select(CharacterImport.id, CharacterImport.name, CharacterImport.realm).where(
+        tuple_(CharacterImport.name, CharacterImport.realm).in_(keys)
+    )
+    return {(r.name, r.realm): int(r.id) for r in db.execute(stmt)}
+
+
+async def iter_export_strings(request: Request) -> AsyncIterator[Tuple[Optional[str], Optional[str]]]:
+    """
+    Liefert (exportString, fehler) pro Eintrag.
+      application/x-ndjson: eine Zeile pro Export, roh ("WPE2|...") oder JSON ("..." / {"exportString": ...}),
+                            wird gestreamt gelesen; zu lange Zeilen werden verworfen, sobald der
+                            Puffer IMPORT_MAX_LINE_BYTES ueberschreitet, nicht erst am Zeilenende
+      application/json:     Array aus Strings oder {"exportString": ...}
+    Wirft BodyTooLarge, wenn der Body IMPORT_BATCH_MAX_BYTES ueberschreitet (bei NDJSON ggf. erst
+    nach den bereits gelieferten Eintraegen).
+    """
+    length = request.headers.get("content-length")
+    if length and length.isdigit() and int(length) > IMPORT_BATCH_MAX_BYTES:
+        raise BodyTooLarge()
+
+    ctype = (request.headers.get("content-type") or "").lower()
+    if "ndjson" in ctype or "jsonl" in ctype:
+        buf = b""
+        total = 0
+        skipping = False   # Rest einer zu langen Zeile bis zum naechsten Zeilenumbruch
+        async for chunk in request.stream():
+            total += len(chunk)
+            if total > IMPORT_BATCH_MAX_BYTES:
+                raise BodyTooLarge()
+            buf += chunk
+            *lines, buf = buf.split(b"\n")
+            for line in lines:
+                if skipping:
+                    skipping = False
+                    continue
+                item = _parse_line(line) if len(line) <= IMPORT_MAX_LINE_BYTES else (None, LINE_TOO_LONG)
+                if item is not None:
+                    yield item
+            if not skipping and len(buf) > IMPORT_MAX_LINE_BYTES:
+                yield None, LINE_TOO_LONG
+                skipping = True
+            if skipping:
+                buf = b""
+        item = None if skipping else _parse_line(buf)
+        if item is not None:
+            yield item
+        return
+
+    chunks: List[bytes] = []
+    total = 0
+    async for chunk in request.stream():
+        total += len(chunk)
+        if total > IMPORT_BATCH_MAX_BYTES:
+            raise BodyTooLarge()
+        chunks.append(chunk)
+    try:
+        body = json.loads(b"".join(chunks))
+    except ValueError:
+        yield None, "Invalid JSON body"
+        return
+    if not isinstance(body, list):
+        yield None, "Expected a JSON array of export strings"
+        return
+    for entry in body:
+        yield _coerce(entry)
+
+
+def _parse_line(line: bytes) -> Optional[Tuple[Optional[str], Optional[str]]]:
+    text = line.decode("utf-8", errors="replace").strip()
+    if not text:
+        return None
+    if text[0] in "{\"":
+        try:
+            return _coerce(json.loads(text))
+        except ValueError:
+            return None, "Invalid JSON line"
+    return text, None
+
+
+def _coerce(entry: Any) -> Tuple[Optional[str], Optional[str]]:
+    if isinstance(entry, str):
+        return entry, None
+    if isinstance(entry, dict) and isinstance(entry.get("exportString"), str):
+        return entry["exportString"], None
+    return None, "Expected an export string"
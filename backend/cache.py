@@ -0,0 +1,124 @@
+"""
+Read-through Cache fuer die oeffentlichen GET Endpunkte.
+
+Jede Tabelle hat einen Generationszaehler, den die schreibenden Endpunkte nach dem Commit
+hochzaehlen (bump). Die Generationen der gelesenen Tabellen sind Teil des Cache-Keys, daher
+ist ein Eintrag nach einem Write sofort unerreichbar und faellt per LRU raus.
+Die Zaehler sind pro Prozess; bei mehreren Workern begrenzt RESPONSE_CACHE_TTL, wie lange
+ein anderer Worker veraltete Daten ausliefern kann.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Iterable, Optional, Tuple
+
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "1024"))
+RESPONSE_CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL", "30"))
+
+_generations: Dict[str, int] = {}
+_gen_lock = threading.Lock()
+
+
+def bump(*tables: str) -> None:
+    with _gen_lock:
+        for t in tables:
+            _generations[t] = _generations.get(t, 0) + 1
+
+
+def generation(*tables: str) -> Tuple[int, ...]:
+    return tuple(_generations.get(t, 0) for t in tables)
+
+
+def normalize_params(params: Dict[str, Any]) -> Tuple[Tuple[str, Any], ...]:
+    out = []
+    for k in sorted(params):
+        v = params[k]
+        if isinstance(v, str):
+            v = v.strip()
+        if v is None or v == "":
+            continue
+        out.append((k, v))
+    return tuple(out)
+
+
+class ResponseCache:
+    def __init__(self, max_size: int = RESPONSE_CACHE_SIZE, ttl: float = RESPONSE_CACHE_TTL):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def enabled(self) -> bool:
+        return self.max_size > 0 and self.ttl > 0
+
+    def _lookup(
+        self, endpoint: str, params: Dict[str, Any], tables: Iterable[str], gen: Optional[Tuple[int, ...]],
+    ) -> Tuple[Hashable, Optional[tuple]]:
+        # Generation vor dem Lesen festhalten: ein paralleler Write macht das Ergebnis sofort ungueltig.
+        # gen: bereits gelesene Generation, wenn mehrere Eintraege eines Requests (Validator, Body,
+        # komprimierte Varianten) unter derselben landen muessen
+        key = (endpoint, normalize_params(params), gen if gen is not None else generation(*tables))
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and entry[0] > now:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return key, entry
+            self.misses += 1
+        return key, None
+
+    def _store(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def get_or_compute(
+        self, endpoint: str, params: Dict[str, Any], tables: Iterable[str], compute: Callable[[], Any],
+        gen: Optional[Tuple[int, ...]] = None,
+    ) -> Any:
+        if not self.enabled():
+            return compute()
+        key, entry = self._lookup(endpoint, params, tables, gen)
+        if entry is not None:
+            return entry[1]
+        value = compute()
+        self._store(key, value)
+        return value
+
+    async def aget_or_compute(
+        self, endpoint: str, params: Dict[str, Any], tables: Iterable[str], compute: Callable[[], Awaitable[Any]],
+        gen: Optional[Tuple[int, ...]] = None,
+    ) -> Any:
+        if not self.enabled():
+            return await compute()
+        key, entry = self._lookup(endpoint, params, tables, gen)
+        if entry is not None:
+            return entry[1]
+        value = await compute()
+        self._store(key, value)
+        return value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / total, 4) if total else 0.0,
+            "generations": dict(_generations),
+        }
+
+
+response_cache = ResponseCache()
@@ -0,0 +1,200 @@
+"""
+Change-Feed fuer GET /api/stream (Server-Sent Events).
+
+Schreibende Endpunkte rufen emit(db, event) vor dem Commit auf, Events werden nur bei
+erfolgreichem Commit zugestellt:
+  Postgres: pg_notify im selben Transaktionskontext; jeder Worker haelt eine LISTEN-Verbindung
+            (Thread) und verteilt die Notifications an seine eigenen SSE-Clients
+  SQLite:   in-process, nach dem Commit (Session after_commit), nur dieser Worker
+
+Events sind klein: {"type": "player"|"guild"|"application", "id", "realm", "faction", ...}
+Der Feed ist oeffentlich: Bewerbungs-Events tragen daher nur realm/faction, keine ids und
+keine Spielerdaten (die Inbox selbst braucht den Edit-Token der Gilde).
+"""
+import asyncio
+import json
+import logging
+import os
+import threading
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import event, text
+from sqlalchemy.orm import Session
+
+log = logging.getLogger(__name__)
+
+CHANNEL = "tbc_changes"
+STREAM_MAX_CLIENTS = int(os.getenv("STREAM_MAX_CLIENTS", "500"))
+STREAM_QUEUE_SIZE = int(os.getenv("STREAM_QUEUE_SIZE", "100"))
+STREAM_KEEPALIVE_SECONDS = float(os.getenv("STREAM_KEEPALIVE_SECONDS", "15"))
+
+_PENDING = "changefeed_pending"
+
+
+class StreamFull(Exception):
+    pass
+
+
+def matches(ev: Dict[str, Any], filters: Dict[str, Optional[str]]) -> bool:
+    """
+    realm/faction gegen das Event; class_name/role gegen den Spieler (player) bzw. die Needs
+    (guild). Bewerbungen haben weder Klasse noch Rolle und fallen bei diesen Filtern raus.
+    """
+    for key in ("realm", "faction"):
+        if filters.get(key) and ev.get(key) != filters[key]:
+            return False
+    for key, needs_key in (("class_name", "need_classes"), ("role", "need_roles")):
+        want = filters.get(key)
+        if not want:
+            continue
+        if ev.get("type") == "guild":
+            if want not in (ev.get(needs_key) or []):
+                return False
+        elif ev.get(key) != want:
+            return False
+    return True
+
+
+class Subscriber:
+    def __init__(self, filters: Dict[str, Optional[str]]):
+        self.filters = filters
+        self.loop = asyncio.get_running_loop()
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=STREAM_QUEUE_SIZE)
+        self.dropped = 0
+
+    def offer(self, ev: Dict[str, Any]) -> None:
+        # laeuft im Event Loop; langsame Clients verlieren Events statt den Worker zu bremsen
+        try:
+            self.queue.put_nowait(ev)
+        except asyncio.QueueFull:
+            self.dropped += 1
+
+
+class Broker:
+    def __init__(self):
+        self._subs: List[Subscriber] = []
+        self._lock = threading.Lock()
+        self.published = 0
+        self._listener: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def full(self) -> bool:
+        with self._lock:
+            return len(self._subs) >= STREAM_MAX_CLIENTS
+
+    def subscribe(self, filters: Dict[str, Optional[str]]) -> Subscriber:
+        with self._lock:
+            if len(self._subs) >= STREAM_MAX_CLIENTS:
+                raise StreamFull("Too many stream clients")
+            sub = Subscriber(filters)
+            self._subs.append(sub)
+        return sub
+
+    def unsubscribe(self, sub: Subscriber) -> None:
+        with self._lock:
+            if sub in self._subs:
+                self._subs.remove(sub)
+
+    def dispatch(self, ev: Dict[str, Any]) -> None:
+        """
+        Threadsicher: verteilt an alle passenden Clients dieses Workers.
+        """
+        with self._lock:
+            subs = list(self._subs)
+            self.published += 1
+        for sub in subs:
+            if matches(ev, sub.filters):
+                sub.loop.call_soon_threadsafe(sub.offer, ev)
+
+    # Postgres LISTEN
+
+    def start_listener(self, engine) -> None:
+        if engine.dialect.name != "postgresql" or self._listener is not None:
+            return
+        conninfo = engine.url.set(drivername="postgresql").render_as_string(hide_password=False)
+        self._stop.clear()
+        self._listener = threading.Thread(target=self._listen, args=(conninfo,), name="changefeed", daemon=True)
+        self._listener.start()
+
+    def stop_listener(self) -> None:
+        self._stop.set()
+        self._listener = None
+
+    def _listen(self, conninfo: str) -> None:
+        import psycopg
+
+        while not self._stop.is_set():
+            try:
+                with psycopg.connect(conninfo, autocommit=True) as conn:
+                    conn.execute(f"LISTEN {CHANNEL}")
+                    while not self._stop.is_set():
+                        for n in conn.notifies(timeout=1.0):
+                            try:
+                                self.dispatch(json.loads(n.payload))
+                            except ValueError:
+                                log.warning("changefeed: invalid payload %r", n.payload)
+            except Exception:
+                log.exception("changefeed listener failed, reconnecting")
+                self._stop.wait(2.0)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "clients": len(self._subs),
+                "published": self.published,
+                "dropped": sum(s.dropped for s in self._subs),
+                "listener": self._listener is not None,
+            }
+
+
+broker = Broker()
+
+
+def emit(db: Session, ev: Dict[str, Any]) -> None:
+    """
+    Vor dem Commit aufrufen; das Event geht nur raus, wenn die Transaktion committed wird.
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        db.execute(text("SELECT pg_notify(:channel, :payload)"), {"channel": CHANNEL, "payload": json.dumps(ev)})
+        return
+    db.info.setdefault(_PENDING, []).append(ev)
+
+
+@event.listens_for(Session, "after_commit")
+def _dispatch_pending(session: Session) -> None:
+    for ev in session.info.pop(_PENDING, []):
+        broker.dispatch(ev)
+
+
+@event.listens_for(Session, "after_rollback")
+def _drop_pending(session: Session) -> None:
+    session.info.pop(_PENDING, None)
+
+
+def player_event(p) -> Dict[str, Any]:
+    return {
+        "type": "player", "id": p.id, "realm": p.realm, "faction": p.faction,
+        "class_name": p.class_name, "spec": p.spec, "role": p.role,
+    }
+
+
+def _need_values(needs, key: str) -> List[str]:
+    # needs ist List[dict] ohne Schema: nur nicht-leere Strings (sonst scheitert sorted an int/str)
+    return sorted({v for n in needs or [] if isinstance(n, dict) and isinstance(v := n.get(key), str) and v})
+
+
+def guild_event(g) -> Dict[str, Any]:
+    return {
+        "type": "guild", "id": g.id, "realm": g.realm, "faction": g.faction,
+        "need_classes": _need_values(g.needs, "class"),
+        "need_roles": _need_values(g.needs, "role"),
+    }
+
+
+def application_event(g) -> Dict[str, Any]:
+    # nur "es gibt eine neue Bewerbung in realm/faction"; wer sich wo beworben hat, ist nicht oeffentlich
+    return {"type": "application", "realm": g.realm, "faction": g.faction}
+
+
+def sse(ev: Dict[str, Any]) -> str:
+    return f"event: {ev.get('type', 'message')}\ndata: {json.dumps(ev, separators=(',', ':'))}\n\n"
@@ -0,0 +1,155 @@
+"""
+Response-Kompression (gzip, optional Brotli), ausgehandelt ueber Accept-Encoding.
+
+CompressionMiddleware komprimiert JSON/Text-Antworten ab COMPRESSION_MIN_SIZE Bytes.
+Antworten mit gesetztem Content-Encoding laesst sie durch: die Listen-Endpunkte legen den
+Body als EncodedBody in den Read-Cache, die komprimierten Varianten haengen am selben
+Eintrag. Eine heisse Liste wird so nicht bei jedem Treffer neu komprimiert, und gzip/br
+koennen nie einen anderen Stand ausliefern als die unkomprimierte Antwort. SSE (text/event-stream) bleibt unkomprimiert.
+
+Brotli braucht das Paket "brotli" (optional); ohne wird nur gzip angeboten.
+"""
+import gzip
+import os
+from typing import Any, Dict, Optional, Tuple
+
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers, MutableHeaders
+
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+COMPRESSION_GZIP_LEVEL = int(os.getenv("COMPRESSION_GZIP_LEVEL", "6"))
+COMPRESSION_BROTLI_QUALITY = int(os.getenv("COMPRESSION_BROTLI_QUALITY", "5"))
+COMPRESSION_ENCODINGS = [e.strip() for e in os.getenv("COMPRESSION_ENCODINGS", "br,gzip").split(",") if e.strip()]
+# groessere Bodies im Threadpool komprimieren, damit der Event Loop frei bleibt
+COMPRESSION_THREAD_SIZE = int(os.getenv("COMPRESSION_THREAD_SIZE", "65536"))
+
+COMPRESSIBLE_TYPES = ("application/json", "text/", "application/javascript")
+
+try:
+    import brotli  # optional
+except ImportError:
+    brotli = None
+
+
+def available_encodings():
+    return [e for e in COMPRESSION_ENCODINGS if e == "gzip" or (e == "br" and brotli is not None)]
+
+
+def choose_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """
+    Bestes angebotenes Encoding nach q-Wert; bei Gleichstand gilt die Reihenfolge aus
+    COMPRESSION_ENCODINGS. None = unkomprimiert.
+    """
+    if not accept_encoding:
+        return None
+    q: Dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        name = name.strip().lower()
+        weight = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                weight = float(params[2:])
+            except ValueError:
+                weight = 0.0
+        if name:
+            q[name] = weight
+    best, best_q = None, 0.0
+    for enc in available_encodings():
+        w = q.get(enc, q.get("*", 0.0))
+        if w > best_q:
+            best, best_q = enc, w
+    return best
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=COMPRESSION_BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=COMPRESSION_GZIP_LEVEL, mtime=0)
+
+
+async def acompress(body: bytes, encoding: str) -> bytes:
+    if len(body) >= COMPRESSION_THREAD_SIZE:
+        return await run_in_threadpool(compress, body, encoding)
+    return compress(body, encoding)
+
+
+class EncodedBody:
+    """
+    Serialisierter Body mit seinen komprimierten Varianten (werden beim ersten Bedarf erzeugt).
+    validator: Stand, unter dem der Body gebaut wurde (fuer ETag/Last-Modified).
+    """
+    __slots__ = ("body", "validator", "_variants")
+
+    def __init__(self, body: bytes, validator: Any = None):
+        self.body = body
+        self.validator = validator
+        self._variants: Dict[str, bytes] = {}
+
+    async def encoded(self, accept_encoding: Optional[str]) -> Tuple[bytes, Dict[str, str]]:
+        """
+        (body, headers) passend zu Accept-Encoding.
+        """
+        headers = {"Vary": "Accept-Encoding"}
+        encoding = choose_encoding(accept_encoding) if len(self.body) >= COMPRESSION_MIN_SIZE else None
+        if encoding is None:
+            return self.body, headers
+        data = self._variants.get(encoding)
+        if data is None:
+            data = self._variants[encoding] = await acompress(self.body, encoding)
+        headers["Content-Encoding"] = encoding
+        return data, headers
+
+
+class CompressionMiddleware:
+    def __init__(self, app, minimum_size: int = COMPRESSION_MIN_SIZE):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding"))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start = None
+        chunks = []
+        passthrough = False
+
+        async def send_wrapper(message):
+            nonlocal start, passthrough
+            if message["type"] == "http.response.start":
+                headers = Headers(raw=message["headers"])
+                ctype = headers.get("content-type", "")
+                passthrough = (
+                    "content-encoding" in headers
+                    or "text/event-stream" in ctype
+                    or not ctype.startswith(COMPRESSIBLE_TYPES)
+                )
+                if passthrough:
+                    await send(message)
+                else:
+                    start = message
+                return
+            if passthrough or message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            chunks.append(message.get("body", b""))
+            if message.get("more_body", False):
+                return
+            body = b"".join(chunks)
+            headers = MutableHeaders(raw=start["headers"])
+            headers.add_vary_header("Accept-Encoding")
+            if len(body) >= self.minimum_size:
+                body = await acompress(body, encoding)
+                headers["Content-Encoding"] = encoding
+                headers["Content-Length"] = str(len(body))
+            await send(start)
+            await send({"type": "http.response.body", "body": body})
+
+        await self.app(scope, receive, send_wrapper)
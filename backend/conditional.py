@@ -0,0 +1,74 @@
+"""
+Conditional GET (ETag / If-None-Match, Last-Modified / If-Modified-Since).
+
+Die Validatoren sind billig: fuer Listen max(updated_at) + count(*) der gefilterten Menge,
+fuer einzelne Eintraege updated_at. Passt der Client-Validator, wird 304 ohne Body geliefert.
+"""
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any, Optional
+
+from fastapi import Request, Response
+
+# Browser sollen immer revalidieren statt heuristisch aus dem Cache zu lesen
+CACHE_CONTROL = "no-cache"
+
+
+def _utc(dt: datetime) -> datetime:
+    # SQLite liefert naive Zeitstempel (UTC)
+    if dt.tzinfo is None:
+        return dt.replace(tzinfo=timezone.utc)
+    return dt.astimezone(timezone.utc)
+
+
+def make_etag(*parts: Any) -> str:
+    raw = "|".join("" if p is None else (_utc(p).isoformat() if isinstance(p, datetime) else str(p)) for p in parts)
+    return 'W/"' + hashlib.sha1(raw.encode("utf-8")).hexdigest()[:20] + '"'
+
+
+def http_date(dt: datetime) -> str:
+    return format_datetime(_utc(dt).replace(microsecond=0), usegmt=True)
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    if header.strip() == "*":
+        return True
+    # schwacher Vergleich: W/ Praefix ignorieren
+    want = etag[2:] if etag.startswith("W/") else etag
+    for tag in header.split(","):
+        tag = tag.strip()
+        if tag.startswith("W/"):
+            tag = tag[2:]
+        if tag == want:
+            return True
+    return False
+
+
+def is_not_modified(request: Request, etag: str, last_modified: Optional[datetime] = None) -> bool:
+    inm = request.headers.get("if-none-match")
+    if inm is not None:
+        return _etag_matches(inm, etag)
+    ims = request.headers.get("if-modified-since")
+    if ims and last_modified is not None:
+        try:
+            return _utc(last_modified).replace(microsecond=0) <= _utc(parsedate_to_datetime(ims))
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+def validator_headers(etag: str, last_modified: Optional[datetime] = None) -> dict:
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+    if last_modified is not None:
+        headers["Last-Modified"] = http_date(last_modified)
+    return headers
+
+
+def not_modified_response(etag: str, last_modified: Optional[datetime] = None) -> Response:
+    return Response(status_code=304, headers=validator_headers(etag, last_modified))
+
+
+def set_validators(response: Response, etag: str, last_modified: Optional[datetime] = None) -> None:
+    for k, v in validator_headers(etag, last_modified).items():
+        response.headers[k] = v
@@ -1,6 +1,14 @@
 import os
-from sqlalchemy import create_engine
+import threading
+import time
+from typing import Any, Callable, Dict
+
+from sqlalchemy import create_engine, event, exc
 from sqlalchemy.orm import sessionmaker, DeclarativeBase
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from starlette.concurrency import run_in_threadpool
+
+from metrics import instrument_engine
 
 def normalize_db_url(url: str) -> str:
     if url.startswith("postgres://"):
@@ -9,13 +17,140 @@ def normalize_db_url(url: str) -> str:
         url = url.replace("postgresql://", "postgresql+psycopg://", 1)
     return url
 
+def async_db_url(url: str) -> str:
+    # psycopg 3 kann sync und async; SQLite braucht aiosqlite
+    if url.startswith("sqlite://"):
+        return url.replace("sqlite://", "sqlite+aiosqlite://", 1)
+    return url
+
 DATABASE_URL = os.getenv("DATABASE_URL")
 if not DATABASE_URL:
     DATABASE_URL = "sqlite:///./local.db"
 else:
     DATABASE_URL = normalize_db_url(DATABASE_URL)
 
-engine = create_engine(DATABASE_URL, pool_pre_ping=True)
+# Async Modus fuer die lesenden Endpunkte (DB_ASYNC=1), siehe get_read_db
+DB_ASYNC = os.getenv("DB_ASYNC", "0") == "1"
+
+# Pool pro Engine und Prozess: bei mehreren uvicorn Workern (und DB_ASYNC=1, zweite Engine)
+# belegt die App bis zu workers * engines * (DB_POOL_SIZE + DB_MAX_OVERFLOW) Verbindungen.
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))        # Sekunden Warten auf eine freie Verbindung
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))        # Sekunden, -1 = nie
+DB_CONNECT_TIMEOUT = int(os.getenv("DB_CONNECT_TIMEOUT", "10"))
+DB_STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "0"))   # 0 = aus
+
+# Lebendpruefung beim Checkout:
+#   pre_ping: SELECT 1 vor jeder Nutzung (Default, robust, kostet einen Roundtrip pro Request)
+#   recycle:  kein Ping; Verbindungen werden nach DB_POOL_RECYCLE ersetzt, TCP Keepalives
+#             erkennen tote Verbindungen, und ein Disconnect-Fehler invalidiert den ganzen Pool
+DB_POOL_LIVENESS = os.getenv("DB_POOL_LIVENESS", "pre_ping")
+
+# Verbindungen, die der Warm-up nach dem Start vorab oeffnet (0 = aus)
+DB_WARMUP_CONNECTIONS = int(os.getenv("DB_WARMUP_CONNECTIONS", str(min(DB_POOL_SIZE, 2))))
+
+
+class PoolMetrics:
+    """
+    Checkout-Wartezeiten und Nutzung eines Pools, fuer /api/db/stats.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.pools: list = []
+        self.checkouts = 0
+        self.timeouts = 0
+        self.connects = 0
+        self.invalidated = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def observe_wait(self, seconds: float) -> None:
+        with self._lock:
+            self.checkouts += 1
+            self.wait_total += seconds
+            if seconds > self.wait_max:
+                self.wait_max = seconds
+
+    def count(self, attr: str) -> None:
+        with self._lock:
+            setattr(self, attr, getattr(self, attr) + 1)
+
+    def stats(self) -> Dict[str, Any]:
+        pools = [
+            {
+                "size": p.size(),
+                "checked_out": p.checkedout(),
+                "checked_in": p.checkedin(),
+                "overflow": max(p.overflow(), 0),
+            }
+            for p in self.pools
+        ]
+        return {
+            "pools": pools,
+            "in_use": sum(p["checked_out"] for p in pools),
+            "checkouts": self.checkouts,
+            "checkout_wait_avg_ms": round(self.wait_total / self.checkouts * 1000, 3) if self.checkouts else 0.0,
+            "checkout_wait_max_ms": round(self.wait_max * 1000, 3),
+            "checkout_timeouts": self.timeouts,
+            "connects": self.connects,
+            "invalidated": self.invalidated,
+        }
+
+
+pool_metrics = PoolMetrics()
+
+
+class _TimedCheckout:
+    # _do_get ist die Stelle, an der QueuePool auf eine freie Verbindung wartet
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            entry = super()._do_get()
+        except exc.TimeoutError:
+            pool_metrics.count("timeouts")
+            raise
+        pool_metrics.observe_wait(time.perf_counter() - started)
+        return entry
+
+
+class InstrumentedQueuePool(_TimedCheckout, QueuePool):
+    pass
+
+
+class InstrumentedAsyncQueuePool(_TimedCheckout, AsyncAdaptedQueuePool):
+    pass
+
+
+def _engine_kwargs(is_async: bool = False) -> dict:
+    kwargs: dict = {
+        "poolclass": InstrumentedAsyncQueuePool if is_async else InstrumentedQueuePool,
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": DB_POOL_LIVENESS == "pre_ping",
+    }
+    if DATABASE_URL.startswith("postgresql"):
+        connect_args: dict = {"connect_timeout": DB_CONNECT_TIMEOUT}
+        if DB_STATEMENT_TIMEOUT_MS > 0:
+            connect_args["options"] = f"-c statement_timeout={DB_STATEMENT_TIMEOUT_MS}"
+        if DB_POOL_LIVENESS == "recycle":
+            connect_args.update(keepalives=1, keepalives_idle=30, keepalives_interval=10, keepalives_count=3)
+        kwargs["connect_args"] = connect_args
+    return kwargs
+
+
+def _instrument(pool) -> None:
+    pool_metrics.pools.append(pool)
+    event.listen(pool, "connect", lambda *a: pool_metrics.count("connects"))
+    event.listen(pool, "invalidate", lambda *a: pool_metrics.count("invalidated"))
+
+
+engine = create_engine(DATABASE_URL, **_engine_kwargs())
+_instrument(engine.pool)
+instrument_engine(engine)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 class Base(DeclarativeBase):
@@ -27,3 +162,79 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+async_engine = None
+AsyncSessionLocal = None
+if DB_ASYNC:
+    from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+    async_engine = create_async_engine(async_db_url(DATABASE_URL), **_engine_kwargs(is_async=True))
+    _instrument(async_engine.sync_engine.pool)
+    instrument_engine(async_engine.sync_engine)
+    AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+
+class ReadSession:
+    """
+    Gemeinsame Schnittstelle fuer die async Lese-Endpunkte: run(fn, ...) fuehrt eine
+    normale Session-Funktion fn(session, ...) aus.
+      DB_ASYNC=1: AsyncSession.run_sync, wartet auf die DB ohne einen Threadpool-Thread zu belegen
+      sonst:      sync Session im Threadpool (wie die bisherigen def-Handler)
+    """
+
+    def __init__(self, session):
+        self.session = session
+
+    async def run(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        if DB_ASYNC:
+            return await self.session.run_sync(fn, *args, **kwargs)
+        return await run_in_threadpool(fn, self.session, *args, **kwargs)
+
+
+async def get_read_db():
+    if DB_ASYNC:
+        async with AsyncSessionLocal() as session:
+            yield ReadSession(session)
+        return
+    db = SessionLocal()
+    try:
+        yield ReadSession(db)
+    finally:
+        db.close()
+
+
+def prime_pool(n: int = DB_WARMUP_CONNECTIONS) -> int:
+    """
+    Oeffnet n Verbindungen gleichzeitig und gibt sie an den Pool zurueck, damit die ersten
+    Requests nach einem Kaltstart nicht auf Verbindungsaufbau (TCP, TLS, Auth) warten.
+    """
+    conns = []
+    try:
+        for _ in range(min(n, DB_POOL_SIZE)):
+            conn = engine.connect()
+            conns.append(conn)
+            conn.exec_driver_sql("SELECT 1")
+    finally:
+        for conn in conns:
+            conn.close()
+    return len(conns)
+
+
+async def aprime_pool(n: int = DB_WARMUP_CONNECTIONS) -> int:
+    """
+    prime_pool fuer die sync Engine (Writes) und, bei DB_ASYNC=1, die async Engine (Reads).
+    """
+    primed = await run_in_threadpool(prime_pool, n)
+    if async_engine is None:
+        return primed
+    conns = []
+    try:
+        for _ in range(min(n, DB_POOL_SIZE)):
+            conn = await async_engine.connect()
+            conns.append(conn)
+            await conn.exec_driver_sql("SELECT 1")
+    finally:
+        for conn in conns:
+            await conn.close()
+    return primed + len(conns)
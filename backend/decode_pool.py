@@ -0,0 +1,141 @@
+"""
+Begrenzter Worker-Pool fuer das Dekodieren von Addon-Exporten (base64 + zlib + json).
+
+Das Dekodieren ist reine CPU-Arbeit und haelt den GIL; im Prozess-Pool (Default) blockiert
+ein grosser Export weder den Event Loop noch andere Requests. DECODE_MAX_PENDING begrenzt,
+wie viele Exporte gleichzeitig im Pool sein duerfen; wer darauf laenger als
+DECODE_QUEUE_TIMEOUT wartet, bekommt DecodeBusy (-> 503).
+"""
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+from payload_store import compress_enabled
+
+DECODE_POOL_KIND = os.getenv("DECODE_POOL_KIND", "process")   # process/thread
+DECODE_WORKERS = int(os.getenv("DECODE_WORKERS", "2"))
+DECODE_MAX_PENDING = int(os.getenv("DECODE_MAX_PENDING", str(DECODE_WORKERS * 4)))
+DECODE_QUEUE_TIMEOUT = float(os.getenv("DECODE_QUEUE_TIMEOUT", "5"))
+DECODE_TIMEOUT = float(os.getenv("DECODE_TIMEOUT", "10"))
+
+
+class DecodeBusy(Exception):
+    pass
+
+
+class DecodePool:
+    def __init__(
+        self,
+        kind: str = DECODE_POOL_KIND,
+        workers: int = DECODE_WORKERS,
+        max_pending: int = DECODE_MAX_PENDING,
+    ):
+        self.kind = kind
+        self.workers = workers
+        self.max_pending = max_pending
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._lock = threading.Lock()
+        self._executor: Optional[Executor] = None
+        self.in_flight = 0
+        self.waiting = 0
+        self.completed = 0
+        self.rejected = 0
+
+    def _get_executor(self) -> Executor:
+        # lazy, damit beim Import von main kein Prozess gestartet wird
+        with self._lock:
+            if self._executor is None:
+                if self.kind == "thread":
+                    self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="decode")
+                else:
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.workers,
+                        mp_context=multiprocessing.get_context("spawn"),
+                    )
+            return self._executor
+
+    def _acquire(self) -> None:
+        with self._lock:
+            self.waiting += 1
+        try:
+            ok = self._slots.acquire(timeout=DECODE_QUEUE_TIMEOUT)
+        finally:
+            with self._lock:
+                self.waiting -= 1
+        if not ok:
+            with self._lock:
+                self.rejected += 1
+            raise DecodeBusy("Import decoder busy, try again later")
+        with self._lock:
+            self.in_flight += 1
+
+    def _release(self, _future=None) -> None:
+        with self._lock:
+            self.in_flight -= 1
+            self.completed += 1
+        self._slots.release()
+
+    def submit(self, export_string: str):
+        # import_wpe erst beim ersten Import laden, nicht beim Start von main
+        from import_wpe import MAX_EXPORT_CHARS, decode_and_summarize
+
+        if export_string and len(export_string) > MAX_EXPORT_CHARS:
+            raise ValueError(f"Export string too long (max {MAX_EXPORT_CHARS} chars)")
+        self._acquire()
+        try:
+            future = self._get_executor().submit(decode_and_summarize, export_string, compress_enabled())
+        except Exception:
+            self._release()
+            raise
+        future.add_done_callback(self._release)
+        return future
+
+    def decode(self, export_string: str) -> Tuple[Optional[Dict[str, Any]], Dict[str, Any], Optional[bytes]]:
+        """
+        (payload, summary, blob) fuer einen Export, siehe import_wpe.decode_and_summarize.
+        Blockiert den aufrufenden (Threadpool-)Thread, nicht den Event Loop.
+        """
+        return self.submit(export_string).result(timeout=DECODE_TIMEOUT)
+
+    def decode_many(self, export_strings: List[str]) -> List[Any]:
+        """
+        Dekodiert parallel; pro Eintrag (payload, summary, blob) oder die Exception.
+        """
+        futures = []
+        for s in export_strings:
+            try:
+                futures.append(self.submit(s))
+            except Exception as e:
+                futures.append(e)
+        out: List[Any] = []
+        for f in futures:
+            if isinstance(f, Exception):
+                out.append(f)
+                continue
+            try:
+                out.append(f.result(timeout=DECODE_TIMEOUT))
+            except Exception as e:
+                out.append(e)
+        return out
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "kind": self.kind,
+            "workers": self.workers,
+            "max_pending": self.max_pending,
+            "in_flight": self.in_flight,
+            "queue_depth": self.waiting,
+            "completed": self.completed,
+            "rejected": self.rejected,
+        }
+
+    def shutdown(self) -> None:
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+
+decode_pool = DecodePool()
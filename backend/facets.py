@@ -0,0 +1,64 @@
+"""
+Facetten-Zaehler fuer die Filter-Dropdowns (GET /api/facets/players, /api/facets/guilds).
+
+Eine Abfrage pro Endpunkt ueber die gefilterte Menge:
+  Postgres: GROUP BY GROUPING SETS ((class_name), (spec), ...), GROUPING() sagt, zu welcher
+            Facette eine Zeile gehoert
+  SQLite:   UNION ALL aus einem GROUP BY pro Facette
+"""
+from typing import Any, Dict
+
+from sqlalchemy import func, literal, literal_column, true, union_all
+
+from models import Guild
+
+
+def facet_counts(db, stmt, facets: Dict[str, Any], count) -> Dict[str, Dict[str, int]]:
+    """
+    stmt: gefiltertes select (aus filter_players / filter_guilds), facets: {name: Ausdruck},
+    count: Aggregat pro Wert. Liefert {name: {wert: anzahl}}, absteigend nach Anzahl.
+    """
+    out: Dict[str, Dict[str, int]] = {name: {} for name in facets}
+    exprs = list(facets.values())
+
+    if db.get_bind().dialect.name == "postgresql":
+        n = len(exprs)
+        q = stmt.with_only_columns(*exprs, *[func.grouping(e) for e in exprs], count).group_by(
+            func.grouping_sets(*exprs)
+        )
+        for row in db.execute(q):
+            for name, value, grouped in zip(facets, row[:n], row[n:2 * n]):
+                if grouped == 0 and value is not None:
+                    out[name][str(value)] = row[-1]
+    else:
+        parts = [
+            stmt.with_only_columns(literal(name).label("facet"), e.label("value"), count.label("n")).group_by(e)
+            for name, e in facets.items()
+        ]
+        for facet, value, cnt in db.execute(union_all(*parts)):
+            if value is not None:
+                out[facet][str(value)] = cnt
+
+    return {name: dict(sorted(values.items(), key=lambda kv: (-kv[1], kv[0]))) for name, values in out.items()}
+
+
+def guild_needs_join(db, stmt):
+    """
+    LEFT JOIN auf die einzelnen Needs einer Gilde. Liefert (stmt, need_class, need_role);
+    Gilden ohne Needs bleiben mit NULL erhalten, gezaehlt wird daher distinct guilds.id.
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        need = func.jsonb_array_elements(Guild.needs).table_valued("value")
+        # Keys als Literal statt Parameter, sonst sind SELECT- und GROUP BY-Ausdruck fuer
+        # Postgres nicht identisch
+        key = lambda k: need.c.value.op("->>")(literal_column(f"'{k}'"))
+        need_class = func.coalesce(key("class"), key("class_name"))
+        need_role = key("role")
+    else:
+        need = func.json_each(Guild.needs).table_valued("value")
+        need_class = func.coalesce(
+            func.json_extract(need.c.value, literal_column("'$.class'")),
+            func.json_extract(need.c.value, literal_column("'$.class_name'")),
+        )
+        need_role = func.json_extract(need.c.value, literal_column("'$.role'"))
+    return stmt.outerjoin(need, true()), need_class, need_role
@@ -1,7 +1,33 @@
 import base64
+import hashlib
 import json
+import os
 import zlib
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
+
+# Limits gegen riesige Exporte / Dekompressionsbomben
+MAX_EXPORT_CHARS = int(os.getenv("IMPORT_MAX_EXPORT_CHARS", str(512 * 1024)))
+MAX_DECODED_BYTES = int(os.getenv("IMPORT_MAX_DECODED_BYTES", str(4 * 1024 * 1024)))
+
+
+def _inflate(b: bytes, limit: int) -> Optional[bytes]:
+    """
+    zlib-Dekompression mit Obergrenze fuer die Ausgabe. Liefert None, wenn b kein
+    vollstaendiger zlib-Stream ist (dann wird b als plain json behandelt).
+    """
+    d = zlib.decompressobj()
+    try:
+        out = d.decompress(b, limit + 1)
+        if len(out) > limit or d.unconsumed_tail:
+            raise ValueError(f"Export too large after decompression (max {limit} bytes)")
+        out += d.flush()
+    except zlib.error:
+        return None
+    if len(out) > limit:
+        raise ValueError(f"Export too large after decompression (max {limit} bytes)")
+    if not d.eof:
+        return None
+    return out
 
 
 def decode_export_string(s: str) -> Dict[str, Any]:
@@ -13,6 +39,9 @@ def decode_export_string(s: str) -> Dict[str, Any]:
     if not s:
         raise ValueError("Empty export string")
 
+    if len(s) > MAX_EXPORT_CHARS:
+        raise ValueError(f"Export string too long (max {MAX_EXPORT_CHARS} chars)")
+
     s = s.strip()
 
     if s.startswith("WPE2J|"):
@@ -29,9 +58,8 @@ def decode_export_string(s: str) -> Dict[str, Any]:
             raise ValueError(f"Invalid base64 in WPE2 export: {e}")
 
         # try zlib decompress, fallback to plain json bytes
-        try:
-            b2 = zlib.decompress(b)
-        except Exception:
+        b2 = _inflate(b, MAX_DECODED_BYTES)
+        if b2 is None:
             b2 = b
 
         try:
@@ -42,6 +70,31 @@ def decode_export_string(s: str) -> Dict[str, Any]:
     raise ValueError("Unsupported export prefix (expected WPE2J| or WPE2|)")
 
 
+def canonical_json(payload: Dict[str, Any]) -> bytes:
+    # sortierte Keys, ohne Whitespace: gleicher Export -> gleiche Bytes, egal ob WPE2 oder WPE2J
+    return json.dumps(payload, sort_keys=True, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def payload_hash(payload: Dict[str, Any]) -> str:
+    return hashlib.sha256(canonical_json(payload)).hexdigest()
+
+
+def decode_and_summarize(s: str, compress: bool = False) -> Tuple[Optional[Dict[str, Any]], Dict[str, Any], Optional[bytes]]:
+    """
+    Kompletter CPU-Teil eines Imports, laeuft im Decode-Pool (decode_pool.py).
+    Liefert (payload, summary, blob). Mit compress=True ist blob das zlib-komprimierte
+    kanonische JSON (payload_store.py) und payload None, damit der grosse Dict nicht
+    zurueck in den Hauptprozess kopiert wird.
+    """
+    payload = decode_export_string(s)
+    summary = summarize_payload(payload)
+    canonical = canonical_json(payload)
+    summary["payloadHash"] = hashlib.sha256(canonical).hexdigest()
+    if compress:
+        return None, summary, zlib.compress(canonical, 6)
+    return payload, summary, None
+
+
 def _sum_talent_points(tab: Dict[str, Any]) -> int:
     pts = 0
     for t in tab.get("talents", []) or []:
@@ -1,29 +1,124 @@
+import asyncio
+import logging
 import os
 import secrets
-from datetime import datetime, timedelta
-from typing import Optional, List, Dict, Set
+import time
+from contextlib import asynccontextmanager
+from concurrent.futures import TimeoutError as FuturesTimeout
+from datetime import datetime
+from typing import Optional, List, Dict, Set, Literal
 
-from fastapi import FastAPI, Depends, HTTPException, Header, Request
+from fastapi import FastAPI, Depends, HTTPException, Header, Request, Response, Query
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from starlette.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
-from sqlalchemy import select
+from sqlalchemy import select, insert, update, or_, exists
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.sql import func
-from sqlalchemy.dialects.postgresql import insert
 
-from import_wpe import decode_export_string, summarize_payload
-
-from db import Base, engine, get_db
-from models import Guild, Player, Application, CharacterImport
+from db import ReadSession, aprime_pool, async_engine, engine, get_db, get_read_db, pool_metrics
+from models import Guild, Player, Application
+from cache import bump, generation, normalize_params, response_cache
+from conditional import is_not_modified, make_etag, not_modified_response, set_validators
+from decode_pool import DecodeBusy, decode_pool
+from changefeed import (
+    STREAM_KEEPALIVE_SECONDS, StreamFull, application_event, broker, emit, guild_event, player_event, sse,
+)
+from compression import CompressionMiddleware, EncodedBody
+from facets import facet_counts, guild_needs_join
+from metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, MetricsMiddleware, metrics
+from matching import (
+    MATCH_DEFAULT_LIMIT, MATCH_MAX_LIMIT, drop_guild, drop_player,
+    refresh_guild, refresh_player, refresh_player_keys, top_guilds, top_players,
+)
+from payload_store import compress_enabled, store_versions
+from pagination import DEFAULT_PAGE_SIZE, clamp_limit, fetch_page
+from ratelimit import (
+    RATE_LIMIT_PER_MINUTE, RATE_LIMIT_RULES, MemoryStore, RateLimiter,
+    build_store, parse_rules, retry_after_header,
+)
+from realm_stats import stats as realm_stats
+from search import apply_search
+from serialize import GUILD_ROWS, PLAYER_ROWS, JSONBytes, encode_page
 from schemas import (
-    GuildCreate, GuildOut, GuildCreated,
-    PlayerCreate, PlayerOut, PlayerCreated,
-    ApplicationCreate, ApplicationOut,
+    GuildCreate, GuildOut, GuildCreated, GuildPage,
+    PlayerCreate, PlayerOut, PlayerCreated, PlayerPage,
+    GuildMatch, PlayerMatch, MatchPair, GuildFacets, PlayerFacets, RealmStatsOut,
+    ApplicationCreate, ApplicationOut, ApplicationStatus, ApplicationStatusUpdate, ApplicationStatusResult,
+    ApplicantSummary, InboxItem, InboxPage,
     ImportRequest, ImportSummary,
 )
 
-Base.metadata.create_all(bind=engine)
+log = logging.getLogger(__name__)
+
+# Selten genutzte Pfade (Addon-Import: import_wpe, bulk_import mit den Upsert-Helfern;
+# /api/matches: scoring mit numpy) werden erst im Endpunkt importiert, nicht beim Start.
+
+WARMUP_PATHS = [p.strip() for p in os.getenv("WARMUP_PATHS", "/api/guilds,/api/players,/api/stats").split(",") if p.strip()]
+WARMUP_ACCEPT_ENCODING = os.getenv("WARMUP_ACCEPT_ENCODING", "br, gzip")
+
+
+async def warm_request(path: str) -> int:
+    """
+    GET durch den eigenen ASGI-Stack (Routing, Dependencies, Serialisierung, Kompression),
+    fuellt dabei den Read-Cache. Liefert den Status.
+    """
+    path, _, query = path.partition("?")
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+        "method": "GET", "scheme": "http", "path": path, "raw_path": path.encode(),
+        "query_string": query.encode(), "root_path": "",
+        "headers": [(b"host", b"warmup"), (b"accept-encoding", WARMUP_ACCEPT_ENCODING.encode())],
+        "client": ("127.0.0.1", 0), "server": ("warmup", 80),
+    }
+    status = 0
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+
+    await app(scope, receive, send)
+    return status
+
 
-app = FastAPI(title="TBC Recruit API")
+async def warm_up() -> None:
+    """
+    Laeuft nach dem Start im Hintergrund: Pool vorwaermen, danach die Default-Seiten der
+    Listen einmal berechnen. Der Server nimmt waehrenddessen schon Requests an.
+    """
+    t0 = time.perf_counter()
+    try:
+        primed = await aprime_pool()
+        statuses = {path: await warm_request(path) for path in WARMUP_PATHS}
+    except Exception:
+        log.exception("warm-up failed")
+        return
+    log.info("warm-up: %d connections, %s in %.0f ms", primed, statuses, (time.perf_counter() - t0) * 1000)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Schema: python migrate.py als eigener Release-Schritt, beim Start laeuft kein DDL
+    realm_stats.start()
+    broker.start_listener(engine)
+    warmup = asyncio.create_task(warm_up())
+    try:
+        yield
+    finally:
+        warmup.cancel()
+        broker.stop_listener()
+        await realm_stats.stop()
+        decode_pool.shutdown()
+        if async_engine is not None:
+            await async_engine.dispose()
+
+
+app = FastAPI(title="TBC Recruit API", lifespan=lifespan)
 
 cors = os.getenv("CORS_ORIGINS", "")
 origins = [o.strip() for o in cors.split(",") if o.strip()]
@@ -35,6 +130,7 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(CompressionMiddleware)
 
 # Allowed realms
 allowed_realms_env = os.getenv("ALLOWED_REALMS", "Spineshatter,Thunderstrike")
@@ -49,31 +145,137 @@ def validate_realm(realm: str):
         )
 
 
-# Mini rate limit
-RATE_LIMIT_PER_MINUTE = int(os.getenv("RATE_LIMIT_PER_MINUTE", "30"))
-_rl_bucket: Dict[str, List[datetime]] = {}
+# Rate limit (GCRA, siehe ratelimit.py)
+rate_limiter = RateLimiter(build_store(), RATE_LIMIT_PER_MINUTE, parse_rules(RATE_LIMIT_RULES))
 
 
 @app.middleware("http")
 async def rate_limit_middleware(request: Request, call_next):
-    if request.method in ("POST", "PUT", "DELETE") and request.url.path.startswith("/api/"):
+    if request.method in ("POST", "PUT", "PATCH", "DELETE") and request.url.path.startswith("/api/"):
         ip = request.client.host if request.client else "unknown"
-        now = datetime.utcnow()
-        window_start = now - timedelta(minutes=1)
-        arr = _rl_bucket.get(ip, [])
-        arr = [t for t in arr if t > window_start]
-        if len(arr) >= RATE_LIMIT_PER_MINUTE:
-            raise HTTPException(status_code=429, detail="Rate limit exceeded")
-        arr.append(now)
-        _rl_bucket[ip] = arr
+        if isinstance(rate_limiter.store, MemoryStore):
+            wait = rate_limiter.hit(request.url.path, ip)
+        else:
+            wait = await run_in_threadpool(rate_limiter.hit, request.url.path, ip)
+        if wait > 0:
+            return JSONResponse(
+                status_code=429,
+                content={"detail": "Rate limit exceeded"},
+                headers=retry_after_header(wait),
+            )
     return await call_next(request)
 
 
+# zuletzt hinzugefuegt = aeusserste Schicht: misst auch Rate Limit und Kompression
+app.add_middleware(MetricsMiddleware)
+
+
 def require_token(entity_token: str, provided: Optional[str]):
     if not provided or provided != entity_token:
         raise HTTPException(status_code=401, detail="Invalid or missing edit token")
 
 
+def update_with_token(db: Session, model, entity_id: int, provided: Optional[str], values: dict):
+    """
+    Ein Statement: UPDATE ... WHERE id = :id AND edit_token = :token RETURNING *.
+    None, wenn die Zeile fehlt oder der Token nicht passt; welches von beiden, klaert
+    token_failure erst im Fehlerfall.
+    """
+    if not provided:
+        return None
+    stmt = (
+        update(model)
+        .where(model.id == entity_id, model.edit_token == provided)
+        .values(**values)
+        .returning(model)
+        .execution_options(synchronize_session=False)
+    )
+    return db.execute(stmt).scalar_one_or_none()
+
+
+def token_failure(db: Session, model, entity_id: int, not_found: str) -> HTTPException:
+    if db.scalar(select(model.id).where(model.id == entity_id)) is None:
+        return HTTPException(404, not_found)
+    return HTTPException(status_code=401, detail="Invalid or missing edit token")
+
+
+def check_realm_update(db: Session, model, entity_id: int, provided: Optional[str], realm: str, not_found: str):
+    """
+    Realm-Pruefung fuer PUT, nach dem Token: ein unbekannter Realm mit falschem Token bleibt
+    404/401, nicht 400. Der Normalfall (erlaubter Realm) kostet kein Statement.
+    """
+    if realm in ALLOWED_REALMS:
+        return
+    entity_token = db.scalar(select(model.edit_token).where(model.id == entity_id))
+    if entity_token is None:
+        raise HTTPException(404, not_found)
+    require_token(entity_token, provided)
+    validate_realm(realm)
+
+
+def normalize_needs(needs: List[dict]) -> List[dict]:
+    """
+    Einheitliches Format {"class","spec","role","prio"}, damit die JSONB-Containment
+    Filter in list_guilds nur einen Key pruefen muessen.
+    """
+    out: List[dict] = []
+    for n in needs or []:
+        n = dict(n)
+        if "class" not in n and "class_name" in n:
+            n["class"] = n.pop("class_name")
+        out.append(n)
+    return out
+
+
+def needs_contains(dialect: str, key: str, value: str):
+    if dialect == "postgresql":
+        return Guild.needs.contains([{key: value}])
+    # SQLite Fallback: JSON1 statt JSONB-Containment
+    je = func.json_each(Guild.needs).table_valued("value")
+    return exists(select(1).select_from(je).where(func.json_extract(je.c.value, f"$.{key}") == value))
+
+
+def guild_values(payload: GuildCreate) -> dict:
+    """
+    Spaltenwerte fuer INSERT/UPDATE aus dem Request (ohne id und edit_token). Den Realm
+    prueft der Aufrufer: beim Update erst nach dem Token (check_realm_update).
+    """
+    return {
+        "name": payload.name.strip(),
+        "realm": payload.realm.strip(),
+        "faction": payload.faction,
+        "language": payload.language.strip(),
+        "raid_days": payload.raid_days,
+        "raid_time_start": payload.raid_time_start,
+        "raid_time_end": payload.raid_time_end,
+        "progress": payload.progress,
+        "needs": normalize_needs(payload.needs),
+        "loot_system": payload.loot_system.strip(),
+        "contact_character": payload.contact_character.strip(),
+        "discord": payload.discord.strip(),
+        "website": payload.website.strip(),
+        "description": payload.description.strip(),
+    }
+
+
+def player_values(payload: PlayerCreate) -> dict:
+    return {
+        "name": payload.name.strip(),
+        "realm": payload.realm.strip(),
+        "faction": payload.faction,
+        "language": payload.language.strip(),
+        "class_name": payload.class_name.strip(),
+        "spec": payload.spec.strip(),
+        "role": payload.role,
+        "skill_rating": payload.skill_rating,
+        "professions": payload.professions,
+        "attunements": payload.attunements,
+        "availability": payload.availability,
+        "logs_url": payload.logs_url.strip(),
+        "note": payload.note.strip(),
+    }
+
+
 def guild_to_out(g: Guild) -> GuildOut:
     return GuildOut(
         id=g.id,
@@ -118,50 +320,191 @@ def health():
     return {"ok": True, "allowed_realms": sorted(ALLOWED_REALMS)}
 
 
+@app.get("/api/cache/stats")
+def cache_stats():
+    return response_cache.stats()
+
+
+@app.get("/api/import/stats")
+def import_stats():
+    return decode_pool.stats()
+
+
+@app.get("/api/stats", response_model=RealmStatsOut)
+def get_realm_stats(realm: Optional[str] = None, faction: Optional[Literal["Alliance", "Horde"]] = None):
+    """
+    Angebot/Nachfrage/Bewerbungen pro Realm und Fraktion, aus dem zuletzt geladenen realm_stats Stand.
+    """
+    if realm:
+        realm = realm.strip()
+        validate_realm(realm)
+    return realm_stats.view([realm] if realm else ALLOWED_REALMS, faction)
+
+
+@app.get("/api/stream")
+async def stream(
+    request: Request,
+    realm: Optional[str] = None,
+    faction: Optional[Literal["Alliance", "Horde"]] = None,
+    class_name: Optional[str] = None,
+    role: Optional[str] = None,
+):
+    """
+    Server-Sent Events: neue Spieler (auch Imports), Gilden und Bewerbungen (nur realm/faction),
+    gefiltert nach realm/faction/class_name/role. Clients laden danach gezielt nach statt zu pollen.
+    """
+    if realm:
+        realm = realm.strip()
+        validate_realm(realm)
+    if broker.full():
+        raise HTTPException(status_code=503, detail="Too many stream clients")
+    filters = dict(realm=realm, faction=faction, class_name=class_name, role=role)
+
+    async def events():
+        yield "retry: 3000\n\n"
+        # erst hier anmelden: ein Stream, der nie startet, belegt keinen Platz
+        try:
+            sub = broker.subscribe(filters)
+        except StreamFull:
+            return    # inzwischen voll: der Client verbindet nach retry neu
+        try:
+            while not await request.is_disconnected():
+                try:
+                    ev = await asyncio.wait_for(sub.queue.get(), timeout=STREAM_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                if ev.get("realm") not in ALLOWED_REALMS:
+                    continue
+                yield sse(ev)
+        finally:
+            broker.unsubscribe(sub)
+
+    return StreamingResponse(
+        events(), media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.get("/api/stream/stats")
+def stream_stats():
+    return broker.stats()
+
+
+@app.get("/api/db/stats")
+def db_stats():
+    return pool_metrics.stats()
+
+
+@app.get("/api/metrics", response_class=PlainTextResponse)
+def prometheus_metrics():
+    """
+    Prometheus Textformat: Latenz und Queries pro Route (metrics.py), dazu Pool, Read-Cache,
+    Decode-Pool und Stream-Clients.
+    """
+    pool = pool_metrics.stats()
+    cache = response_cache.stats()
+    decode = decode_pool.stats()
+    stream = broker.stats()
+    extra = [
+        ("db_pool_in_use", "gauge", "Connections checked out", pool["in_use"]),
+        ("db_pool_checkouts_total", "counter", "Pool checkouts", pool["checkouts"]),
+        ("db_pool_checkout_timeouts_total", "counter", "Pool checkouts that timed out", pool["checkout_timeouts"]),
+        ("db_pool_checkout_wait_max_seconds", "gauge", "Longest pool checkout wait", pool["checkout_wait_max_ms"] / 1000),
+        ("db_pool_connects_total", "counter", "New DB connections", pool["connects"]),
+        ("response_cache_entries", "gauge", "Read cache entries", cache["size"]),
+        ("response_cache_hits_total", "counter", "Read cache hits", cache["hits"]),
+        ("response_cache_misses_total", "counter", "Read cache misses", cache["misses"]),
+        ("decode_in_flight", "gauge", "Exports being decoded", decode["in_flight"]),
+        ("decode_rejected_total", "counter", "Exports rejected because the decoder was busy", decode["rejected"]),
+        ("stream_clients", "gauge", "Connected SSE clients", stream["clients"]),
+    ]
+    return PlainTextResponse(metrics.render(extra), media_type=METRICS_CONTENT_TYPE)
+
+
 # Guilds
 @app.post("/api/guilds", response_model=GuildCreated)
 def create_guild(payload: GuildCreate, db: Session = Depends(get_db)):
-    realm = payload.realm.strip()
-    validate_realm(realm)
-
+    values = guild_values(payload)
+    validate_realm(values["realm"])
     token = secrets.token_urlsafe(24)
-    g = Guild(
-        edit_token=token,
-        name=payload.name.strip(),
-        realm=realm,
-        faction=payload.faction,
-        language=payload.language.strip(),
-        raid_days=payload.raid_days,
-        raid_time_start=payload.raid_time_start,
-        raid_time_end=payload.raid_time_end,
-        progress=payload.progress,
-        needs=payload.needs,
-        loot_system=payload.loot_system.strip(),
-        contact_character=payload.contact_character.strip(),
-        discord=payload.discord.strip(),
-        website=payload.website.strip(),
-        description=payload.description.strip(),
-    )
-    db.add(g)
     try:
+        g = db.execute(insert(Guild).values(edit_token=token, **values).returning(Guild)).scalar_one()
+        refresh_guild(db, g)
+        emit(db, guild_event(g))
+        out = guild_to_out(g)   # vor dem Commit, danach waere g expired (ein SELECT mehr)
         db.commit()
-    except Exception:
+    except IntegrityError:
         db.rollback()
         raise HTTPException(status_code=400, detail="Guild already exists or invalid data")
-    db.refresh(g)
-    return {"guild": guild_to_out(g), "edit_token": token}
+    bump("guilds")
+    return {"guild": out, "edit_token": token}
 
 
-@app.get("/api/guilds", response_model=List[GuildOut])
-def list_guilds(
-    db: Session = Depends(get_db),
+def entity_validator(db: Session, model, entity_id: int):
+    return db.execute(
+        select(model.updated_at).where(model.id == entity_id, model.realm.in_(sorted(ALLOWED_REALMS)))
+    ).scalar()
+
+
+def resolve_sort(sort: Optional[str], score) -> str:
+    # mit q standardmaessig nach Relevanz, sonst nach Aktualitaet
+    if sort is None:
+        return "relevance" if score is not None else "recent"
+    if sort == "relevance" and score is None:
+        raise HTTPException(status_code=400, detail="sort=relevance requires q")
+    return sort
+
+
+def list_validator(db: Session, stmt, model):
+    """
+    (max(updated_at), count) der gefilterten Menge, Grundlage fuer das ETag der Listen.
+    """
+    row = db.execute(stmt.with_only_columns(func.max(model.updated_at), func.count())).one()
+    return row[0], row[1]
+
+
+@app.get("/api/guilds", response_model=GuildPage)
+async def list_guilds(
+    request: Request,
+    db: ReadSession = Depends(get_read_db),
     realm: Optional[str] = None,
     faction: Optional[str] = None,
     language: Optional[str] = None,
     q: Optional[str] = None,
     need_class: Optional[str] = None,
     need_role: Optional[str] = None,
+    sort: Optional[Literal["recent", "relevance"]] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(default=DEFAULT_PAGE_SIZE, ge=1),
 ):
+    filters = dict(realm=realm, faction=faction, language=language, q=q, need_class=need_class, need_role=need_role)
+    params = dict(filters, sort=sort, cursor=cursor, limit=limit)
+
+    # Validator und Body unter derselben Generation; der Body-Eintrag traegt den Validator, unter
+    # dem er gebaut wurde, und seine komprimierten Varianten. Ein Write waehrend der Query kann so
+    # keinen alten Body mit neuem ETag (oder eine alte gzip-Variante) in den Cache bringen.
+    gen = generation("guilds")
+    validator = await response_cache.aget_or_compute(
+        "list_guilds_validator", filters, ("guilds",),
+        lambda: db.run(lambda s: list_validator(s, filter_guilds(s, **filters)[0], Guild)), gen,
+    )
+    etag = make_etag("guilds", normalize_params(params), *validator)
+    if is_not_modified(request, etag):
+        return not_modified_response(etag, validator[0])
+
+    async def build():
+        return EncodedBody(await db.run(query_guilds, **params), validator)
+
+    entry = await response_cache.aget_or_compute("list_guilds", params, ("guilds",), build, gen)
+    body, headers = await entry.encoded(request.headers.get("accept-encoding"))
+    last_modified, count = entry.validator
+    out = JSONBytes(body, headers=headers)
+    set_validators(out, make_etag("guilds", normalize_params(params), last_modified, count), last_modified)
+    return out
+
+
+def filter_guilds(db: Session, realm, faction, language, q, need_class, need_role):
     stmt = select(Guild)
 
     if realm:
@@ -175,30 +518,106 @@ def list_guilds(
         stmt = stmt.where(Guild.faction == faction)
     if language:
         stmt = stmt.where(Guild.language == language)
-    if q:
-        like = f"%{q.strip()}%"
-        stmt = stmt.where(Guild.name.ilike(like))
-
-    rows = db.execute(stmt).scalars().all()
-    out: List[GuildOut] = []
-    for g in rows:
-        needs = g.needs or []
-        if need_class:
-            if not any((n.get("class") == need_class) or (n.get("class_name") == need_class) for n in needs):
-                continue
-        if need_role:
-            if not any(n.get("role") == need_role for n in needs):
-                continue
-        out.append(guild_to_out(g))
-    return out
+
+    dialect = db.get_bind().dialect.name
+    score = None
+    if q and q.strip():
+        stmt, score = apply_search(stmt, Guild, q.strip(), dialect)
+
+    # JSONB @> gegen den GIN Index auf guilds.needs; "class_name" nur noch fuer Altdaten
+    if need_class:
+        stmt = stmt.where(or_(
+            needs_contains(dialect, "class", need_class),
+            needs_contains(dialect, "class_name", need_class),
+        ))
+    if need_role:
+        stmt = stmt.where(needs_contains(dialect, "role", need_role))
+    return stmt, score
+
+
+def query_guilds(db: Session, sort, cursor, limit, **filters) -> bytes:
+    """
+    Eine Seite als fertiger JSON-Body (GuildPage), nur die Spalten von GuildOut.
+    """
+    stmt, score = filter_guilds(db, **filters)
+    sort = resolve_sort(sort, score)
+    sort_cols = [score, Guild.id] if sort == "relevance" else [Guild.updated_at, Guild.id]
+    rows, next_cursor = fetch_page(
+        db, stmt.with_only_columns(*GUILD_ROWS.columns), sort_cols, sort, cursor, clamp_limit(limit),
+        width=len(GUILD_ROWS.columns),
+    )
+    return encode_page(GUILD_ROWS, rows, next_cursor)
+
+
+@app.get("/api/facets/guilds", response_model=GuildFacets)
+async def guild_facets(
+    db: ReadSession = Depends(get_read_db),
+    realm: Optional[str] = None,
+    faction: Optional[str] = None,
+    language: Optional[str] = None,
+    q: Optional[str] = None,
+    need_class: Optional[str] = None,
+    need_role: Optional[str] = None,
+):
+    """
+    Anzahl Gilden pro Fraktion/Sprache/gesuchter Klasse/gesuchter Rolle fuer die aktuellen Filter.
+    """
+    filters = dict(realm=realm, faction=faction, language=language, q=q, need_class=need_class, need_role=need_role)
+
+    def load(s: Session):
+        stmt, _ = filter_guilds(s, **filters)
+        stmt, n_class, n_role = guild_needs_join(s, stmt)
+        facets = {"faction": Guild.faction, "language": Guild.language, "need_class": n_class, "need_role": n_role}
+        return facet_counts(s, stmt, facets, func.count(Guild.id.distinct()))
+
+    return await response_cache.aget_or_compute("guild_facets", filters, ("guilds",), lambda: db.run(load))
 
 
 @app.get("/api/guilds/{guild_id}", response_model=GuildOut)
-def get_guild(guild_id: int, db: Session = Depends(get_db)):
-    g = db.get(Guild, guild_id)
-    if not g or g.realm not in ALLOWED_REALMS:
+async def get_guild(guild_id: int, request: Request, response: Response, db: ReadSession = Depends(get_read_db)):
+    updated_at = await response_cache.aget_or_compute(
+        "get_guild_validator", {"id": guild_id}, ("guilds",),
+        lambda: db.run(entity_validator, Guild, guild_id),
+    )
+    if updated_at is None:
         raise HTTPException(404, "Guild not found")
-    return guild_to_out(g)
+    etag = make_etag("guild", guild_id, updated_at)
+    if is_not_modified(request, etag, updated_at):
+        return not_modified_response(etag, updated_at)
+    set_validators(response, etag, updated_at)
+
+    def load(s: Session):
+        g = s.get(Guild, guild_id)
+        if not g or g.realm not in ALLOWED_REALMS:
+            raise HTTPException(404, "Guild not found")
+        return guild_to_out(g)
+
+    return await response_cache.aget_or_compute("get_guild", {"id": guild_id}, ("guilds",), lambda: db.run(load))
+
+
+@app.get("/api/guilds/{guild_id}/matches", response_model=List[PlayerMatch])
+async def guild_matches(
+    guild_id: int,
+    db: ReadSession = Depends(get_read_db),
+    limit: int = Query(default=MATCH_DEFAULT_LIMIT, ge=1),
+):
+    """
+    Top-K passende Spieler fuer eine Gilde, aus dem Match-Index (matching.py).
+    """
+    limit = min(limit, MATCH_MAX_LIMIT)
+
+    def load(s: Session):
+        g = s.get(Guild, guild_id)
+        if not g or g.realm not in ALLOWED_REALMS:
+            raise HTTPException(404, "Guild not found")
+        return [
+            PlayerMatch(score=score, player=player_to_out(p))
+            for p, score in top_players(s, guild_id, limit, ALLOWED_REALMS)
+        ]
+
+    return await response_cache.aget_or_compute(
+        "guild_matches", {"id": guild_id, "limit": limit}, ("guilds", "players"), lambda: db.run(load),
+    )
 
 
 @app.put("/api/guilds/{guild_id}", response_model=GuildOut)
@@ -208,32 +627,17 @@ def update_guild(
     db: Session = Depends(get_db),
     x_edit_token: Optional[str] = Header(default=None),
 ):
-    g = db.get(Guild, guild_id)
-    if not g:
-        raise HTTPException(404, "Guild not found")
-    require_token(g.edit_token, x_edit_token)
-
-    realm = payload.realm.strip()
-    validate_realm(realm)
-
-    g.name = payload.name.strip()
-    g.realm = realm
-    g.faction = payload.faction
-    g.language = payload.language.strip()
-    g.raid_days = payload.raid_days
-    g.raid_time_start = payload.raid_time_start
-    g.raid_time_end = payload.raid_time_end
-    g.progress = payload.progress
-    g.needs = payload.needs
-    g.loot_system = payload.loot_system.strip()
-    g.contact_character = payload.contact_character.strip()
-    g.discord = payload.discord.strip()
-    g.website = payload.website.strip()
-    g.description = payload.description.strip()
-
+    values = guild_values(payload)
+    check_realm_update(db, Guild, guild_id, x_edit_token, values["realm"], "Guild not found")
+    g = update_with_token(db, Guild, guild_id, x_edit_token, values)
+    if g is None:
+        raise token_failure(db, Guild, guild_id, "Guild not found")
+
+    refresh_guild(db, g)
+    out = guild_to_out(g)
     db.commit()
-    db.refresh(g)
-    return guild_to_out(g)
+    bump("guilds")
+    return out
 
 
 @app.delete("/api/guilds/{guild_id}")
@@ -246,47 +650,42 @@ def delete_guild(
     if not g:
         raise HTTPException(404, "Guild not found")
     require_token(g.edit_token, x_edit_token)
+    drop_guild(db, g.id)
     db.delete(g)
     db.commit()
+    bump("guilds", "applications")
     return {"deleted": True}
 
 
 # Players
 @app.post("/api/players", response_model=PlayerCreated)
 def create_player(payload: PlayerCreate, db: Session = Depends(get_db)):
-    realm = payload.realm.strip()
-    validate_realm(realm)
-
+    values = player_values(payload)
+    validate_realm(values["realm"])
     token = secrets.token_urlsafe(24)
-    p = Player(
-        edit_token=token,
-        name=payload.name.strip(),
-        realm=realm,
-        faction=payload.faction,
-        language=payload.language.strip(),
-        class_name=payload.class_name.strip(),
-        spec=payload.spec.strip(),
-        role=payload.role,
-        skill_rating=payload.skill_rating,
-        professions=payload.professions,
-        attunements=payload.attunements,
-        availability=payload.availability,
-        logs_url=payload.logs_url.strip(),
-        note=payload.note.strip(),
-    )
-    db.add(p)
     try:
+        p = db.execute(insert(Player).values(edit_token=token, **values).returning(Player)).scalar_one()
+        refresh_player(db, p)
+        emit(db, player_event(p))
+        out = player_to_out(p)
         db.commit()
-    except Exception:
+    except IntegrityError:
         db.rollback()
         raise HTTPException(status_code=400, detail="Player already exists or invalid data")
-    db.refresh(p)
-    return {"player": player_to_out(p), "edit_token": token}
+    bump("players")
+    return {"player": out, "edit_token": token}
 
 
-@app.get("/api/players", response_model=List[PlayerOut])
-def list_players(
-    db: Session = Depends(get_db),
+PLAYER_SORTS = {
+    "recent": [Player.updated_at, Player.id],
+    "skill": [Player.skill_rating, Player.updated_at, Player.id],
+}
+
+
+@app.get("/api/players", response_model=PlayerPage)
+async def list_players(
+    request: Request,
+    db: ReadSession = Depends(get_read_db),
     realm: Optional[str] = None,
     faction: Optional[str] = None,
     language: Optional[str] = None,
@@ -295,7 +694,40 @@ def list_players(
     role: Optional[str] = None,
     min_skill: Optional[int] = None,
     q: Optional[str] = None,
+    sort: Optional[Literal["recent", "skill", "relevance"]] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(default=DEFAULT_PAGE_SIZE, ge=1),
 ):
+    filters = dict(
+        realm=realm, faction=faction, language=language, class_name=class_name, spec=spec,
+        role=role, min_skill=min_skill, q=q,
+    )
+    params = dict(filters, sort=sort, cursor=cursor, limit=limit)
+
+    # Validator und Body unter derselben Generation; der Body-Eintrag traegt den Validator, unter
+    # dem er gebaut wurde, und seine komprimierten Varianten. Ein Write waehrend der Query kann so
+    # keinen alten Body mit neuem ETag (oder eine alte gzip-Variante) in den Cache bringen.
+    gen = generation("players")
+    validator = await response_cache.aget_or_compute(
+        "list_players_validator", filters, ("players",),
+        lambda: db.run(lambda s: list_validator(s, filter_players(s, **filters)[0], Player)), gen,
+    )
+    etag = make_etag("players", normalize_params(params), *validator)
+    if is_not_modified(request, etag):
+        return not_modified_response(etag, validator[0])
+
+    async def build():
+        return EncodedBody(await db.run(query_players, **params), validator)
+
+    entry = await response_cache.aget_or_compute("list_players", params, ("players",), build, gen)
+    body, headers = await entry.encoded(request.headers.get("accept-encoding"))
+    last_modified, count = entry.validator
+    out = JSONBytes(body, headers=headers)
+    set_validators(out, make_etag("players", normalize_params(params), last_modified, count), last_modified)
+    return out
+
+
+def filter_players(db: Session, realm, faction, language, class_name, spec, role, min_skill, q):
     stmt = select(Player)
 
     if realm:
@@ -317,20 +749,129 @@ def list_players(
         stmt = stmt.where(Player.role == role)
     if min_skill is not None:
         stmt = stmt.where(Player.skill_rating >= min_skill)
-    if q:
-        like = f"%{q.strip()}%"
-        stmt = stmt.where(Player.name.ilike(like))
 
-    rows = db.execute(stmt).scalars().all()
-    return [player_to_out(p) for p in rows]
+    score = None
+    if q and q.strip():
+        stmt, score = apply_search(stmt, Player, q.strip(), db.get_bind().dialect.name)
+    return stmt, score
+
+
+def query_players(db: Session, sort, cursor, limit, **filters) -> bytes:
+    """
+    Eine Seite als fertiger JSON-Body (PlayerPage), nur die Spalten von PlayerOut.
+    """
+    stmt, score = filter_players(db, **filters)
+    sort = resolve_sort(sort, score)
+    sort_cols = [score, Player.id] if sort == "relevance" else PLAYER_SORTS[sort]
+    rows, next_cursor = fetch_page(
+        db, stmt.with_only_columns(*PLAYER_ROWS.columns), sort_cols, sort, cursor, clamp_limit(limit),
+        width=len(PLAYER_ROWS.columns),
+    )
+    return encode_page(PLAYER_ROWS, rows, next_cursor)
+
+
+@app.get("/api/facets/players", response_model=PlayerFacets)
+async def player_facets(
+    db: ReadSession = Depends(get_read_db),
+    realm: Optional[str] = None,
+    faction: Optional[str] = None,
+    language: Optional[str] = None,
+    class_name: Optional[str] = None,
+    spec: Optional[str] = None,
+    role: Optional[str] = None,
+    min_skill: Optional[int] = None,
+    q: Optional[str] = None,
+):
+    """
+    Anzahl Spieler pro Klasse/Spec/Rolle/Sprache/Fraktion fuer die aktuellen Filter.
+    """
+    filters = dict(
+        realm=realm, faction=faction, language=language, class_name=class_name, spec=spec,
+        role=role, min_skill=min_skill, q=q,
+    )
+
+    def load(s: Session):
+        stmt, _ = filter_players(s, **filters)
+        facets = {
+            "class_name": Player.class_name, "spec": Player.spec, "role": Player.role,
+            "language": Player.language, "faction": Player.faction,
+        }
+        return facet_counts(s, stmt, facets, func.count())
+
+    return await response_cache.aget_or_compute("player_facets", filters, ("players",), lambda: db.run(load))
 
 
 @app.get("/api/players/{player_id}", response_model=PlayerOut)
-def get_player(player_id: int, db: Session = Depends(get_db)):
-    p = db.get(Player, player_id)
-    if not p or p.realm not in ALLOWED_REALMS:
+async def get_player(player_id: int, request: Request, response: Response, db: ReadSession = Depends(get_read_db)):
+    updated_at = await response_cache.aget_or_compute(
+        "get_player_validator", {"id": player_id}, ("players",),
+        lambda: db.run(entity_validator, Player, player_id),
+    )
+    if updated_at is None:
         raise HTTPException(404, "Player not found")
-    return player_to_out(p)
+    etag = make_etag("player", player_id, updated_at)
+    if is_not_modified(request, etag, updated_at):
+        return not_modified_response(etag, updated_at)
+    set_validators(response, etag, updated_at)
+
+    def load(s: Session):
+        p = s.get(Player, player_id)
+        if not p or p.realm not in ALLOWED_REALMS:
+            raise HTTPException(404, "Player not found")
+        return player_to_out(p)
+
+    return await response_cache.aget_or_compute("get_player", {"id": player_id}, ("players",), lambda: db.run(load))
+
+
+@app.get("/api/matches", response_model=List[MatchPair])
+async def realm_matches(
+    realm: str,
+    faction: Literal["Alliance", "Horde"],
+    db: ReadSession = Depends(get_read_db),
+    class_name: Optional[str] = None,
+    spec: Optional[str] = None,
+    role: Optional[str] = None,
+    limit: int = Query(default=MATCH_DEFAULT_LIMIT, ge=1),
+):
+    """
+    Beste Paare Gilde/Spieler ueber einen ganzen Realm, optional auf Klasse/Spec/Rolle der
+    Spieler eingeschraenkt (vektorisiert, scoring.py).
+    """
+    from scoring import scoring_engine
+
+    realm = realm.strip()
+    validate_realm(realm)
+    limit = min(limit, MATCH_MAX_LIMIT)
+    params = dict(realm=realm, faction=faction, class_name=class_name, spec=spec, role=role, limit=limit)
+    return await response_cache.aget_or_compute(
+        "realm_matches", params, ("guilds", "players"),
+        lambda: db.run(lambda s: scoring_engine.best_matches(s, **params)),
+    )
+
+
+@app.get("/api/players/{player_id}/matches", response_model=List[GuildMatch])
+async def player_matches(
+    player_id: int,
+    db: ReadSession = Depends(get_read_db),
+    limit: int = Query(default=MATCH_DEFAULT_LIMIT, ge=1),
+):
+    """
+    Top-K passende Gilden fuer einen Spieler, aus dem Match-Index (matching.py).
+    """
+    limit = min(limit, MATCH_MAX_LIMIT)
+
+    def load(s: Session):
+        p = s.get(Player, player_id)
+        if not p or p.realm not in ALLOWED_REALMS:
+            raise HTTPException(404, "Player not found")
+        return [
+            GuildMatch(score=score, guild=guild_to_out(g))
+            for g, score in top_guilds(s, player_id, limit, ALLOWED_REALMS)
+        ]
+
+    return await response_cache.aget_or_compute(
+        "player_matches", {"id": player_id, "limit": limit}, ("guilds", "players"), lambda: db.run(load),
+    )
 
 
 @app.put("/api/players/{player_id}", response_model=PlayerOut)
@@ -340,31 +881,17 @@ def update_player(
     db: Session = Depends(get_db),
     x_edit_token: Optional[str] = Header(default=None),
 ):
-    p = db.get(Player, player_id)
-    if not p:
-        raise HTTPException(404, "Player not found")
-    require_token(p.edit_token, x_edit_token)
-
-    realm = payload.realm.strip()
-    validate_realm(realm)
-
-    p.name = payload.name.strip()
-    p.realm = realm
-    p.faction = payload.faction
-    p.language = payload.language.strip()
-    p.class_name = payload.class_name.strip()
-    p.spec = payload.spec.strip()
-    p.role = payload.role
-    p.skill_rating = payload.skill_rating
-    p.professions = payload.professions
-    p.attunements = payload.attunements
-    p.availability = payload.availability
-    p.logs_url = payload.logs_url.strip()
-    p.note = payload.note.strip()
-
+    values = player_values(payload)
+    check_realm_update(db, Player, player_id, x_edit_token, values["realm"], "Player not found")
+    p = update_with_token(db, Player, player_id, x_edit_token, values)
+    if p is None:
+        raise token_failure(db, Player, player_id, "Player not found")
+
+    refresh_player(db, p)
+    out = player_to_out(p)
     db.commit()
-    db.refresh(p)
-    return player_to_out(p)
+    bump("players")
+    return out
 
 
 @app.delete("/api/players/{player_id}")
@@ -377,8 +904,10 @@ def delete_player(
     if not p:
         raise HTTPException(404, "Player not found")
     require_token(p.edit_token, x_edit_token)
+    drop_player(db, p.id)
     db.delete(p)
     db.commit()
+    bump("players", "applications")
     return {"deleted": True}
 
 
@@ -401,10 +930,13 @@ def apply(payload: ApplicationCreate, db: Session = Depends(get_db)):
     )
     db.add(a)
     try:
+        db.flush()
+        emit(db, application_event(g))
         db.commit()
     except Exception:
         db.rollback()
         raise HTTPException(status_code=400, detail="Already applied or invalid")
+    bump("applications")
     db.refresh(a)
 
     return ApplicationOut(
@@ -417,12 +949,18 @@ def apply(payload: ApplicationCreate, db: Session = Depends(get_db)):
     )
 
 
-@app.get("/api/guilds/{guild_id}/applications", response_model=List[ApplicationOut])
+@app.get("/api/guilds/{guild_id}/applications", response_model=InboxPage)
 def guild_apps(
     guild_id: int,
     db: Session = Depends(get_db),
     x_edit_token: Optional[str] = Header(default=None),
+    status: Optional[ApplicationStatus] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(default=DEFAULT_PAGE_SIZE, ge=1),
 ):
+    """
+    Bewerbungs-Inbox einer Gilde, neueste zuerst, mit Kurzprofil des Spielers aus demselben Query.
+    """
     g = db.get(Guild, guild_id)
     if not g:
         raise HTTPException(404, "Guild not found")
@@ -431,119 +969,300 @@ def guild_apps(
     if g.realm not in ALLOWED_REALMS:
         raise HTTPException(404, "Guild not found")
 
-    stmt = select(Application).where(Application.guild_id == guild_id)
-    rows = db.execute(stmt).scalars().all()
-    return [
-        ApplicationOut(
-            id=a.id,
-            guild_id=a.guild_id,
-            player_id=a.player_id,
-            message=a.message,
-            status=a.status,
-            created_at=a.created_at.isoformat(),
+    stmt = (
+        select(
+            Application, Player.name, Player.class_name, Player.spec, Player.role,
+            Player.skill_rating, Player.logs_url,
         )
-        for a in rows
-    ]
-
+        .join(Player, Player.id == Application.player_id)
+        .where(Application.guild_id == guild_id)
+    )
+    if status:
+        stmt = stmt.where(Application.status == status)
 
-@app.post("/api/import")
-def import_character(req: ImportRequest, db: Session = Depends(get_db)):
+    rows, next_cursor = fetch_page(
+        db, stmt, [Application.created_at, Application.id], f"inbox:{status or ''}", cursor,
+        clamp_limit(limit), width=7,
+    )
+    return {
+        "items": [
+            InboxItem(
+                id=a.id,
+                guild_id=a.guild_id,
+                player_id=a.player_id,
+                message=a.message,
+                status=a.status,
+                created_at=a.created_at.isoformat(),
+                player=ApplicantSummary(
+                    name=name, class_name=class_name, spec=spec, role=role,
+                    skill_rating=skill_rating, logs_url=logs_url,
+                ),
+            )
+            for a, name, class_name, spec, role, skill_rating, logs_url in rows
+        ],
+        "next_cursor": next_cursor,
+    }
+
+
+@app.patch("/api/guilds/{guild_id}/applications", response_model=ApplicationStatusResult)
+def update_application_status(
+    guild_id: int,
+    payload: ApplicationStatusUpdate,
+    db: Session = Depends(get_db),
+    x_edit_token: Optional[str] = Header(default=None),
+):
     """
-    Speichert den Addon-Export in character_imports UND spiegelt einen Eintrag in players,
-    damit er im Tab "Spieler suchen" auftaucht.
+    Setzt den Status vieler Bewerbungen in einer Transaktion (ein UPDATE ... RETURNING).
+    Ids, die nicht zu dieser Gilde gehoeren, landen in not_found.
     """
-    try:
-        payload = decode_export_string(req.exportString)
-        summary = summarize_payload(payload)
+    g = db.get(Guild, guild_id)
+    if not g:
+        raise HTTPException(404, "Guild not found")
+    require_token(g.edit_token, x_edit_token)
 
-        name = (summary.get("name") or "").strip()
-        realm = (summary.get("realm") or "").strip()
-        if not name or not realm:
-            raise HTTPException(status_code=400, detail="Missing character name or realm")
+    if g.realm not in ALLOWED_REALMS:
+        raise HTTPException(404, "Guild not found")
 
-        validate_realm(realm)
+    ids = sorted(set(payload.ids))
+    stmt = (
+        update(Application)
+        .where(Application.guild_id == guild_id, Application.id.in_(ids))
+        .values(status=payload.status)
+        .returning(Application.id)
+    )
+    updated = sorted(db.execute(stmt).scalars().all())
+    db.commit()
+    if updated:
+        bump("applications")
+    return {"updated": updated, "not_found": sorted(set(ids) - set(updated))}
 
-        # Export-Zeit parsen (optional)
-        exported_at = None
-        exported_at_raw = summary.get("exportedAt")
-        if exported_at_raw:
-            try:
-                exported_at = datetime.fromisoformat(exported_at_raw.replace("Z", "+00:00"))
-            except Exception:
-                exported_at = None
-
-        guid = (summary.get("guid") or "").strip() or None
-
-        # 1) Spiegeln in players (upsert)
-        player_insert_vals = {
-            "edit_token": secrets.token_urlsafe(24),
-            "name": name,
-            "realm": realm,
-            "faction": summary.get("faction") or "Horde",
-            "language": summary.get("language") or "DE",
-            "class_name": summary.get("className") or summary.get("classFile") or "Warrior",
-            "spec": summary.get("spec") or "Unknown",
-            "role": summary.get("role") or "DPS",
-            "skill_rating": int(summary.get("skillRating") or 3),
-            "professions": summary.get("professions") or [],
-            "attunements": summary.get("attunements") or [],
-            "availability": summary.get("availability") or [],
-            "logs_url": summary.get("logsUrl") or "",
-            "note": summary.get("note") or "Imported via Addon",
-            "updated_at": func.now(),
-        }
 
-        # edit_token NICHT überschreiben bei Update
-        player_update_vals = dict(player_insert_vals)
-        player_update_vals.pop("edit_token", None)
+def prepare_import(payload: Optional[dict], summary: dict):
+    """
+    Baut aus einem dekodierten Addon-Export die Zeilen fuer players und character_imports.
+    Liefert (player_vals, import_vals).
+    """
+    from import_wpe import payload_hash
 
-        pstmt = insert(Player).values(**player_insert_vals)
-        pstmt = pstmt.on_conflict_do_update(
-            index_elements=[Player.name, Player.realm],
-            set_=player_update_vals,
-        )
-        db.execute(pstmt)
-
-        # 2) Speichern in character_imports (upsert)
-        values = {
-            "guid": guid,
-            "name": name,
-            "realm": realm,
-            "level": summary.get("level"),
-            "class_file": summary.get("classFile"),
-            "race_file": summary.get("raceFile"),
-            "faction": summary.get("faction"),
-            "guild_name": summary.get("guildName"),
-            "exported_at": exported_at,
-            "payload": payload,
-            "updated_at": func.now(),
-        }
+    name = (summary.get("name") or "").strip()
+    realm = (summary.get("realm") or "").strip()
+    if not name or not realm:
+        raise HTTPException(status_code=400, detail="Missing character name or realm")
 
-        if guid:
-            stmt = insert(CharacterImport).values(**values)
-            stmt = stmt.on_conflict_do_update(
-                index_elements=[CharacterImport.guid],
-                set_=values,
-            ).returning(CharacterImport.id)
-        else:
-            stmt = insert(CharacterImport).values(**values)
-            stmt = stmt.on_conflict_do_update(
-                index_elements=[CharacterImport.name, CharacterImport.realm],
-                set_=values,
-            ).returning(CharacterImport.id)
+    validate_realm(realm)
+
+    # Export-Zeit parsen (optional)
+    exported_at = None
+    exported_at_raw = summary.get("exportedAt")
+    if exported_at_raw:
+        try:
+            exported_at = datetime.fromisoformat(exported_at_raw.replace("Z", "+00:00"))
+        except Exception:
+            exported_at = None
+
+    guid = (summary.get("guid") or "").strip() or None
+
+    # 1) Spiegeln in players
+    player_vals = {
+        "edit_token": secrets.token_urlsafe(24),
+        "name": name,
+        "realm": realm,
+        "faction": summary.get("faction") or "Horde",
+        "language": summary.get("language") or "DE",
+        "class_name": summary.get("className") or summary.get("classFile") or "Warrior",
+        "spec": summary.get("spec") or "Unknown",
+        "role": summary.get("role") or "DPS",
+        "skill_rating": int(summary.get("skillRating") or 3),
+        "professions": summary.get("professions") or [],
+        "attunements": summary.get("attunements") or [],
+        "availability": summary.get("availability") or [],
+        "logs_url": summary.get("logsUrl") or "",
+        "note": summary.get("note") or "Imported via Addon",
+    }
+
+    # 2) Speichern in character_imports
+    import_vals = {
+        "guid": guid,
+        "name": name,
+        "realm": realm,
+        "level": summary.get("level"),
+        "class_file": summary.get("classFile"),
+        "race_file": summary.get("raceFile"),
+        "faction": summary.get("faction"),
+        "guild_name": summary.get("guildName"),
+        "exported_at": exported_at,
+        # compressed Storage: nur Summary-Spalten hot halten, Export liegt in character_import_payloads
+        "payload": payload if payload is not None else {},
+        "payload_hash": summary.get("payloadHash") or payload_hash(payload),
+    }
+    return player_vals, import_vals
+
+
+@app.post("/api/import")
+def import_character(req: ImportRequest, db: Session = Depends(get_db)):
+    """
+    Speichert den Addon-Export in character_imports UND spiegelt einen Eintrag in players,
+    damit er im Tab "Spieler suchen" auftaucht.
+    """
+    try:
+        payload, summary, blob = decode_pool.decode(req.exportString)
+        player_vals, import_vals = prepare_import(payload, summary)
 
-        new_id = db.execute(stmt).scalar()
+        ids, changed = write_imports(db, [player_vals], [import_vals], [blob])
         db.commit()
+        key = (import_vals["name"], import_vals["realm"])
+        if changed:
+            bump("players", "character_imports")
 
         return {
             "ok": True,
-            "id": int(new_id) if new_id is not None else None,
+            "id": ids.get(key),
+            "changed": key in changed,
             "summary": ImportSummary(**summary),
         }
 
     except HTTPException:
         db.rollback()
         raise
+    except (DecodeBusy, FuturesTimeout):
+        db.rollback()
+        raise HTTPException(status_code=503, detail="Import decoder busy, try again later")
     except Exception as e:
         db.rollback()
         raise HTTPException(status_code=400, detail=str(e))
+
+
+def write_imports(db: Session, player_rows: List[dict], import_rows: List[dict], blobs: List[Optional[bytes]]):
+    """
+    Upsert in character_imports und players. Unveraenderte Exporte (gleicher payload_hash)
+    schreiben keine Zeile neu; der Spieler wird dann nur angelegt, falls er fehlt.
+    blobs (parallel zu import_rows) sind die komprimierten Exporte fuer payload_store.
+    Liefert ({(name, realm): id}, {geaenderte (name, realm)}).
+    """
+    from bulk_import import character_import_ids, upsert_character_imports, upsert_players
+
+    changed_ids = upsert_character_imports(db, import_rows)
+    changed = set(changed_ids)
+    if compress_enabled():
+        store_versions(db, changed_ids, {
+            (r["name"], r["realm"]): (r["payload_hash"], blob)
+            for r, blob in zip(import_rows, blobs) if blob is not None
+        })
+    upsert_players(db, [p for p in player_rows if (p["name"], p["realm"]) in changed], update=True)
+    upsert_players(db, [p for p in player_rows if (p["name"], p["realm"]) not in changed], update=False)
+    for p in refresh_player_keys(db, changed):
+        emit(db, dict(player_event(p), source="import"))
+
+    unchanged = list({(r["name"], r["realm"]) for r in import_rows} - changed)
+    ids = character_import_ids(db, unchanged)
+    ids.update(changed_ids)
+    return ids, changed
+
+
+def _import_error(e: Exception) -> str:
+    if isinstance(e, HTTPException):
+        return str(e.detail)
+    if isinstance(e, FuturesTimeout):
+        return "Decode timed out"
+    return str(e) or e.__class__.__name__
+
+
+def import_chunk(db: Session, items: List[tuple], start: int) -> List[dict]:
+    """
+    Ein Chunk = eine Transaktion mit je einem mehrzeiligen Upsert pro Tabelle.
+    Schlaegt der Chunk in der DB fehl, wird er Eintrag fuer Eintrag wiederholt,
+    damit nur die fehlerhaften Exporte als Fehler gemeldet werden.
+    """
+    results: List[dict] = []
+    prepared = []
+    decoded = iter(decode_pool.decode_many([s for s, error in items if error is None]))
+    for i, (export_string, error) in enumerate(items, start=start):
+        if error is None:
+            try:
+                res = next(decoded)
+                if isinstance(res, Exception):
+                    raise res
+                payload, summary, blob = res
+                player_vals, import_vals = prepare_import(payload, summary)
+                prepared.append((i, blob, player_vals, import_vals))
+                continue
+            except Exception as e:
+                error = _import_error(e)
+        results.append({"index": i, "ok": False, "error": error})
+
+    def write(group):
+        res = write_imports(
+            db, [p for _, _, p, _ in group], [r for _, _, _, r in group], [b for _, b, _, _ in group],
+        )
+        db.commit()
+        return res
+
+    def ok(i: int, key: tuple, ids: Dict[tuple, int], changed: set) -> dict:
+        return {"index": i, "ok": True, "id": ids.get(key), "changed": key in changed, "name": key[0], "realm": key[1]}
+
+    try:
+        ids, changed = write(prepared) if prepared else ({}, set())
+        for i, _, _, import_vals in prepared:
+            results.append(ok(i, (import_vals["name"], import_vals["realm"]), ids, changed))
+    except Exception:
+        db.rollback()
+        for entry in prepared:
+            i, _, _, import_vals = entry
+            key = (import_vals["name"], import_vals["realm"])
+            try:
+                ids, changed = write([entry])
+                results.append(ok(i, key, ids, changed))
+            except Exception as e:
+                db.rollback()
+                results.append({"index": i, "ok": False, "name": key[0], "realm": key[1], "error": _import_error(e)})
+
+    return results
+
+
+@app.post("/api/import/batch")
+async def import_batch(request: Request, db: Session = Depends(get_db)):
+    """
+    Mehrere Addon-Exporte auf einmal (NDJSON Stream oder JSON Array), siehe bulk_import.py.
+    Fehlerhafte Eintraege brechen den Batch nicht ab, sondern werden pro Eintrag gemeldet.
+    """
+    from bulk_import import (
+        IMPORT_BATCH_CHUNK, IMPORT_BATCH_MAX_BYTES, IMPORT_BATCH_MAX_ITEMS, BodyTooLarge, iter_export_strings,
+    )
+
+    results: List[dict] = []
+    chunk: List[tuple] = []
+    start = 0
+    count = 0
+    truncated = False
+
+    try:
+        async for item in iter_export_strings(request):
+            if count >= IMPORT_BATCH_MAX_ITEMS:
+                truncated = True
+                break
+            chunk.append(item)
+            count += 1
+            if len(chunk) >= IMPORT_BATCH_CHUNK:
+                results.extend(await run_in_threadpool(import_chunk, db, chunk, start))
+                start += len(chunk)
+                chunk = []
+    except BodyTooLarge:
+        # NDJSON: bereits gelesene Eintraege werden noch importiert, der Rest ist abgeschnitten
+        if count == 0:
+            raise HTTPException(status_code=413, detail=f"Request body too large (max {IMPORT_BATCH_MAX_BYTES} bytes)")
+        truncated = True
+    if chunk:
+        results.extend(await run_in_threadpool(import_chunk, db, chunk, start))
+
+    ok = sum(1 for r in results if r["ok"])
+    if any(r.get("changed") for r in results):
+        bump("players", "character_imports")
+    results.sort(key=lambda r: r["index"])
+    return {
+        "ok": ok,
+        "failed": len(results) - ok,
+        "truncated": truncated,
+        "max_items": IMPORT_BATCH_MAX_ITEMS,
+        "max_bytes": IMPORT_BATCH_MAX_BYTES,
+        "results": results,
+    }
@@ -0,0 +1,236 @@
+"""
+Matchmaking Gilde <-> Spieler mit vorberechnetem Index (match_scores).
+
+Ein Paar passt, wenn Realm und Fraktion gleich sind und ein Need der Gilde Klasse und Rolle
+des Spielers trifft. Der Score (0..100) gewichtet:
+  need      Prio des besten passenden Needs (Spec passt nicht: Abschlag)
+  days      Anteil der Raidtage, an denen der Spieler verfuegbar ist
+  language  gleiche Sprache
+  attune    Anteil der Raids aus progress, fuer die der Spieler attuned ist
+
+Die schreibenden Endpunkte rufen refresh_guild / refresh_player / refresh_players vor dem
+Commit auf; neu berechnet wird nur die Zeile bzw. Spalte des geaenderten Eintrags
+(O(Gegenseite im Realm)), die Match-Endpunkte lesen nur noch die Top-K per Index.
+"""
+import os
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import delete, exists, func, insert, select, tuple_
+
+from models import Guild, MatchScore, Player
+
+MATCH_DEFAULT_LIMIT = int(os.getenv("MATCH_DEFAULT_LIMIT", "10"))
+MATCH_MAX_LIMIT = int(os.getenv("MATCH_MAX_LIMIT", "50"))
+
+W_NEED = 0.5
+W_DAYS = 0.25
+W_LANGUAGE = 0.15
+W_ATTUNE = 0.1
+SPEC_MISMATCH = 0.7
+MAX_PRIO = 5
+
+
+def _norm(value) -> str:
+    # needs ist List[dict] ohne Schema: alles ausser Strings zaehlt als "keine Angabe"
+    return value.strip().lower() if isinstance(value, str) else ""
+
+
+def _norm_set(values) -> set:
+    return {_norm(v) for v in values or [] if _norm(v)}
+
+
+def _prio(value) -> int:
+    try:
+        prio = int(value or 3)
+    except (TypeError, ValueError, OverflowError):
+        prio = 3    # z.B. "high": wie eine fehlende prio
+    return min(prio, MAX_PRIO)
+
+
+def parse_need(n) -> Optional[Tuple[str, str, str, int]]:
+    """
+    (class, spec, role, prio) normalisiert, None fuer Eintraege, die kein Objekt sind.
+    Klasse/Rolle, die keine Strings sind, werden "" und matchen damit nie.
+    """
+    if not isinstance(n, dict):
+        return None
+    return _norm(n.get("class") or n.get("class_name")), _norm(n.get("spec")), _norm(n.get("role")), _prio(n.get("prio"))
+
+
+def parse_needs(needs) -> List[Tuple[str, str, str, int]]:
+    return [parsed for parsed in map(parse_need, needs or []) if parsed is not None]
+
+
+def need_score(needs: List[dict], class_name: str, spec: str, role: str) -> float:
+    best = 0.0
+    for n_class, n_spec, n_role, prio in parse_needs(needs):
+        if n_class != _norm(class_name) or n_role != _norm(role):
+            continue
+        s = prio / MAX_PRIO
+        if n_spec and n_spec != _norm(spec):
+            s *= SPEC_MISMATCH
+        best = max(best, s)
+    return best
+
+
+def score(g: Guild, p: Player) -> float:
+    """
+    g/p: ORM-Objekte oder Zeilen mit den Spalten aus GUILD_SCORE_COLUMNS/PLAYER_SCORE_COLUMNS.
+    0.0 = kein Match (anderer Realm/Fraktion oder kein passender Need).
+    """
+    if g.realm != p.realm or g.faction != p.faction:
+        return 0.0
+    need = need_score(g.needs, p.class_name, p.spec, p.role)
+    if need <= 0:
+        return 0.0
+
+    raid_days = _norm_set(g.raid_days)
+    availability = _norm_set(p.availability)
+    if not raid_days:
+        days = 1.0
+    elif not availability:
+        days = 0.5    # keine Angabe: neutral
+    else:
+        days = len(raid_days & availability) / len(raid_days)
+
+    language = 1.0 if _norm(g.language) == _norm(p.language) else 0.0
+
+    raids = _norm_set((g.progress or {}).keys())
+    attune = len(raids & _norm_set(p.attunements)) / len(raids) if raids else 1.0
+
+    total = W_NEED * need + W_DAYS * days + W_LANGUAGE * language + W_ATTUNE * attune
+    return round(total * 100, 2)
+
+
+# Spalten, die score() liest: Zeilen statt ORM-Objekte (keine Identity Map, kein Laden von note usw.)
+PLAYER_SCORE_COLUMNS = (
+    Player.id, Player.realm, Player.faction, Player.class_name, Player.spec, Player.role,
+    Player.language, Player.availability, Player.attunements,
+)
+GUILD_SCORE_COLUMNS = (
+    Guild.id, Guild.realm, Guild.faction, Guild.needs, Guild.raid_days, Guild.language, Guild.progress,
+)
+
+
+def _write(db, rows: List[dict]) -> None:
+    if rows:
+        db.execute(insert(MatchScore), rows)
+
+
+def _lower(column):
+    return func.lower(func.trim(column))
+
+
+def refresh_guild(db, g: Guild) -> None:
+    db.execute(delete(MatchScore).where(MatchScore.guild_id == g.id))
+    # nur Spieler, deren (Klasse, Rolle) ein Need trifft; need_score prueft dasselbe, normiert wie _norm
+    wanted = sorted({(c, r) for c, _, r, _ in parse_needs(g.needs) if c and r})
+    if not wanted:
+        return
+    players = db.execute(
+        select(*PLAYER_SCORE_COLUMNS).where(
+            Player.realm == g.realm,
+            Player.faction == g.faction,
+            tuple_(_lower(Player.class_name), _lower(Player.role)).in_(wanted),
+        )
+    ).all()
+    _write(db, [
+        {"guild_id": g.id, "player_id": p.id, "score": s}
+        for p in players
+        if (s := score(g, p)) > 0
+    ])
+
+
+def refresh_player(db, p: Player) -> None:
+    refresh_players(db, [p])
+
+
+def refresh_players(db, players: Iterable[Player]) -> None:
+    """
+    Fuer mehrere Spieler (Batch-Import): Gilden werden einmal pro Realm+Fraktion geladen.
+    """
+    players = list(players)
+    if not players:
+        return
+    db.execute(delete(MatchScore).where(MatchScore.player_id.in_([p.id for p in players])))
+
+    guilds: Dict[Tuple[str, str], list] = {}
+    rows: List[dict] = []
+    for p in players:
+        key = (p.realm, p.faction)
+        if key not in guilds:
+            guilds[key] = db.execute(
+                select(*GUILD_SCORE_COLUMNS).where(Guild.realm == p.realm, Guild.faction == p.faction)
+            ).all()
+        for g in guilds[key]:
+            s = score(g, p)
+            if s > 0:
+                rows.append({"guild_id": g.id, "player_id": p.id, "score": s})
+    _write(db, rows)
+
+
+def refresh_player_keys(db, keys: Iterable[Tuple[str, str]]) -> List[Player]:
+    keys = list(keys)
+    if not keys:
+        return []
+    stmt = select(Player).where(tuple_(Player.name, Player.realm).in_(keys)).execution_options(populate_existing=True)
+    players = list(db.execute(stmt).scalars())
+    refresh_players(db, players)
+    return players
+
+
+def drop_guild(db, guild_id: int) -> None:
+    db.execute(delete(MatchScore).where(MatchScore.guild_id == guild_id))
+
+
+def drop_player(db, player_id: int) -> None:
+    db.execute(delete(MatchScore).where(MatchScore.player_id == player_id))
+
+
+def backfill_index(db) -> Optional[int]:
+    """
+    rebuild_all, wenn der Index leer ist, es aber Gilden gibt (Daten aus der Zeit vor
+    match_scores). Liefert die Anzahl Paare oder None, wenn nichts zu tun war.
+    """
+    if db.scalar(select(exists().where(MatchScore.guild_id.isnot(None)))):
+        return None
+    if not db.scalar(select(exists().where(Guild.id.isnot(None)))):
+        return None
+    return rebuild_all(db)
+
+
+def rebuild_all(db) -> int:
+    """
+    Baut den ganzen Index neu auf (Backfill fuer bestehende Daten). Liefert die Anzahl Paare.
+    """
+    db.execute(delete(MatchScore))
+    for g in db.execute(select(Guild)).scalars().all():
+        refresh_guild(db, g)
+    db.flush()
+    return db.query(MatchScore).count()
+
+
+def top_guilds(db, player_id: int, limit: int, realms: Optional[Iterable[str]] = None) -> List[Tuple[Guild, float]]:
+    stmt = (
+        select(Guild, MatchScore.score)
+        .join(MatchScore, MatchScore.guild_id == Guild.id)
+        .where(MatchScore.player_id == player_id)
+        .order_by(MatchScore.score.desc(), Guild.id.desc())
+        .limit(limit)
+    )
+    if realms is not None:
+        stmt = stmt.where(Guild.realm.in_(sorted(realms)))
+    return [(g, s) for g, s in db.execute(stmt).all()]
+
+
+def top_players(db, guild_id: int, limit: int, realms: Optional[Iterable[str]] = None) -> List[Tuple[Player, float]]:
+    stmt = (
+        select(Player, MatchScore.score)
+        .join(MatchScore, MatchScore.player_id == Player.id)
+        .where(MatchScore.guild_id == guild_id)
+        .order_by(MatchScore.score.desc(), Player.id.desc())
+        .limit(limit)
+    )
+    if realms is not None:
+        stmt = stmt.where(Player.realm.in_(sorted(realms)))
+    return [(p, s) for p, s in db.execute(stmt).all()]
@@ -0,0 +1,243 @@
+"""
+Eingebaute Instrumentierung, ausgegeben im Prometheus Textformat unter GET /api/metrics.
+
+  MetricsMiddleware   Latenz-Histogramm pro Route (Pfad-Template, nicht die rohe URL) und
+                      Requests pro Route + Status
+  instrument_engine   before/after_cursor_execute: Anzahl Queries und DB-Zeit pro Request
+                      (Histogramme pro Route) und insgesamt; Queries ueber SLOW_QUERY_MS
+                      landen im Log (Logger "metrics.slow_query")
+
+Die Zuordnung Query -> Request laeuft ueber eine ContextVar; run_in_threadpool und
+AsyncSession.run_sync uebernehmen den Kontext, sync Handler werden also mitgezaehlt.
+SSE-Verbindungen (text/event-stream) zaehlen nur als Request, nicht ins Latenz-Histogramm.
+"""
+import logging
+import os
+import threading
+import time
+from contextvars import ContextVar
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import event
+
+log = logging.getLogger("metrics.slow_query")
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1") == "1"
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "200"))                # 0 = aus
+SLOW_QUERY_MAX_CHARS = int(os.getenv("SLOW_QUERY_MAX_CHARS", "1000"))
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+_QUERY_START = "metrics_query_start"
+
+
+class Histogram:
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * len(self.buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self) -> List[Tuple[float, int]]:
+        out, total = [], 0
+        for bound, n in zip(self.buckets, self.counts):
+            total += n
+            out.append((bound, total))
+        return out
+
+
+class RequestStats:
+    __slots__ = ("scope", "queries", "db_seconds")
+
+    def __init__(self, scope):
+        self.scope = scope
+        self.queries = 0
+        self.db_seconds = 0.0
+
+
+_current: ContextVar[Optional[RequestStats]] = ContextVar("metrics_request", default=None)
+
+
+def route_label(scope) -> str:
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+
+class Metrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests: Dict[Tuple[str, str, str], int] = {}
+        self.latency: Dict[Tuple[str, str], Histogram] = {}
+        self.request_queries: Dict[Tuple[str, str], Histogram] = {}
+        self.request_db: Dict[Tuple[str, str], Histogram] = {}
+        self.in_progress = 0
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.slow_queries = 0
+        self.query_errors = 0
+
+    def _hist(self, table: Dict[Tuple[str, str], Histogram], key: Tuple[str, str], buckets) -> Histogram:
+        h = table.get(key)
+        if h is None:
+            h = table[key] = Histogram(buckets)
+        return h
+
+    def started(self, delta: int) -> None:
+        with self._lock:
+            self.in_progress += delta
+
+    def observe_request(
+        self, method: str, route: str, status: int, seconds: Optional[float], stats: RequestStats,
+    ) -> None:
+        key = (method, route)
+        with self._lock:
+            self.requests[(method, route, str(status))] = self.requests.get((method, route, str(status)), 0) + 1
+            if seconds is not None:
+                self._hist(self.latency, key, LATENCY_BUCKETS).observe(seconds)
+            self._hist(self.request_queries, key, QUERY_COUNT_BUCKETS).observe(stats.queries)
+            self._hist(self.request_db, key, LATENCY_BUCKETS).observe(stats.db_seconds)
+
+    def observe_query(self, seconds: float, statement: str) -> None:
+        stats = _current.get()
+        if stats is not None:
+            stats.queries += 1
+            stats.db_seconds += seconds
+        slow = SLOW_QUERY_MS > 0 and seconds * 1000 >= SLOW_QUERY_MS
+        with self._lock:
+            self.queries += 1
+            self.db_seconds += seconds
+            if slow:
+                self.slow_queries += 1
+        if slow:
+            where = f"{stats.scope.get('method')} {route_label(stats.scope)}" if stats is not None else "-"
+            log.warning("slow query %.1f ms [%s]: %s", seconds * 1000, where, " ".join(statement.split())[:SLOW_QUERY_MAX_CHARS])
+
+    def count_error(self) -> None:
+        with self._lock:
+            self.query_errors += 1
+
+    def render(self, extra: Iterable[Tuple[str, str, str, float]] = ()) -> str:
+        """
+        Prometheus Textformat (0.0.4). extra: zusaetzliche (name, typ, help, wert), z.B. Pool
+        und Cache.
+        """
+        lines: List[str] = []
+        with self._lock:
+            _family(lines, "http_requests_total", "counter", "HTTP requests by route and status")
+            for (method, route, status), n in sorted(self.requests.items()):
+                lines.append(f"http_requests_total{_labels(method=method, route=route, status=status)} {n}")
+            _family(lines, "http_requests_in_progress", "gauge", "HTTP requests currently being served")
+            lines.append(f"http_requests_in_progress {self.in_progress}")
+            _histograms(lines, "http_request_duration_seconds", "Request latency by route", self.latency)
+            _histograms(lines, "http_request_db_queries", "SQL statements per request", self.request_queries)
+            _histograms(lines, "http_request_db_seconds", "DB time per request", self.request_db)
+            for name, kind, text, value in (
+                ("db_queries_total", "counter", "SQL statements executed", self.queries),
+                ("db_query_seconds_total", "counter", "Total time spent in SQL statements", round(self.db_seconds, 6)),
+                ("db_slow_queries_total", "counter", f"SQL statements slower than SLOW_QUERY_MS ({SLOW_QUERY_MS:g} ms)", self.slow_queries),
+                ("db_query_errors_total", "counter", "SQL statements that raised", self.query_errors),
+            ):
+                _family(lines, name, kind, text)
+                lines.append(f"{name} {value}")
+        for name, kind, text, value in extra:
+            _family(lines, name, kind, text)
+            lines.append(f"{name} {value}")
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(**labels) -> str:
+    return "{" + ",".join(f'{k}="{_escape(str(v))}"' for k, v in labels.items()) + "}"
+
+
+def _family(lines: List[str], name: str, kind: str, text: str) -> None:
+    lines.append(f"# HELP {name} {text}")
+    lines.append(f"# TYPE {name} {kind}")
+
+
+def _histograms(lines: List[str], name: str, text: str, table: Dict[Tuple[str, str], Histogram]) -> None:
+    _family(lines, name, "histogram", text)
+    for (method, route), h in sorted(table.items()):
+        for bound, n in h.cumulative():
+            lines.append(f"{name}_bucket{_labels(method=method, route=route, le=f'{bound:g}')} {n}")
+        lines.append(f"{name}_bucket{_labels(method=method, route=route, le='+Inf')} {h.count}")
+        lines.append(f"{name}_sum{_labels(method=method, route=route)} {round(h.sum, 6)}")
+        lines.append(f"{name}_count{_labels(method=method, route=route)} {h.count}")
+
+
+metrics = Metrics()
+
+
+class MetricsMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not METRICS_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats(scope)
+        token = _current.set(stats)
+        status = 500
+        streaming = False
+        start = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status, streaming
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                for k, v in message.get("headers", []):
+                    if k.lower() == b"content-type" and v.startswith(b"text/event-stream"):
+                        streaming = True
+            await send(message)
+
+        metrics.started(1)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            _current.reset(token)
+            metrics.started(-1)
+            metrics.observe_request(
+                scope["method"], route_label(scope), status, None if streaming else elapsed, stats,
+            )
+
+
+def instrument_engine(engine) -> None:
+    """
+    Query-Zaehler und Slow-Query-Log fuer eine (sync) Engine; fuer die async Engine
+    async_engine.sync_engine uebergeben.
+    """
+    if not METRICS_ENABLED:
+        return
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault(_QUERY_START, []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info[_QUERY_START].pop()
+        metrics.observe_query(time.perf_counter() - started, statement)
+
+    @event.listens_for(engine, "handle_error")
+    def _error(ctx):
+        conn = ctx.connection
+        if conn is not None and conn.info.get(_QUERY_START):
+            conn.info[_QUERY_START].pop()
+        metrics.count_error()
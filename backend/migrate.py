@@ -0,0 +1,224 @@
+"""
+Versionierte Schema-Migrationen, ersetzt Base.metadata.create_all beim Import von main.
+
+    cd backend
+    python migrate.py            # alle offenen Migrationen anwenden (Release-Schritt)
+    python migrate.py status     # angewandt / offen auflisten
+
+Migrationen liegen in migrations/NNNN_<name>.py und definieren upgrade(conn). Angewandte
+Versionen stehen in schema_migrations. Mit TRANSACTIONAL = False laeuft eine Migration auf
+einer AUTOCOMMIT-Verbindung (noetig fuer CREATE INDEX CONCURRENTLY) und muss daher
+idempotent sein. Auf Postgres haelt der Runner ein Advisory Lock, parallele Deploys
+warten aufeinander.
+
+Jede Migration beschreibt ihr DDL selbst (eigene Table-Definitionen bzw. SQL) und importiert
+weder models noch App-Module: eine spaetere Aenderung am Modell darf nicht veraendern, was
+eine alte Migration auf einer frischen Datenbank anlegt. Abgeleitete Daten (Match-Index)
+sind keine Migration; die baut "python migrate.py" nach dem Schema-Upgrade mit dem
+aktuellen Code nach, falls sie fehlen (backfill).
+
+Die App selbst fuehrt beim Start kein DDL mehr aus.
+"""
+import argparse
+import importlib
+import logging
+import pkgutil
+import re
+import sys
+from dataclasses import dataclass
+from types import ModuleType
+from typing import List, Optional, Set
+
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, inspect, select, text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import func
+from sqlalchemy.sql.expression import FunctionElement
+
+from db import engine
+
+log = logging.getLogger("migrate")
+
+MIGRATIONS_PACKAGE = "migrations"
+LOCK_KEY = 7_101_321  # pg_advisory_lock, beliebig aber fest
+
+schema_migrations = Table(
+    "schema_migrations", MetaData(),
+    Column("version", Integer, primary_key=True),
+    Column("name", String(128), nullable=False),
+    Column("applied_at", DateTime(timezone=True), server_default=func.now()),
+)
+
+
+@dataclass
+class Migration:
+    version: int
+    name: str
+    module: ModuleType
+
+    @property
+    def transactional(self) -> bool:
+        return getattr(self.module, "TRANSACTIONAL", True)
+
+
+def discover() -> List[Migration]:
+    package = importlib.import_module(MIGRATIONS_PACKAGE)
+    found = []
+    for info in pkgutil.iter_modules(package.__path__):
+        m = re.fullmatch(r"(\d{4})_(\w+)", info.name)
+        if m is None:
+            continue
+        module = importlib.import_module(f"{MIGRATIONS_PACKAGE}.{info.name}")
+        found.append(Migration(int(m.group(1)), m.group(2), module))
+    found.sort(key=lambda mig: mig.version)
+    versions = [mig.version for mig in found]
+    if len(set(versions)) != len(versions):
+        raise RuntimeError(f"Duplicate migration versions: {versions}")
+    return found
+
+
+def applied_versions(bind: Engine = engine) -> Set[int]:
+    with bind.connect() as conn:
+        if not inspect(conn).has_table("schema_migrations"):
+            return set()
+        return set(conn.execute(select(schema_migrations.c.version)).scalars())
+
+
+def pending(bind: Engine = engine) -> List[Migration]:
+    done = applied_versions(bind)
+    return [mig for mig in discover() if mig.version not in done]
+
+
+def _apply(bind: Engine, mig: Migration) -> None:
+    record = schema_migrations.insert().values(version=mig.version, name=mig.name)
+    if mig.transactional:
+        with bind.begin() as conn:
+            mig.module.upgrade(conn)
+            conn.execute(record)
+        return
+    with bind.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        mig.module.upgrade(conn)
+        conn.execute(record)
+
+
+def upgrade(bind: Engine = engine, target: Optional[int] = None) -> List[Migration]:
+    """
+    Wendet alle offenen Migrationen bis einschliesslich target an. Liefert die angewandten.
+    """
+    lock = None
+    if bind.dialect.name == "postgresql":
+        lock = bind.connect().execution_options(isolation_level="AUTOCOMMIT")
+        lock.execute(text("SELECT pg_advisory_lock(:key)"), {"key": LOCK_KEY})
+    try:
+        schema_migrations.create(bind, checkfirst=True)
+        done = []
+        for mig in pending(bind):
+            if target is not None and mig.version > target:
+                break
+            log.info("applying %04d_%s", mig.version, mig.name)
+            _apply(bind, mig)
+            done.append(mig)
+        return done
+    finally:
+        if lock is not None:
+            lock.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": LOCK_KEY})
+            lock.close()
+
+
+# Helfer fuer die Migrationen
+
+class server_now(FunctionElement):
+    """
+    Server-Default fuer Zeitstempel: now(); auf SQLite mit Mikrosekunden im Textformat von
+    models.TIMESTAMPTZ, weil CURRENT_TIMESTAMP dort sekundengenau ist (ETags, Keyset-Cursor).
+    Eingefroren: haengt bewusst nicht an models.utcnow.
+    """
+    type = DateTime(timezone=True)
+    inherit_cache = True
+
+
+@compiles(server_now)
+def _server_now(element, compiler, **kw):
+    return "now()"
+
+
+@compiles(server_now, "sqlite")
+def _server_now_sqlite(element, compiler, **kw):
+    return "strftime('%Y-%m-%d %H:%M:%f000', 'now')"
+
+
+def create_tables(conn: Connection, *tables: Table) -> None:
+    """
+    Legt fehlende Tabellen samt ihren Indizes an (leer, daher ohne CONCURRENTLY).
+    Bestehende Tabellen bleiben unveraendert.
+    """
+    for table in tables:
+        table.create(conn, checkfirst=True)
+
+
+def add_column(conn: Connection, table: str, column: Column) -> None:
+    """
+    Spalte anlegen, falls sie fehlt.
+    """
+    if column.name in {c["name"] for c in inspect(conn).get_columns(table)}:
+        return
+    ddl = f"ALTER TABLE {table} ADD COLUMN {column.name} {column.type.compile(dialect=conn.dialect)}"
+    conn.exec_driver_sql(ddl)
+
+
+def create_index(conn: Connection, name: str, on: str, unique: bool = False) -> None:
+    """
+    CREATE INDEX IF NOT EXISTS <name> ON <on>, z.B. on="guilds (realm, updated_at, id)".
+    Auf Postgres CONCURRENTLY (conn muss AUTOCOMMIT sein); ein ungueltiger Rest eines
+    abgebrochenen CONCURRENTLY-Laufs wird vorher entfernt.
+    """
+    concurrently = ""
+    if conn.dialect.name == "postgresql":
+        invalid = conn.execute(text(
+            "SELECT 1 FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid "
+            "WHERE c.relname = :name AND NOT i.indisvalid"
+        ), {"name": name}).first()
+        if invalid:
+            conn.exec_driver_sql(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
+        concurrently = "CONCURRENTLY "
+    conn.exec_driver_sql(f"CREATE {'UNIQUE ' if unique else ''}INDEX {concurrently}IF NOT EXISTS {name} ON {on}")
+
+
+def backfill(bind: Engine = engine) -> None:
+    """
+    Abgeleitete Daten fuer Bestandsdaten aufbauen, die vor ihrer Einfuehrung angelegt wurden.
+    Laeuft mit dem aktuellen Code (nicht eingefroren wie die Migrationen) und nur, wenn die
+    Daten fehlen.
+    """
+    from matching import backfill_index
+
+    with Session(bind) as db:
+        n = backfill_index(db)
+        db.commit()
+    if n is not None:
+        log.info("match index rebuilt: %d pairs", n)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Schema-Migrationen")
+    parser.add_argument("command", nargs="?", default="upgrade", choices=("upgrade", "status"))
+    parser.add_argument("--target", type=int, default=None, help="nur bis zu dieser Version")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(name)s: %(message)s")
+
+    if args.command == "status":
+        done = applied_versions()
+        for mig in discover():
+            print(f"{'applied' if mig.version in done else 'pending':<8} {mig.version:04d}_{mig.name}")
+        return 0
+
+    applied = upgrade(target=args.target)
+    print(f"{len(applied)} migration(s) applied" if applied else "schema up to date")
+    if args.target is None:
+        backfill()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
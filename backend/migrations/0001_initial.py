@@ -0,0 +1,102 @@
+"""
+Ausgangsschema: Gilden, Spieler, Bewerbungen, Addon-Importe (Stand vor den Migrationen,
+nur die Spalten-Indizes; die weiteren Indizes kommen mit 0004).
+"""
+from sqlalchemy import (
+    JSON, BigInteger, Column, DateTime, ForeignKey, Integer, MetaData, String, Table, Text, UniqueConstraint,
+)
+from sqlalchemy.dialects.postgresql import ARRAY as PG_ARRAY, JSONB as PG_JSONB
+
+from migrate import create_tables, server_now
+
+# Postgres-Typen, auf SQLite als JSON
+JSONB = PG_JSONB().with_variant(JSON(), "sqlite")
+
+
+def ARRAY(item_type):
+    return PG_ARRAY(item_type).with_variant(JSON(), "sqlite")
+
+
+metadata = MetaData()
+
+guilds = Table(
+    "guilds", metadata,
+    Column("id", Integer, primary_key=True),
+    Column("edit_token", String(80), index=True, nullable=False),
+    Column("name", String(64), index=True, nullable=False),
+    Column("realm", String(64), index=True, nullable=False),
+    Column("faction", String(16), index=True, nullable=False),
+    Column("language", String(16), index=True, nullable=False),
+    Column("raid_days", ARRAY(String(8)), nullable=False),
+    Column("raid_time_start", String(8), nullable=False),
+    Column("raid_time_end", String(8), nullable=False),
+    Column("progress", JSONB, nullable=False),
+    Column("needs", JSONB, nullable=False),
+    Column("loot_system", String(64), nullable=False),
+    Column("contact_character", String(64), nullable=False),
+    Column("discord", String(256), nullable=False),
+    Column("website", String(256), nullable=False),
+    Column("description", Text, nullable=False),
+    Column("created_at", DateTime(timezone=True), server_default=server_now(), nullable=False),
+    Column("updated_at", DateTime(timezone=True), server_default=server_now(), nullable=False),
+    UniqueConstraint("name", "realm", "faction", name="uq_guild_name_realm_faction"),
+)
+
+players = Table(
+    "players", metadata,
+    Column("id", Integer, primary_key=True),
+    Column("edit_token", String(80), index=True, nullable=False),
+    Column("name", String(64), index=True, nullable=False),
+    Column("realm", String(64), index=True, nullable=False),
+    Column("faction", String(16), index=True, nullable=False),
+    Column("language", String(16), index=True, nullable=False),
+    Column("class_name", String(32), index=True, nullable=False),
+    Column("spec", String(32), index=True, nullable=False),
+    Column("role", String(16), index=True, nullable=False),
+    Column("skill_rating", Integer, index=True, nullable=False),
+    Column("professions", ARRAY(String(32)), nullable=False),
+    Column("attunements", ARRAY(String(32)), nullable=False),
+    Column("availability", ARRAY(String(8)), nullable=False),
+    Column("logs_url", String(256), nullable=False),
+    Column("note", Text, nullable=False),
+    Column("created_at", DateTime(timezone=True), server_default=server_now(), nullable=False),
+    Column("updated_at", DateTime(timezone=True), server_default=server_now(), nullable=False),
+    UniqueConstraint("name", "realm", name="uq_player_name_realm"),
+)
+
+applications = Table(
+    "applications", metadata,
+    Column("id", Integer, primary_key=True),
+    Column("guild_id", Integer, ForeignKey("guilds.id"), index=True, nullable=False),
+    Column("player_id", Integer, ForeignKey("players.id"), index=True, nullable=False),
+    Column("message", Text, nullable=False),
+    Column("status", String(16), nullable=False),
+    Column("created_at", DateTime(timezone=True), server_default=server_now(), nullable=False),
+    UniqueConstraint("guild_id", "player_id", name="uq_application_guild_player"),
+)
+
+character_imports = Table(
+    "character_imports", metadata,
+    # SQLite vergibt rowids nur fuer INTEGER PRIMARY KEY automatisch
+    Column("id", BigInteger().with_variant(Integer(), "sqlite"), primary_key=True),
+    Column("guid", Text, unique=True, nullable=True),
+    Column("name", String(64), index=True, nullable=False),
+    Column("realm", String(64), index=True, nullable=False),
+    Column("level", Integer, nullable=True),
+    Column("class_file", String(32), nullable=True),
+    Column("race_file", String(32), nullable=True),
+    Column("faction", String(16), nullable=True),
+    Column("guild_name", String(64), nullable=True),
+    Column("exported_at", DateTime(timezone=True), nullable=True),
+    Column("payload", JSONB, nullable=False),
+    Column("created_at", DateTime(timezone=True), server_default=server_now(), nullable=False),
+    Column("updated_at", DateTime(timezone=True), server_default=server_now(), nullable=False),
+    UniqueConstraint("name", "realm", name="uq_character_import_name_realm"),
+)
+
+
+def upgrade(conn):
+    if conn.dialect.name == "postgresql":
+        # Trigram-Indizes (gin_trgm_ops, 0004) auf guilds/players
+        conn.exec_driver_sql("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    create_tables(conn, guilds, players, applications, character_imports)
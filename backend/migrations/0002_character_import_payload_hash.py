@@ -0,0 +1,10 @@
+"""
+character_imports.payload_hash: unveraenderte Exporte beim Upsert ueberspringen.
+"""
+from sqlalchemy import Column, String
+
+from migrate import add_column
+
+
+def upgrade(conn):
+    add_column(conn, "character_imports", Column("payload_hash", String(64), nullable=True))
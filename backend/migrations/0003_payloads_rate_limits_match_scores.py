@@ -0,0 +1,49 @@
+"""
+Neue Tabellen: komprimierte Import-Payloads, geteilter Rate-Limit Zustand, Match-Index.
+"""
+from sqlalchemy import (
+    BigInteger, Column, DateTime, Float, ForeignKey, Index, Integer, LargeBinary, MetaData, String, Table,
+    UniqueConstraint,
+)
+
+from migrate import create_tables, server_now
+
+BIGINT = BigInteger().with_variant(Integer(), "sqlite")
+
+metadata = MetaData()
+
+# nur als Ziel der Foreign Keys, angelegt in 0001
+Table("guilds", metadata, Column("id", Integer, primary_key=True))
+Table("players", metadata, Column("id", Integer, primary_key=True))
+Table("character_imports", metadata, Column("id", BIGINT, primary_key=True))
+
+character_import_payloads = Table(
+    "character_import_payloads", metadata,
+    Column("id", BIGINT, primary_key=True),
+    Column("import_id", BIGINT, ForeignKey("character_imports.id", ondelete="CASCADE"), nullable=False),
+    Column("version", Integer, nullable=False),
+    Column("payload_hash", String(64), nullable=False),
+    Column("encoding", String(16), nullable=False),
+    Column("data", LargeBinary, nullable=False),
+    Column("created_at", DateTime(timezone=True), server_default=server_now(), nullable=False),
+    UniqueConstraint("import_id", "version", name="uq_character_import_payload_version"),
+)
+
+rate_limits = Table(
+    "rate_limits", metadata,
+    Column("key", String(128), primary_key=True),
+    Column("tat", Float, nullable=False),
+)
+
+match_scores = Table(
+    "match_scores", metadata,
+    Column("guild_id", Integer, ForeignKey("guilds.id", ondelete="CASCADE"), primary_key=True),
+    Column("player_id", Integer, ForeignKey("players.id", ondelete="CASCADE"), primary_key=True),
+    Column("score", Float, nullable=False),
+    Index("ix_match_scores_player_score", "player_id", "score"),
+    Index("ix_match_scores_guild_score", "guild_id", "score"),
+)
+
+
+def upgrade(conn):
+    create_tables(conn, character_import_payloads, rate_limits, match_scores)
@@ -0,0 +1,36 @@
+"""
+Keyset-, JSONB-, Trigram- und Volltext-Indizes auf den bestehenden Tabellen.
+
+Auf Postgres per CREATE INDEX CONCURRENTLY, Schreibzugriffe laufen waehrenddessen weiter.
+"""
+from migrate import create_index
+
+TRANSACTIONAL = False
+
+INDEXES = (
+    # keyset pagination: ORDER BY updated_at DESC, id DESC (bzw. skill_rating, ...)
+    ("ix_guilds_realm_updated_id", "guilds (realm, updated_at, id)"),
+    ("ix_players_realm_updated_id", "players (realm, updated_at, id)"),
+    ("ix_players_realm_skill_updated_id", "players (realm, skill_rating, updated_at, id)"),
+    # Inbox: WHERE guild_id = ? [AND status = ?] ORDER BY created_at DESC, id DESC
+    ("ix_applications_guild_status_created", "applications (guild_id, status, created_at, id)"),
+)
+
+POSTGRES_INDEXES = (
+    # need_class / need_role Filter: needs @> '[{"class": ...}]'
+    ("ix_guilds_needs_gin", "guilds USING gin (needs jsonb_path_ops)"),
+    # q= Suche: Trigram fuer ILIKE '%q%' auf name, Volltext auf description / note
+    ("ix_guilds_name_trgm", "guilds USING gin (name gin_trgm_ops)"),
+    ("ix_guilds_description_fts", "guilds USING gin (to_tsvector('simple'::regconfig, description))"),
+    ("ix_players_name_trgm", "players USING gin (name gin_trgm_ops)"),
+    ("ix_players_note_fts", "players USING gin (to_tsvector('simple'::regconfig, note))"),
+)
+
+
+def upgrade(conn):
+    indexes = INDEXES
+    if conn.dialect.name == "postgresql":
+        conn.exec_driver_sql("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        indexes += POSTGRES_INDEXES
+    for name, on in indexes:
+        create_index(conn, name, on)
@@ -0,0 +1,30 @@
+"""
+SQLite Fallback fuer die q= Suche: FTS5 (trigram tokenizer = Teilstring-Suche wie pg_trgm)
+als external-content Tabelle <table>_fts, per Trigger synchron gehalten. Auf Postgres
+decken das die Indizes aus 0004 ab.
+"""
+
+
+def fts_statements(table: str, text_col: str):
+    fts = f"{table}_fts"
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5("
+        f"name, {text_col}, content='{table}', content_rowid='id', tokenize='trigram')",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {table} BEGIN "
+        f"INSERT INTO {fts}(rowid, name, {text_col}) VALUES (new.id, new.name, new.{text_col}); END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {table} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, name, {text_col}) VALUES ('delete', old.id, old.name, old.{text_col}); END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE ON {table} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, name, {text_col}) VALUES ('delete', old.id, old.name, old.{text_col}); "
+        f"INSERT INTO {fts}(rowid, name, {text_col}) VALUES (new.id, new.name, new.{text_col}); END",
+        # bestehende Zeilen uebernehmen
+        f"INSERT INTO {fts}({fts}) VALUES ('rebuild')",
+    ]
+
+
+def upgrade(conn):
+    if conn.dialect.name != "sqlite":
+        return
+    for table, text_col in (("guilds", "description"), ("players", "note")):
+        for stmt in fts_statements(table, text_col):
+            conn.exec_driver_sql(stmt)
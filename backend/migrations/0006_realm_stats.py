@@ -0,0 +1,37 @@
+"""
+realm_stats (realm_stats.py): Postgres MATERIALIZED VIEW mit Unique Index, SQLite Tabelle.
+Die View-Definition ist hier eingefroren; aendert sich die Abfrage in realm_stats.py,
+braucht es eine neue Migration, die die View ersetzt.
+"""
+
+STATS_SELECT = """
+    SELECT realm, faction, 'supply_role' AS kind, coalesce(role, '') AS key, count(*) AS n
+      FROM players GROUP BY realm, faction, role
+    UNION ALL
+    SELECT realm, faction, 'supply_class', coalesce(class_name, ''), count(*)
+      FROM players GROUP BY realm, faction, class_name
+    UNION ALL
+    SELECT g.realm, g.faction, 'demand_class', coalesce(n.value ->> 'class', n.value ->> 'class_name', ''), count(*)
+      FROM guilds g CROSS JOIN jsonb_array_elements(g.needs) n
+     GROUP BY g.realm, g.faction, coalesce(n.value ->> 'class', n.value ->> 'class_name', '')
+    UNION ALL
+    SELECT g.realm, g.faction, 'demand_role', coalesce(n.value ->> 'role', ''), count(*)
+      FROM guilds g CROSS JOIN jsonb_array_elements(g.needs) n
+     GROUP BY g.realm, g.faction, coalesce(n.value ->> 'role', '')
+    UNION ALL
+    SELECT g.realm, g.faction, 'applications', coalesce(a.status, ''), count(*)
+      FROM applications a JOIN guilds g ON g.id = a.guild_id
+     GROUP BY g.realm, g.faction, a.status
+"""
+
+
+def upgrade(conn):
+    if conn.dialect.name == "postgresql":
+        conn.exec_driver_sql(f"CREATE MATERIALIZED VIEW IF NOT EXISTS realm_stats AS {STATS_SELECT}")
+        # REFRESH ... CONCURRENTLY braucht einen Unique Index ueber alle Zeilen
+        conn.exec_driver_sql("CREATE UNIQUE INDEX IF NOT EXISTS ux_realm_stats ON realm_stats (realm, faction, kind, key)")
+        return
+    conn.exec_driver_sql(
+        "CREATE TABLE IF NOT EXISTS realm_stats "
+        "(realm VARCHAR(64), faction VARCHAR(16), kind VARCHAR(16), key VARCHAR(32), n INTEGER)"
+    )
@@ -0,0 +1,6 @@
+"""
+Schema-Migrationen, angewandt von migrate.py in Reihenfolge der Nummer.
+
+Datenbanken, die noch per create_all entstanden sind, haben keine schema_migrations
+Tabelle; alle Schritte pruefen deshalb selbst, ob ihr Objekt schon existiert.
+"""
@@ -1,15 +1,65 @@
 from datetime import datetime
-from sqlalchemy import Text, String, Integer, BigInteger, DateTime, ForeignKey, UniqueConstraint
+from sqlalchemy import Text, String, Integer, BigInteger, Float, LargeBinary, DateTime, ForeignKey, UniqueConstraint, Index, JSON, text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
-from sqlalchemy.dialects.postgresql import JSONB, ARRAY
-from sqlalchemy.sql import func
+from sqlalchemy.dialects.postgresql import JSONB as PG_JSONB, ARRAY as PG_ARRAY
+from sqlalchemy.dialects.sqlite import DATETIME as SQLITE_DATETIME
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import FunctionElement
 
 from db import Base
 
+# Postgres-Typen, auf dem SQLite Fallback als JSON gespeichert
+JSONB = PG_JSONB().with_variant(JSON(), "sqlite")
+
+
+# SQLite speichert Text; alle Werte im selben Format (mit Mikrosekunden), sonst vergleichen
+# Keyset-Cursor falsch. Volle Sekunden reichen nicht: ETags haengen an updated_at, zwei
+# Edits in derselben Sekunde gaeben sonst denselben Validator.
+TIMESTAMPTZ = DateTime(timezone=True).with_variant(
+    SQLITE_DATETIME(
+        storage_format="%(year)04d-%(month)02d-%(day)02d %(hour)02d:%(minute)02d:%(second)02d.%(microsecond)06d",
+    ),
+    "sqlite",
+)
+
+
+class utcnow(FunctionElement):
+    """
+    now() mit Sekundenbruchteilen. Auf SQLite ist CURRENT_TIMESTAMP sekundengenau, dort wird
+    der Wert im Format von TIMESTAMPTZ erzeugt (strftime %f liefert Millisekunden).
+    """
+    type = DateTime(timezone=True)
+    inherit_cache = True
+
+
+@compiles(utcnow)
+def _utcnow(element, compiler, **kw):
+    return "now()"
+
+
+@compiles(utcnow, "sqlite")
+def _utcnow_sqlite(element, compiler, **kw):
+    return "strftime('%Y-%m-%d %H:%M:%f000', 'now')"
+
+
+def ARRAY(item_type):
+    return PG_ARRAY(item_type).with_variant(JSON(), "sqlite")
+
+
 class Guild(Base):
     __tablename__ = "guilds"
     __table_args__ = (
         UniqueConstraint("name", "realm", "faction", name="uq_guild_name_realm_faction"),
+        # keyset pagination: ORDER BY updated_at DESC, id DESC
+        Index("ix_guilds_realm_updated_id", "realm", "updated_at", "id"),
+        # need_class / need_role Filter: needs @> '[{"class": ...}]'
+        Index("ix_guilds_needs_gin", "needs", postgresql_using="gin", postgresql_ops={"needs": "jsonb_path_ops"})
+        .ddl_if(dialect="postgresql"),
+        # q= Suche (search.py): Trigram fuer ILIKE '%q%' auf name, Volltext auf description
+        Index("ix_guilds_name_trgm", "name", postgresql_using="gin", postgresql_ops={"name": "gin_trgm_ops"})
+        .ddl_if(dialect="postgresql"),
+        Index("ix_guilds_description_fts", text("to_tsvector('simple'::regconfig, description)"), postgresql_using="gin")
+        .ddl_if(dialect="postgresql"),
     )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
@@ -33,8 +83,8 @@ class Guild(Base):
     website: Mapped[str] = mapped_column(String(256), default="")
     description: Mapped[str] = mapped_column(Text, default="")
 
-    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
-    updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    created_at: Mapped[datetime] = mapped_column(TIMESTAMPTZ, default=utcnow(), server_default=utcnow())
+    updated_at: Mapped[datetime] = mapped_column(TIMESTAMPTZ, default=utcnow(), server_default=utcnow(), onupdate=utcnow())
 
     applications: Mapped[list["Application"]] = relationship(back_populates="guild", cascade="all, delete-orphan")
 
@@ -43,6 +93,13 @@ class Player(Base):
     __tablename__ = "players"
     __table_args__ = (
         UniqueConstraint("name", "realm", name="uq_player_name_realm"),
+        # keyset pagination: sort=recent / sort=skill
+        Index("ix_players_realm_updated_id", "realm", "updated_at", "id"),
+        Index("ix_players_realm_skill_updated_id", "realm", "skill_rating", "updated_at", "id"),
+        Index("ix_players_name_trgm", "name", postgresql_using="gin", postgresql_ops={"name": "gin_trgm_ops"})
+        .ddl_if(dialect="postgresql"),
+        Index("ix_players_note_fts", text("to_tsvector('simple'::regconfig, note)"), postgresql_using="gin")
+        .ddl_if(dialect="postgresql"),
     )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
@@ -65,8 +122,8 @@ class Player(Base):
     logs_url: Mapped[str] = mapped_column(String(256), default="")
     note: Mapped[str] = mapped_column(Text, default="")
 
-    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
-    updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    created_at: Mapped[datetime] = mapped_column(TIMESTAMPTZ, default=utcnow(), server_default=utcnow())
+    updated_at: Mapped[datetime] = mapped_column(TIMESTAMPTZ, default=utcnow(), server_default=utcnow(), onupdate=utcnow())
 
     applications: Mapped[list["Application"]] = relationship(back_populates="player", cascade="all, delete-orphan")
 
@@ -75,6 +132,8 @@ class Application(Base):
     __tablename__ = "applications"
     __table_args__ = (
         UniqueConstraint("guild_id", "player_id", name="uq_application_guild_player"),
+        # Inbox: WHERE guild_id = ? [AND status = ?] ORDER BY created_at DESC, id DESC
+        Index("ix_applications_guild_status_created", "guild_id", "status", "created_at", "id"),
     )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
@@ -84,7 +143,7 @@ class Application(Base):
     message: Mapped[str] = mapped_column(Text, default="")
     status: Mapped[str] = mapped_column(String(16), default="pending")  # pending/accepted/rejected
 
-    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+    created_at: Mapped[datetime] = mapped_column(TIMESTAMPTZ, default=utcnow(), server_default=utcnow())
 
     guild: Mapped[Guild] = relationship(back_populates="applications")
     player: Mapped[Player] = relationship(back_populates="applications")
@@ -95,7 +154,8 @@ class CharacterImport(Base):
         UniqueConstraint("name", "realm", name="uq_character_import_name_realm"),
     )
 
-    id: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+    # SQLite vergibt rowids nur fuer INTEGER PRIMARY KEY automatisch
+    id: Mapped[int] = mapped_column(BigInteger().with_variant(Integer(), "sqlite"), primary_key=True)
     guid: Mapped[str | None] = mapped_column(Text, unique=True, nullable=True)
 
     name: Mapped[str] = mapped_column(String(64), index=True)
@@ -107,9 +167,60 @@ class CharacterImport(Base):
     faction: Mapped[str | None] = mapped_column(String(16), nullable=True)
     guild_name: Mapped[str | None] = mapped_column(String(64), nullable=True)
 
-    exported_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    exported_at: Mapped[datetime | None] = mapped_column(TIMESTAMPTZ, nullable=True)
 
     payload: Mapped[dict] = mapped_column(JSONB, nullable=False, default=dict)
+    payload_hash: Mapped[str | None] = mapped_column(String(64), nullable=True)   # sha256, import_wpe.payload_hash
+
+    created_at: Mapped[datetime] = mapped_column(TIMESTAMPTZ, default=utcnow(), server_default=utcnow())
+    updated_at: Mapped[datetime] = mapped_column(TIMESTAMPTZ, default=utcnow(), server_default=utcnow(), onupdate=utcnow())
+
+
+class CharacterImportPayload(Base):
+    """
+    Komprimierte Versionen des rohen Exports (IMPORT_PAYLOAD_STORAGE=compressed, payload_store.py).
+    """
+    __tablename__ = "character_import_payloads"
+    __table_args__ = (
+        UniqueConstraint("import_id", "version", name="uq_character_import_payload_version"),
+    )
+
+    id: Mapped[int] = mapped_column(BigInteger().with_variant(Integer(), "sqlite"), primary_key=True)
+    import_id: Mapped[int] = mapped_column(
+        BigInteger().with_variant(Integer(), "sqlite"),
+        ForeignKey("character_imports.id", ondelete="CASCADE"),
+    )
+    version: Mapped[int] = mapped_column(Integer)
+
+    payload_hash: Mapped[str] = mapped_column(String(64))
+    encoding: Mapped[str] = mapped_column(String(16))                # zlib+json
+    data: Mapped[bytes] = mapped_column(LargeBinary)
+
+    created_at: Mapped[datetime] = mapped_column(TIMESTAMPTZ, default=utcnow(), server_default=utcnow())
+
+
+class RateLimit(Base):
+    """
+    Geteilter Rate-Limit Zustand fuer RATE_LIMIT_BACKEND=postgres (ratelimit.PostgresStore).
+    """
+    __tablename__ = "rate_limits"
+
+    key: Mapped[str] = mapped_column(String(128), primary_key=True)
+    tat: Mapped[float] = mapped_column(Float)                        # epoch seconds
+
+
+class MatchScore(Base):
+    """
+    Vorberechneter Match-Index (matching.py): eine Zeile pro passendem Paar Gilde/Spieler.
+    """
+    __tablename__ = "match_scores"
+    __table_args__ = (
+        # Top-K pro Seite: ORDER BY score DESC
+        Index("ix_match_scores_player_score", "player_id", "score"),
+        Index("ix_match_scores_guild_score", "guild_id", "score"),
+    )
+
+    guild_id: Mapped[int] = mapped_column(Integer, ForeignKey("guilds.id", ondelete="CASCADE"), primary_key=True)
+    player_id: Mapped[int] = mapped_column(Integer, ForeignKey("players.id", ondelete="CASCADE"), primary_key=True)
+    score: Mapped[float] = mapped_column(Float)
 
-    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
-    updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
@@ -0,0 +1,82 @@
+import base64
+import json
+import os
+from datetime import datetime
+from typing import Any, List, Optional, Sequence
+
+from fastapi import HTTPException
+from sqlalchemy import literal, tuple_
+
+DEFAULT_PAGE_SIZE = int(os.getenv("DEFAULT_PAGE_SIZE", "50"))
+MAX_PAGE_SIZE = int(os.getenv("MAX_PAGE_SIZE", "100"))
+
+
+def clamp_limit(limit: Optional[int]) -> int:
+    if not limit or limit < 1:
+        return DEFAULT_PAGE_SIZE
+    return min(limit, MAX_PAGE_SIZE)
+
+
+def _encode_value(v: Any) -> Any:
+    if isinstance(v, datetime):
+        return {"dt": v.isoformat()}
+    return v
+
+
+def _decode_value(v: Any) -> Any:
+    if isinstance(v, dict) and "dt" in v:
+        return datetime.fromisoformat(v["dt"])
+    return v
+
+
+def encode_cursor(sort: str, values: Sequence[Any]) -> str:
+    """
+    Opaque cursor: base64url(JSON) mit Sortierung + Keyset-Werten der letzten Zeile.
+    """
+    raw = json.dumps({"s": sort, "k": [_encode_value(v) for v in values]}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, sort: str, n_keys: int) -> List[Any]:
+    try:
+        pad = "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(cursor + pad))
+        if data.get("s") != sort:
+            raise ValueError("sort mismatch")
+        keys = [_decode_value(v) for v in data["k"]]
+        if len(keys) != n_keys:
+            raise ValueError("key count mismatch")
+        return keys
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def paginate(stmt, columns: Sequence[Any], sort: str, cursor: Optional[str], limit: int):
+    """
+    Keyset pagination, alle Sortierschluessel absteigend. Der letzte Schluessel muss
+    eindeutig sein (id), damit die Reihenfolge stabil ist.
+    Holt limit + 1 Zeilen, um zu erkennen, ob es eine weitere Seite gibt.
+    """
+    if cursor:
+        keys = decode_cursor(cursor, sort, len(columns))
+        bound = [literal(k, type_=c.type) for c, k in zip(columns, keys)]
+        stmt = stmt.where(tuple_(*columns) < tuple_(*bound))
+    return stmt.order_by(*[c.desc() for c in columns]).limit(limit + 1)
+
+
+def fetch_page(db, stmt, columns: Sequence[Any], sort: str, cursor: Optional[str], limit: int, width: int = 1):
+    """
+    Fuehrt stmt seitenweise aus. Die Sortierschluessel werden mitselektiert, damit der
+    naechste Cursor auch fuer berechnete Ausdruecke (z.B. Such-Relevanz) gebildet werden kann.
+    width: Anzahl der selektierten Spalten/Entities vor den Sortierschluesseln.
+    Liefert (entities, next_cursor); bei width > 1 Tupel statt Entities.
+    """
+    stmt = paginate(stmt.add_columns(*columns), columns, sort, cursor, limit)
+    rows = db.execute(stmt).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(sort, list(rows[-1][width:]))
+    if width == 1:
+        return [r[0] for r in rows], next_cursor
+    return [tuple(r[:width]) for r in rows], next_cursor
@@ -0,0 +1,107 @@
+"""
+Komprimierte, versionierte Ablage der rohen Addon-Exporte.
+
+IMPORT_PAYLOAD_STORAGE=inline (Default): wie bisher, payload als JSONB in character_imports.
+IMPORT_PAYLOAD_STORAGE=compressed: character_imports haelt nur die Summary-Spalten (payload = {}),
+    der Export liegt zlib-komprimiert (kanonisches JSON) in character_import_payloads, eine Zeile
+    pro geaendertem Import. Es bleiben die letzten IMPORT_PAYLOAD_KEEP_VERSIONS Versionen.
+
+Listen und Details kommen aus den Summary-Spalten, Dedup ueber payload_hash; den rohen Export
+holt erst load_payload bei Bedarf (inline oder neueste/angegebene Version, dekomprimiert).
+
+Aufgeraeumt wird nur in store_versions, fuer die gerade geschriebenen Imports. Das reicht, weil
+nur dort neue Versionen entstehen. Wer IMPORT_PAYLOAD_KEEP_VERSIONS verkleinert, raeumt
+Imports ohne neuen Export einmalig mit prune_versions(db) auf (ohne import_ids: alle).
+"""
+import json
+import os
+import zlib
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import select, delete, func
+
+from models import CharacterImport, CharacterImportPayload
+
+IMPORT_PAYLOAD_STORAGE = os.getenv("IMPORT_PAYLOAD_STORAGE", "inline")   # inline/compressed
+IMPORT_PAYLOAD_KEEP_VERSIONS = int(os.getenv("IMPORT_PAYLOAD_KEEP_VERSIONS", "3"))
+ENCODING = "zlib+json"   # import_wpe.decode_and_summarize(compress=True)
+
+
+def compress_enabled() -> bool:
+    return IMPORT_PAYLOAD_STORAGE == "compressed"
+
+
+def decompress_payload(encoding: str, data: bytes) -> Dict[str, Any]:
+    if encoding != ENCODING:
+        raise ValueError(f"Unknown payload encoding: {encoding}")
+    return json.loads(zlib.decompress(data))
+
+
+def store_versions(
+    db,
+    import_ids: Dict[Tuple[str, str], int],
+    blobs: Dict[Tuple[str, str], Tuple[str, bytes]],
+    keep: int = IMPORT_PAYLOAD_KEEP_VERSIONS,
+) -> None:
+    """
+    Legt fuer jeden geaenderten Import ({(name, realm): id}) eine neue Version an und raeumt
+    alte Versionen ab. blobs: {(name, realm): (payload_hash, zlib-Daten)}.
+    """
+    rows = [(import_ids[k], blobs[k]) for k in import_ids if k in blobs]
+    if not rows:
+        return
+    ids = [i for i, _ in rows]
+
+    current = dict(db.execute(
+        select(CharacterImportPayload.import_id, func.max(CharacterImportPayload.version))
+        .where(CharacterImportPayload.import_id.in_(ids))
+        .group_by(CharacterImportPayload.import_id)
+    ).all())
+
+    db.add_all([
+        CharacterImportPayload(
+            import_id=import_id,
+            version=(current.get(import_id) or 0) + 1,
+            payload_hash=digest,
+            encoding=ENCODING,
+            data=data,
+        )
+        for import_id, (digest, data) in rows
+    ])
+    db.flush()
+    prune_versions(db, ids, keep)
+
+
+def prune_versions(db, import_ids: Optional[List[int]] = None, keep: int = IMPORT_PAYLOAD_KEEP_VERSIONS) -> int:
+    """
+    Retention: loescht alle bis auf die letzten `keep` Versionen (fuer import_ids oder alle).
+    """
+    p = CharacterImportPayload.__table__
+    newer = p.alias("newer")
+    n_newer = (
+        select(func.count())
+        .where(newer.c.import_id == p.c.import_id, newer.c.version > p.c.version)
+        .scalar_subquery()
+    )
+    stmt = delete(p).where(n_newer >= keep)
+    if import_ids is not None:
+        stmt = stmt.where(p.c.import_id.in_(import_ids))
+    return db.execute(stmt).rowcount or 0
+
+
+def load_payload(db, imp: CharacterImport, version: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Lazy Zugriff auf den rohen Export: inline JSONB falls vorhanden, sonst die (neueste oder
+    angegebene) komprimierte Version.
+    """
+    if imp.payload and version is None:
+        return imp.payload
+    stmt = select(CharacterImportPayload.encoding, CharacterImportPayload.data).where(
+        CharacterImportPayload.import_id == imp.id
+    )
+    if version is not None:
+        stmt = stmt.where(CharacterImportPayload.version == version)
+    row = db.execute(stmt.order_by(CharacterImportPayload.version.desc()).limit(1)).first()
+    if row is None:
+        return imp.payload or {}
+    return decompress_payload(row.encoding, row.data)
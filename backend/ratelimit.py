@@ -0,0 +1,192 @@
+"""
+Rate Limit fuer schreibende /api/ Requests, GCRA (generic cell rate algorithm):
+pro Key wird nur ein Float gespeichert (theoretical arrival time, "tat").
+Ein Budget von N Requests/Minute erlaubt N Requests am Stueck und danach einen alle 60/N Sekunden.
+
+Backends (RATE_LIMIT_BACKEND):
+  memory   - pro Prozess, LRU begrenzt auf RATE_LIMIT_MAX_KEYS (Default)
+  postgres - gemeinsam fuer alle Worker, ein UPSERT pro Request auf rate_limits
+  redis    - gemeinsam fuer alle Worker, Lua Script auf REDIS_URL
+"""
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import text
+
+RATE_LIMIT_PER_MINUTE = int(os.getenv("RATE_LIMIT_PER_MINUTE", "30"))
+RATE_LIMIT_BACKEND = os.getenv("RATE_LIMIT_BACKEND", "memory")
+RATE_LIMIT_MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", "10000"))
+
+# Pro-Route Budgets, z.B. "/api/import/batch=10,/api/applications=20" (Prefix-Match, laengster
+# gewinnt, jede Regel ein eigener Bucket). Default: nur der Batch-Import eigens; /api/import
+# selbst bleibt wie bisher im gemeinsamen Bucket mit RATE_LIMIT_PER_MINUTE.
+RATE_LIMIT_RULES = os.getenv("RATE_LIMIT_RULES", "/api/import/batch=10")
+
+PERIOD = 60.0
+
+
+def parse_rules(raw: str) -> List[Tuple[str, int]]:
+    rules: List[Tuple[str, int]] = []
+    for part in raw.split(","):
+        if "=" not in part:
+            continue
+        prefix, limit = part.split("=", 1)
+        prefix = prefix.strip()
+        if prefix:
+            rules.append((prefix, int(limit)))
+    # laengster Prefix zuerst
+    return sorted(rules, key=lambda r: len(r[0]), reverse=True)
+
+
+class MemoryStore:
+    """
+    Prozesslokal. O(1) pro Request, Speicher begrenzt durch LRU; Keys deren tat in der
+    Vergangenheit liegt sind gleichwertig zu "nie gesehen" und werden beim Zugriff mit entfernt.
+    """
+
+    def __init__(self, max_keys: int = RATE_LIMIT_MAX_KEYS):
+        self.max_keys = max_keys
+        self._tat: "OrderedDict[str, float]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._tat)
+
+    def hit(self, key: str, interval: float, period: float) -> float:
+        now = time.monotonic()
+        with self._lock:
+            # idle Keys vom LRU-Ende abraeumen (amortisiert O(1))
+            while self._tat:
+                oldest_key, oldest_tat = next(iter(self._tat.items()))
+                if oldest_tat > now:
+                    break
+                del self._tat[oldest_key]
+
+            tat = max(self._tat.get(key, now), now)
+            new_tat = tat + interval
+            if new_tat - now > period:
+                return new_tat - now - period
+
+            self._tat[key] = new_tat
+            self._tat.move_to_end(key)
+            if len(self._tat) > self.max_keys:
+                self._tat.popitem(last=False)
+            return 0.0
+
+
+class PostgresStore:
+    """
+    Gemeinsamer Zustand in der Tabelle rate_limits (models.RateLimit), ein Statement pro erlaubtem
+    Request.
+    Wird die WHERE-Bedingung des ON CONFLICT nicht erfuellt, kommt keine Zeile zurueck -> limitiert;
+    nur dann liest WAIT_SQL die Wartezeit aus dem gespeicherten tat (die Zeile ist durch das
+    ON CONFLICT bereits gesperrt, now() ist in der Transaktion dasselbe).
+    """
+
+    HIT_SQL = text(
+        """
+        INSERT INTO rate_limits AS r (key, tat)
+        VALUES (:key, EXTRACT(EPOCH FROM now()) + :interval)
+        ON CONFLICT (key) DO UPDATE
+        SET tat = GREATEST(r.tat, EXTRACT(EPOCH FROM now())) + :interval
+        WHERE GREATEST(r.tat, EXTRACT(EPOCH FROM now())) + :interval - EXTRACT(EPOCH FROM now()) <= :period
+        RETURNING r.tat
+        """
+    )
+    WAIT_SQL = text(
+        """
+        SELECT GREATEST(tat, EXTRACT(EPOCH FROM now())) + :interval - EXTRACT(EPOCH FROM now()) - :period
+          FROM rate_limits WHERE key = :key
+        """
+    )
+    CLEANUP_SQL = text("DELETE FROM rate_limits WHERE tat < EXTRACT(EPOCH FROM now())")
+    CLEANUP_EVERY = 1000
+
+    def __init__(self, engine):
+        self.engine = engine
+        self._hits = 0
+
+    def hit(self, key: str, interval: float, period: float) -> float:
+        params = {"key": key, "interval": interval, "period": period}
+        with self.engine.begin() as conn:
+            tat = conn.execute(self.HIT_SQL, params).scalar()
+            wait = None if tat is not None else conn.execute(self.WAIT_SQL, params).scalar()
+            self._hits += 1
+            if self._hits % self.CLEANUP_EVERY == 0:
+                conn.execute(self.CLEANUP_SQL)
+        if tat is not None:
+            return 0.0
+        # EXTRACT liefert numeric; fehlt die Zeile (gerade abgeraeumt), mindestens ein Intervall
+        return float(wait) if wait is not None and wait > 0 else interval
+
+
+class RedisStore:
+    """
+    Gemeinsamer Zustand in Redis (oder allem, was das Protokoll spricht). Der Client wird
+    uebergeben, damit Tests einen lokalen Ersatz (z.B. fakeredis) einsetzen koennen.
+    Keys laufen per PEXPIRE von selbst ab, sobald sie idle sind.
+    """
+
+    SCRIPT = """
+    local now = tonumber(ARGV[1])
+    local interval = tonumber(ARGV[2])
+    local period = tonumber(ARGV[3])
+    local tat = tonumber(redis.call('GET', KEYS[1]) or now)
+    if tat < now then tat = now end
+    local new_tat = tat + interval
+    if new_tat - now > period then
+        return tostring(new_tat - now - period)
+    end
+    redis.call('SET', KEYS[1], tostring(new_tat), 'PX', math.ceil((new_tat - now) * 1000))
+    return '0'
+    """
+
+    def __init__(self, client, prefix: str = "rl:"):
+        self.client = client
+        self.prefix = prefix
+
+    def hit(self, key: str, interval: float, period: float) -> float:
+        res = self.client.eval(self.SCRIPT, 1, self.prefix + key, time.time(), interval, period)
+        if isinstance(res, bytes):
+            res = res.decode("ascii")
+        return float(res)
+
+
+class RateLimiter:
+    def __init__(self, store, default_per_minute: int = RATE_LIMIT_PER_MINUTE, rules: Optional[List[Tuple[str, int]]] = None):
+        self.store = store
+        self.default_per_minute = default_per_minute
+        self.rules = rules or []
+
+    def budget_for(self, path: str) -> Tuple[str, int]:
+        for prefix, per_minute in self.rules:
+            if path.startswith(prefix):
+                return prefix, per_minute
+        return "*", self.default_per_minute
+
+    def hit(self, path: str, client: str) -> float:
+        """
+        Liefert 0.0 wenn erlaubt, sonst die Sekunden bis zum naechsten erlaubten Request.
+        """
+        bucket, per_minute = self.budget_for(path)
+        if per_minute <= 0:
+            return PERIOD
+        return self.store.hit(f"{bucket}|{client}", PERIOD / per_minute, PERIOD)
+
+
+def build_store(backend: str = RATE_LIMIT_BACKEND):
+    if backend == "postgres":
+        from db import engine
+        return PostgresStore(engine)
+    if backend == "redis":
+        import redis  # optional, nur fuer RATE_LIMIT_BACKEND=redis
+        return RedisStore(redis.Redis.from_url(os.getenv("REDIS_URL", "redis://localhost:6379/0")))
+    return MemoryStore()
+
+
+def retry_after_header(wait: float) -> Dict[str, str]:
+    return {"Retry-After": str(max(1, math.ceil(wait)))}
@@ -0,0 +1,182 @@
+"""
+Realm-Statistiken (GET /api/stats): Angebot aus players (pro Rolle/Klasse), Nachfrage aus
+guilds.needs (pro Klasse/Rolle) und Bewerbungen pro Status, je Realm und Fraktion.
+
+Postgres: MATERIALIZED VIEW realm_stats mit Unique Index, REFRESH ... CONCURRENTLY blockiert
+          keine Leser.
+SQLite:   normale Tabelle, Refresh per DELETE + INSERT ... SELECT in einer Transaktion.
+
+Refresh alle STATS_REFRESH_SECONDS oder sobald dieser Prozess STATS_REFRESH_AFTER_WRITES
+Writes gesehen hat (Summe der cache.bump Generationen). Nach jedem Refresh wird die View in
+den Speicher geladen, der Endpunkt liest nur noch das Dict.
+
+Mehrere Worker: auf Postgres refresht nur, wer pg_try_advisory_lock(LOCK_KEY) bekommt; die
+anderen laden nur die View neu. Nach Fehlern wartet die Schleife exponentiell laenger (ab
+STATS_POLL_SECONDS, hoechstens STATS_REFRESH_SECONDS).
+"""
+import asyncio
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, Optional
+
+from sqlalchemy import Column, Integer, MetaData, String, Table, select, text
+from starlette.concurrency import run_in_threadpool
+
+from cache import generation
+from db import engine
+
+log = logging.getLogger(__name__)
+
+STATS_REFRESH_SECONDS = float(os.getenv("STATS_REFRESH_SECONDS", "300"))
+STATS_REFRESH_AFTER_WRITES = int(os.getenv("STATS_REFRESH_AFTER_WRITES", "100"))
+STATS_POLL_SECONDS = float(os.getenv("STATS_POLL_SECONDS", "5"))
+LOCK_KEY = 7_101_322  # pg_try_advisory_lock, != migrate.LOCK_KEY
+
+KINDS = ("supply_role", "supply_class", "demand_class", "demand_role", "applications")
+WRITE_TABLES = ("guilds", "players", "applications")
+
+# eigene MetaData: View bzw. Tabelle legt migrations/0006_realm_stats an, nicht create_all
+realm_stats = Table(
+    "realm_stats", MetaData(),
+    Column("realm", String(64)),
+    Column("faction", String(16)),
+    Column("kind", String(16)),
+    Column("key", String(32)),
+    Column("n", Integer),
+)
+
+_NEED_SQL = {
+    "postgresql": (
+        "guilds g CROSS JOIN jsonb_array_elements(g.needs) n",
+        "coalesce(n.value ->> 'class', n.value ->> 'class_name', '')",
+        "coalesce(n.value ->> 'role', '')",
+    ),
+    "sqlite": (
+        "guilds g, json_each(g.needs) n",
+        "coalesce(json_extract(n.value, '$.class'), json_extract(n.value, '$.class_name'), '')",
+        "coalesce(json_extract(n.value, '$.role'), '')",
+    ),
+}
+
+
+def stats_select(dialect: str) -> str:
+    needs_from, need_class, need_role = _NEED_SQL[dialect]
+    return f"""
+        SELECT realm, faction, 'supply_role' AS kind, coalesce(role, '') AS key, count(*) AS n
+          FROM players GROUP BY realm, faction, role
+        UNION ALL
+        SELECT realm, faction, 'supply_class', coalesce(class_name, ''), count(*)
+          FROM players GROUP BY realm, faction, class_name
+        UNION ALL
+        SELECT g.realm, g.faction, 'demand_class', {need_class}, count(*)
+          FROM {needs_from} GROUP BY g.realm, g.faction, {need_class}
+        UNION ALL
+        SELECT g.realm, g.faction, 'demand_role', {need_role}, count(*)
+          FROM {needs_from} GROUP BY g.realm, g.faction, {need_role}
+        UNION ALL
+        SELECT g.realm, g.faction, 'applications', coalesce(a.status, ''), count(*)
+          FROM applications a JOIN guilds g ON g.id = a.guild_id
+         GROUP BY g.realm, g.faction, a.status
+    """
+
+
+
+def refresh(bind=engine) -> bool:
+    """
+    False, wenn auf Postgres gerade ein anderer Worker refresht (Lock belegt).
+    """
+    if bind.dialect.name == "postgresql":
+        with bind.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            if not conn.execute(text("SELECT pg_try_advisory_lock(:key)"), {"key": LOCK_KEY}).scalar():
+                return False
+            try:
+                conn.execute(text("REFRESH MATERIALIZED VIEW CONCURRENTLY realm_stats"))
+            finally:
+                conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": LOCK_KEY})
+        return True
+    with bind.begin() as conn:
+        conn.execute(text("DELETE FROM realm_stats"))
+        conn.execute(text(f"INSERT INTO realm_stats (realm, faction, kind, key, n) {stats_select('sqlite')}"))
+    return True
+
+
+def load(bind=engine) -> Dict[str, Any]:
+    realms: Dict[str, Dict[str, Dict[str, Dict[str, int]]]] = {}
+    with bind.connect() as conn:
+        rows = conn.execute(select(realm_stats).order_by(realm_stats.c.n.desc(), realm_stats.c.key)).all()
+    for realm, faction, kind, key, n in rows:
+        by_kind = realms.setdefault(realm, {}).setdefault(faction, {k: {} for k in KINDS})
+        by_kind.setdefault(kind, {})[key] = n
+    return realms
+
+
+def _writes() -> int:
+    return sum(generation(*WRITE_TABLES))
+
+
+class RealmStats:
+    def __init__(self):
+        self.data: Dict[str, Any] = {}
+        self.refreshed_at: Optional[datetime] = None
+        self.refreshes = 0
+        self.failures = 0   # aufeinanderfolgende Fehler, fuer den Backoff
+        self._last_refresh = 0.0
+        self._writes_at_refresh = 0
+        self._lock = threading.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+    def due(self) -> bool:
+        writes = _writes() - self._writes_at_refresh
+        if writes >= STATS_REFRESH_AFTER_WRITES > 0:
+            return True
+        return time.monotonic() - self._last_refresh >= STATS_REFRESH_SECONDS
+
+    def refresh_now(self) -> None:
+        with self._lock:
+            writes = _writes()
+            if refresh():
+                self.refreshes += 1
+            self.data = load()
+            self.refreshed_at = datetime.now(timezone.utc)
+            self._last_refresh = time.monotonic()
+            self._writes_at_refresh = writes
+
+    def view(self, realms: Iterable[str], faction: Optional[str] = None) -> Dict[str, Any]:
+        data = {r: self.data.get(r, {}) for r in sorted(realms)}
+        if faction is not None:
+            data = {r: {faction: f.get(faction, {k: {} for k in KINDS})} for r, f in data.items()}
+        return {
+            "refreshed_at": self.refreshed_at.isoformat() if self.refreshed_at else None,
+            "realms": data,
+        }
+
+    def backoff(self) -> float:
+        if not self.failures:
+            return STATS_POLL_SECONDS
+        return min(STATS_POLL_SECONDS * 2 ** min(self.failures, 16), max(STATS_REFRESH_SECONDS, STATS_POLL_SECONDS))
+
+    async def _loop(self) -> None:
+        while True:
+            try:
+                if self.due():
+                    await run_in_threadpool(self.refresh_now)
+                self.failures = 0
+            except Exception:
+                self.failures += 1
+                log.exception("realm_stats refresh failed (%d in a row)", self.failures)
+            await asyncio.sleep(self.backoff())
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._loop())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+
+stats = RealmStats()
@@ -53,6 +53,10 @@ class GuildCreated(BaseModel):
     guild: GuildOut
     edit_token: str
 
+class GuildPage(BaseModel):
+    items: List[GuildOut]
+    next_cursor: Optional[str] = None
+
 
 class PlayerCreate(BaseModel):
     name: str = Field(min_length=2, max_length=64)
@@ -92,6 +96,44 @@ class PlayerCreated(BaseModel):
     player: PlayerOut
     edit_token: str
 
+class PlayerPage(BaseModel):
+    items: List[PlayerOut]
+    next_cursor: Optional[str] = None
+
+
+class GuildMatch(BaseModel):
+    score: float
+    guild: GuildOut
+
+class PlayerMatch(BaseModel):
+    score: float
+    player: PlayerOut
+
+class PlayerFacets(BaseModel):
+    class_name: Dict[str, int]
+    spec: Dict[str, int]
+    role: Dict[str, int]
+    language: Dict[str, int]
+    faction: Dict[str, int]
+
+class GuildFacets(BaseModel):
+    faction: Dict[str, int]
+    language: Dict[str, int]
+    need_class: Dict[str, int]
+    need_role: Dict[str, int]
+
+class RealmStatsOut(BaseModel):
+    refreshed_at: Optional[str] = None
+    # realm -> faction -> supply_role/supply_class/demand_class/demand_role/applications -> key -> count
+    realms: Dict[str, Dict[str, Dict[str, Dict[str, int]]]]
+
+class MatchPair(BaseModel):
+    guild_id: int
+    guild_name: str
+    player_id: int
+    player_name: str
+    score: float
+
 
 class ApplicationCreate(BaseModel):
     guild_id: int
@@ -106,6 +148,31 @@ class ApplicationOut(BaseModel):
     status: str
     created_at: str
 
+ApplicationStatus = Literal["pending", "accepted", "rejected"]
+
+class ApplicantSummary(BaseModel):
+    name: str
+    class_name: str
+    spec: str
+    role: str
+    skill_rating: int
+    logs_url: str
+
+class InboxItem(ApplicationOut):
+    player: ApplicantSummary
+
+class InboxPage(BaseModel):
+    items: List[InboxItem]
+    next_cursor: Optional[str] = None
+
+class ApplicationStatusUpdate(BaseModel):
+    ids: List[int] = Field(min_length=1, max_length=500)
+    status: ApplicationStatus
+
+class ApplicationStatusResult(BaseModel):
+    updated: List[int]
+    not_found: List[int]
+
 class ImportRequest(BaseModel):
     exportString: str
 
@@ -0,0 +1,247 @@
+"""
+Vektorisierte Match-Scores fuer ganze Realms (GET /api/matches).
+
+Pro Realm+Fraktion wird ein Snapshot in Spaltenform gebaut: Klasse/Spec/Rolle/Sprache als
+int-Codes, Raidtage/Verfuegbarkeit und Raids/Attunements als uint64 Bitmasken, die Needs
+flach als (guild_idx, class, spec, role, prio). Die Score-Matrix Gilden x Spieler entsteht
+in Bloecken von SCORING_CHUNK Spielern, mit denselben Regeln wie matching.score.
+
+Snapshots werden pro Prozess gecached und nur neu gebaut, wenn sich die Generation von
+guilds/players (cache.bump) geaendert hat.
+"""
+import os
+import threading
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import select
+
+from cache import generation
+from matching import MAX_PRIO, SPEC_MISMATCH, W_ATTUNE, W_DAYS, W_LANGUAGE, W_NEED, _norm, parse_needs
+from models import Guild, Player
+
+SCORING_CHUNK = int(os.getenv("SCORING_CHUNK", "8192"))
+SCORING_CACHE_SIZE = int(os.getenv("SCORING_CACHE_SIZE", "16"))
+
+_BYTE_BITS = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+def popcount(a: np.ndarray) -> np.ndarray:
+    bits = _BYTE_BITS[np.ascontiguousarray(a, dtype=np.uint64).view(np.uint8)]
+    return bits.reshape(a.shape + (8,)).sum(axis=-1, dtype=np.int64)
+
+
+class Vocab:
+    """
+    String -> int Code; fuer Bitmasken hoechstens 64 Eintraege (weitere werden ignoriert).
+    """
+
+    def __init__(self):
+        self.codes: Dict[str, int] = {}
+
+    def code(self, value) -> int:
+        v = _norm(value)
+        if not v:
+            return -1
+        if v not in self.codes:
+            self.codes[v] = len(self.codes)
+        return self.codes[v]
+
+    def mask(self, values) -> int:
+        m = 0
+        for v in values or []:
+            c = self.code(v)
+            if 0 <= c < 64:
+                m |= 1 << c
+        return m
+
+
+@dataclass
+class Snapshot:
+    gen: Tuple[int, ...]
+    guild_ids: np.ndarray
+    guild_names: List[str]
+    guild_lang: np.ndarray
+    guild_days: np.ndarray
+    guild_raids: np.ndarray
+    need_guild: np.ndarray
+    need_class: np.ndarray
+    need_spec: np.ndarray
+    need_role: np.ndarray
+    need_prio: np.ndarray
+    player_ids: np.ndarray
+    player_names: List[str]
+    player_class: np.ndarray
+    player_spec: np.ndarray
+    player_role: np.ndarray
+    player_lang: np.ndarray
+    player_avail: np.ndarray
+    player_attune: np.ndarray
+    vocab: Dict[str, Vocab]
+
+    def code(self, kind: str, value) -> int:
+        # nur nachschlagen, fuer Filter; unbekannt = -2 (matcht nichts)
+        v = _norm(value)
+        return self.vocab[kind].codes.get(v, -2) if v else -1
+
+
+def build_snapshot(db, realm: str, faction: str, gen: Tuple[int, ...] = ()) -> Snapshot:
+    vocab = {k: Vocab() for k in ("class", "spec", "role", "lang", "day", "raid")}
+
+    guilds = db.execute(
+        select(Guild.id, Guild.name, Guild.language, Guild.raid_days, Guild.progress, Guild.needs)
+        .where(Guild.realm == realm, Guild.faction == faction)
+        .order_by(Guild.id)
+    ).all()
+    players = db.execute(
+        select(
+            Player.id, Player.name, Player.class_name, Player.spec, Player.role,
+            Player.language, Player.availability, Player.attunements,
+        )
+        .where(Player.realm == realm, Player.faction == faction)
+        .order_by(Player.id)
+    ).all()
+
+    needs = [
+        (gi, vocab["class"].code(n_class), vocab["spec"].code(n_spec), vocab["role"].code(n_role), prio)
+        for gi, g in enumerate(guilds)
+        for n_class, n_spec, n_role, prio in parse_needs(g.needs)
+    ]
+    need_cols = np.array(needs, dtype=np.int32).reshape(-1, 5)
+
+    return Snapshot(
+        gen=gen,
+        guild_ids=np.array([g.id for g in guilds], dtype=np.int64),
+        guild_names=[g.name for g in guilds],
+        guild_lang=np.array([vocab["lang"].code(g.language) for g in guilds], dtype=np.int32),
+        guild_days=np.array([vocab["day"].mask(g.raid_days) for g in guilds], dtype=np.uint64),
+        guild_raids=np.array([vocab["raid"].mask((g.progress or {}).keys()) for g in guilds], dtype=np.uint64),
+        need_guild=need_cols[:, 0],
+        need_class=need_cols[:, 1],
+        need_spec=need_cols[:, 2],
+        need_role=need_cols[:, 3],
+        need_prio=need_cols[:, 4],
+        player_ids=np.array([p.id for p in players], dtype=np.int64),
+        player_names=[p.name for p in players],
+        player_class=np.array([vocab["class"].code(p.class_name) for p in players], dtype=np.int32),
+        player_spec=np.array([vocab["spec"].code(p.spec) for p in players], dtype=np.int32),
+        player_role=np.array([vocab["role"].code(p.role) for p in players], dtype=np.int32),
+        player_lang=np.array([vocab["lang"].code(p.language) for p in players], dtype=np.int32),
+        player_avail=np.array([vocab["day"].mask(p.availability) for p in players], dtype=np.uint64),
+        player_attune=np.array([vocab["raid"].mask(p.attunements) for p in players], dtype=np.uint64),
+        vocab=vocab,
+    )
+
+
+def score_matrix(snap: Snapshot, player_idx: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Scores (Gilden x Spieler) als float32, 0 = kein Match. Gleiche Regeln wie matching.score.
+    """
+    if player_idx is None:
+        player_idx = np.arange(len(snap.player_ids))
+    n_guilds = len(snap.guild_ids)
+
+    p_class = snap.player_class[player_idx]
+    p_spec = snap.player_spec[player_idx]
+    p_role = snap.player_role[player_idx]
+
+    # need: bester passender Need pro Gilde
+    need = np.zeros((n_guilds, len(player_idx)), dtype=np.float32)
+    for k in range(len(snap.need_guild)):
+        hit = (p_class == snap.need_class[k]) & (p_role == snap.need_role[k])
+        if not hit.any():
+            continue
+        s = np.where(
+            (snap.need_spec[k] >= 0) & (p_spec != snap.need_spec[k]),
+            snap.need_prio[k] / MAX_PRIO * SPEC_MISMATCH,
+            snap.need_prio[k] / MAX_PRIO,
+        ).astype(np.float32)
+        row = snap.need_guild[k]
+        need[row] = np.maximum(need[row], np.where(hit, s, 0))
+
+    # days: Anteil der Raidtage; ohne Raidtage 1.0, Spieler ohne Angabe 0.5
+    g_days = snap.guild_days[:, None]
+    p_avail = snap.player_avail[player_idx][None, :]
+    n_days = popcount(snap.guild_days)[:, None]
+    overlap = popcount(g_days & p_avail)
+    days = np.where(n_days == 0, 1.0, np.where(p_avail == 0, 0.5, overlap / np.maximum(n_days, 1)))
+
+    language = snap.guild_lang[:, None] == snap.player_lang[player_idx][None, :]
+
+    n_raids = popcount(snap.guild_raids)[:, None]
+    attuned = popcount(snap.guild_raids[:, None] & snap.player_attune[player_idx][None, :])
+    attune = np.where(n_raids == 0, 1.0, attuned / np.maximum(n_raids, 1))
+
+    total = (W_NEED * need + W_DAYS * days + W_LANGUAGE * language + W_ATTUNE * attune) * 100
+    return np.where(need > 0, np.round(total, 2), 0).astype(np.float32)
+
+
+def top_pairs(snap: Snapshot, player_idx: np.ndarray, limit: int) -> List[Tuple[int, int, float]]:
+    """
+    Beste (guild_idx, player_idx, score) ueber alle Bloecke.
+    """
+    best: List[Tuple[float, int, int]] = []
+    for start in range(0, len(player_idx), SCORING_CHUNK):
+        chunk = player_idx[start:start + SCORING_CHUNK]
+        m = score_matrix(snap, chunk)
+        flat = m.ravel()
+        k = min(limit, int((flat > 0).sum()))
+        if k == 0:
+            continue
+        top = np.argpartition(-flat, k - 1)[:k]
+        for i in top:
+            gi, pj = divmod(int(i), len(chunk))
+            best.append((float(flat[i]), gi, int(chunk[pj])))
+        best = sorted(best, key=lambda t: (-t[0], t[1], t[2]))[:limit]
+    return [(gi, pi, s) for s, gi, pi in best]
+
+
+class ScoringEngine:
+    def __init__(self, max_size: int = SCORING_CACHE_SIZE):
+        self.max_size = max_size
+        self.builds = 0
+        self._snapshots: Dict[Tuple[str, str], Snapshot] = {}
+        self._lock = threading.Lock()
+
+    def snapshot(self, db, realm: str, faction: str) -> Snapshot:
+        gen = generation("guilds", "players")
+        key = (realm, faction)
+        with self._lock:
+            snap = self._snapshots.get(key)
+        if snap is not None and snap.gen == gen:
+            return snap
+        snap = build_snapshot(db, realm, faction, gen)
+        with self._lock:
+            self.builds += 1
+            self._snapshots.pop(key, None)
+            self._snapshots[key] = snap
+            while len(self._snapshots) > self.max_size:
+                self._snapshots.pop(next(iter(self._snapshots)))
+        return snap
+
+    def best_matches(
+        self, db, realm: str, faction: str, limit: int,
+        class_name: Optional[str] = None, spec: Optional[str] = None, role: Optional[str] = None,
+    ) -> List[Dict]:
+        snap = self.snapshot(db, realm, faction)
+        mask = np.ones(len(snap.player_ids), dtype=bool)
+        if class_name:
+            mask &= snap.player_class == snap.code("class", class_name)
+        if spec:
+            mask &= snap.player_spec == snap.code("spec", spec)
+        if role:
+            mask &= snap.player_role == snap.code("role", role)
+        return [
+            {
+                "guild_id": int(snap.guild_ids[gi]),
+                "guild_name": snap.guild_names[gi],
+                "player_id": int(snap.player_ids[pi]),
+                "player_name": snap.player_names[pi],
+                "score": round(s, 2),
+            }
+            for gi, pi, s in top_pairs(snap, np.flatnonzero(mask), limit)
+        ]
+
+
+scoring_engine = ScoringEngine()
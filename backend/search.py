@@ -0,0 +1,56 @@
+from typing import Any, Tuple
+
+from sqlalchemy import select, or_, literal, literal_column, table, column
+from sqlalchemy.sql import func
+
+from models import Guild, Player
+
+# model -> (FTS5 Tabelle auf SQLite, Textspalte fuer Volltext)
+SEARCH_FIELDS = {
+    Guild: ("guilds_fts", "description"),
+    Player: ("players_fts", "note"),
+}
+
+# muss exakt dem Ausdruck der Indizes ix_*_fts in models.py entsprechen
+FTS_CONFIG = literal_column("'simple'::regconfig")
+
+# pg_trgm / FTS5 trigram brauchen mindestens 3 Zeichen
+MIN_TRIGRAM_LEN = 3
+
+
+def _fts5_phrase(q: str) -> str:
+    return '"' + q.replace('"', '""') + '"'
+
+
+def apply_search(stmt, model, q: str, dialect: str) -> Tuple[Any, Any]:
+    """
+    Filtert stmt auf Treffer fuer q und liefert (stmt, score) zurueck.
+    score ist ein Relevanz-Ausdruck (hoeher = besser) fuer sort=relevance.
+
+    Postgres: name ILIKE '%q%' (GIN gin_trgm_ops) ODER Volltext auf description/note,
+              Relevanz = greatest(similarity(name), ts_rank(...)).
+    SQLite:   FTS5 trigram Tabelle, Relevanz = -bm25().
+    """
+    fts_table, text_attr = SEARCH_FIELDS[model]
+    name_col = model.name
+    text_col = getattr(model, text_attr)
+
+    if dialect == "postgresql":
+        doc = func.to_tsvector(FTS_CONFIG, text_col)
+        tsq = func.plainto_tsquery(FTS_CONFIG, q)
+        stmt = stmt.where(or_(name_col.ilike(f"%{q}%"), doc.op("@@")(tsq)))
+        score = func.greatest(func.similarity(name_col, q), func.ts_rank(doc, tsq))
+        return stmt, score
+
+    if dialect == "sqlite" and len(q) >= MIN_TRIGRAM_LEN:
+        fts = table(fts_table, column("rowid"))
+        hits = (
+            select(fts.c.rowid.label("id"), (-func.bm25(literal_column(fts_table))).label("score"))
+            .where(literal_column(fts_table).op("MATCH")(_fts5_phrase(q)))
+            .subquery()
+        )
+        stmt = stmt.join(hits, hits.c.id == model.id)
+        return stmt, hits.c.score
+
+    stmt = stmt.where(or_(name_col.ilike(f"%{q}%"), text_col.ilike(f"%{q}%")))
+    return stmt, literal(0.0)
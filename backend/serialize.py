@@ -0,0 +1,50 @@
+"""
+Schneller Serialisierungspfad fuer die Listen-Endpunkte.
+
+Statt ORM-Entity -> GuildOut/PlayerOut -> Validierung gegen response_model -> JSON werden nur
+die Spalten der Out-Schemas selektiert und die Zeilen direkt mit orjson zu Bytes kodiert.
+Die Endpunkte behalten ihr response_model (OpenAPI bleibt gleich), geben aber eine fertige
+Response zurueck, die FastAPI nicht mehr validiert. Die Spaltenlisten kommen aus den
+Schemas, neue Felder in GuildOut/PlayerOut landen also automatisch auch hier.
+"""
+from typing import Any, Dict, List, Optional, Sequence
+
+import orjson
+from fastapi import Response
+
+from models import Guild, Player
+from schemas import GuildOut, PlayerOut
+
+
+class RowSet:
+    def __init__(self, model, schema, defaults: Dict[str, Any]):
+        self.fields: List[str] = list(schema.model_fields)
+        self.columns = [getattr(model, f) for f in self.fields]
+        # NULL in Altdaten -> gleicher Default wie guild_to_out / player_to_out
+        self.defaults = defaults
+
+    def to_dicts(self, rows: Sequence[Sequence[Any]]) -> List[Dict[str, Any]]:
+        fields, defaults = self.fields, self.defaults
+        out = []
+        for row in rows:
+            d = dict(zip(fields, row))
+            for k, factory in defaults.items():
+                if d[k] is None:
+                    d[k] = factory()
+            out.append(d)
+        return out
+
+
+GUILD_ROWS = RowSet(Guild, GuildOut, {"raid_days": list, "progress": dict, "needs": list})
+PLAYER_ROWS = RowSet(Player, PlayerOut, {"professions": list, "attunements": list, "availability": list})
+
+
+def encode_page(rowset: RowSet, rows: Sequence[Sequence[Any]], next_cursor: Optional[str]) -> bytes:
+    return orjson.dumps({"items": rowset.to_dicts(rows), "next_cursor": next_cursor})
+
+
+class JSONBytes(Response):
+    """
+    Bereits kodierter JSON-Body.
+    """
+    media_type = "application/json"
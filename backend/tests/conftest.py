@@ -0,0 +1,104 @@
+"""
+Tests gegen eine frische SQLite-Datei im Temp-Verzeichnis.
+
+    cd backend
+    pip install -r benchmarks/requirements.txt
+    pytest tests
+
+db.py und main.py lesen ihre Konfiguration beim Import, deshalb wird die Umgebung hier vor
+dem ersten Import der App gesetzt (DATABASE_URL bewusst ueberschrieben: nie gegen eine
+echte Datenbank). Die App-Fixtures teilen sich eine Datenbank pro Lauf; Tests legen ihre
+eigenen Zeilen an und pruefen nur die.
+"""
+import base64
+import itertools
+import json
+import os
+import tempfile
+import zlib
+
+import pytest
+
+os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(tempfile.mkdtemp(), "tests.db")
+os.environ["RATE_LIMIT_PER_MINUTE"] = "100000"
+os.environ["WARMUP_PATHS"] = ""
+
+_names = itertools.count(1)
+
+
+@pytest.fixture(scope="session")
+def app():
+    import migrate
+
+    migrate.upgrade()
+    import main
+
+    return main.app
+
+
+@pytest.fixture(scope="session")
+def client(app):
+    from fastapi.testclient import TestClient
+
+    with TestClient(app) as c:
+        yield c
+
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    from cache import response_cache
+
+    response_cache.clear()
+
+
+def _guild_body(**overrides) -> dict:
+    body = {"name": f"Testgilde {next(_names)}", "realm": "Spineshatter", "faction": "Horde"}
+    body.update(overrides)
+    return body
+
+
+@pytest.fixture
+def guild_body():
+    """
+    Gueltiger GuildCreate-Body mit eindeutigem Namen; Felder per Keyword ueberschreiben.
+    """
+    return _guild_body
+
+
+@pytest.fixture
+def make_guild(client):
+    """
+    Legt eine Gilde ueber die API an, liefert (id, edit_token).
+    """
+    def make(**overrides):
+        r = client.post("/api/guilds", json=_guild_body(**overrides))
+        assert r.status_code == 200, r.text
+        return r.json()["guild"]["id"], r.json()["edit_token"]
+
+    return make
+
+
+def _wpe_export(name: str, realm: str = "Spineshatter", cls: str = "PALADIN", fmt: str = "WPE2", **core) -> str:
+    payload = {
+        "meta": {"exportedAt": "2026-10-01T10:00:00Z", "locale": "enUS"},
+        "character": {
+            "core": dict({
+                "name": name, "realm": realm, "faction": "Alliance", "level": 70,
+                "class": {"file": cls}, "race": {"file": "Human"},
+            }, **core),
+            "talents": {"tabs": [{"icon": "Holy", "talents": [{"rank": 5}, {"rank": 3}]}]},
+            "professions": ["Mining"],
+        },
+    }
+    if fmt == "WPE2J":
+        return "WPE2J|" + json.dumps(payload)
+    return "WPE2|" + base64.b64encode(zlib.compress(json.dumps(payload).encode())).decode()
+
+
+@pytest.fixture
+def wpe_export():
+    """
+    Addon-Export als String (WPE2: base64 ueber zlib, oder fmt="WPE2J"); weitere Keywords
+    landen in character.core.
+    """
+    return _wpe_export
@@ -0,0 +1,125 @@
+"""
+/api/import/batch: NDJSON und JSON Array, Ergebnis pro Eintrag statt Abbruch des Batches,
+Chunks, und die Grenzen fuer Eintraege, Body und Zeilenlaenge.
+"""
+import asyncio
+import json
+
+import pytest
+from sqlalchemy import select
+
+import bulk_import
+
+NDJSON = {"content-type": "application/x-ndjson"}
+
+
+def imported_players(names) -> dict:
+    from db import SessionLocal
+    from models import Player
+
+    with SessionLocal() as db:
+        return dict(db.execute(select(Player.name, Player.class_name).where(Player.name.in_(names))).all())
+
+
+def test_ndjson(client, wpe_export):
+    body = "\n".join([
+        wpe_export("Nd-Roh"),
+        json.dumps(wpe_export("Nd-Json", fmt="WPE2J")),
+        json.dumps({"exportString": wpe_export("Nd-Objekt", cls="PRIEST")}),
+        "",
+        "kein export",
+        wpe_export("Nd-Realm", realm="Nowhere"),
+        "{kaputt",
+    ])
+    r = client.post("/api/import/batch", content=body, headers=NDJSON)
+    assert r.status_code == 200, r.text
+    out = r.json()
+    assert (out["ok"], out["failed"], out["truncated"]) == (3, 3, False)
+
+    results = out["results"]
+    assert [x["index"] for x in results] == list(range(6))   # Leerzeilen zaehlen nicht
+    assert [x["ok"] for x in results] == [True, True, True, False, False, False]
+    assert [x["name"] for x in results[:3]] == ["Nd-Roh", "Nd-Json", "Nd-Objekt"]
+    assert all(x["changed"] and x["id"] for x in results[:3])
+    assert results[3]["error"].startswith("Unsupported export prefix")
+    assert results[4]["error"].startswith("Realm not allowed")
+    assert results[5]["error"] == "Invalid JSON line"
+
+    assert imported_players(["Nd-Roh", "Nd-Json", "Nd-Objekt", "Nd-Realm"]) == {
+        "Nd-Roh": "PALADIN", "Nd-Json": "PALADIN", "Nd-Objekt": "PRIEST",
+    }
+
+
+def test_json_array(client, wpe_export):
+    r = client.post("/api/import/batch", json=[wpe_export("Arr-Eins"), {"exportString": wpe_export("Arr-Zwei")}, 5, {"x": 1}])
+    out = r.json()
+    assert (out["ok"], out["failed"]) == (2, 2)
+    assert [x.get("error") for x in out["results"]] == [None, None, "Expected an export string", "Expected an export string"]
+
+    r = client.post("/api/import/batch", json={"exportString": wpe_export("Arr-Drei")})
+    assert r.json()["results"] == [{"index": 0, "ok": False, "error": "Expected a JSON array of export strings"}]
+
+
+def test_chunks_keep_order(client, wpe_export, monkeypatch):
+    monkeypatch.setattr(bulk_import, "IMPORT_BATCH_CHUNK", 2)
+    names = [f"Chunk-{i}" for i in range(5)]
+    exports = [wpe_export(n) for n in names]
+    exports.insert(2, "kaputt")
+    out = client.post("/api/import/batch", content="\n".join(exports), headers=NDJSON).json()
+    assert [x["index"] for x in out["results"]] == list(range(6))
+    assert [x.get("name") for x in out["results"]] == names[:2] + [None] + names[2:]
+
+
+def test_duplicate_in_batch(client, wpe_export):
+    # gleicher (name, realm) zweimal in einem Chunk: ein Upsert, beide Eintraege ok, gleiche id
+    out = client.post("/api/import/batch", json=[wpe_export("Doppelt", level=60), wpe_export("Doppelt", level=70)]).json()
+    assert out["ok"] == 2
+    assert out["results"][0]["id"] == out["results"][1]["id"]
+
+
+def test_max_items(client, wpe_export, monkeypatch):
+    monkeypatch.setattr(bulk_import, "IMPORT_BATCH_MAX_ITEMS", 2)
+    out = client.post("/api/import/batch", json=[wpe_export(f"Max-{i}") for i in range(3)]).json()
+    assert out["truncated"] and out["ok"] == 2 and out["max_items"] == 2
+
+
+def test_body_too_large(client, wpe_export, monkeypatch):
+    export = wpe_export("Gross")
+    monkeypatch.setattr(bulk_import, "IMPORT_BATCH_MAX_BYTES", len(export) + 10)
+    assert client.post("/api/import/batch", json=[export, export]).status_code == 413
+
+
+class StreamedRequest:
+    """
+    Request mit NDJSON-Body in einzelnen Chunks (der TestClient sendet den Body am Stueck).
+    """
+
+    def __init__(self, chunks):
+        self.headers = {"content-type": "application/x-ndjson"}
+        self.chunks = chunks
+
+    async def stream(self):
+        for chunk in self.chunks:
+            yield chunk
+
+
+def test_streamed_ndjson_stops_at_body_limit(monkeypatch):
+    monkeypatch.setattr(bulk_import, "IMPORT_BATCH_MAX_BYTES", 20)
+
+    async def read():
+        items = []
+        with pytest.raises(bulk_import.BodyTooLarge):
+            async for item in bulk_import.iter_export_strings(StreamedRequest([b"WPE2|eins\nWPE2|z", b"wei\nWPE2|drei\n"])):
+                items.append(item)
+        return items
+
+    # was vor der Grenze vollstaendig gelesen war, kommt noch an (import_batch: truncated)
+    assert asyncio.run(read()) == [("WPE2|eins", None)]
+
+
+def test_line_too_long(client, wpe_export, monkeypatch):
+    monkeypatch.setattr(bulk_import, "IMPORT_MAX_LINE_BYTES", 64)
+    body = "\n".join([wpe_export("Lang-" + "x" * 40), "WPE2J|{}"])
+    out = client.post("/api/import/batch", content=body, headers=NDJSON).json()
+    assert out["results"][0]["error"] == bulk_import.LINE_TOO_LONG
+    assert out["results"][1]["index"] == 1
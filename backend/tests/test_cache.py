@@ -0,0 +1,43 @@
+"""
+Read-Cache: Invalidierung per Generation.
+"""
+from cache import ResponseCache, bump, generation
+
+
+def test_bump_invalidates():
+    cache = ResponseCache(max_size=10, ttl=60)
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return len(calls)
+
+    assert cache.get_or_compute("e", {"a": 1}, ("t_bump",), compute) == 1
+    assert cache.get_or_compute("e", {"a": 1}, ("t_bump",), compute) == 1
+    bump("t_bump")
+    assert cache.get_or_compute("e", {"a": 1}, ("t_bump",), compute) == 2
+
+
+def test_pinned_generation_survives_bump():
+    cache = ResponseCache(max_size=10, ttl=60)
+    gen = generation("t_pin")
+    cache.get_or_compute("e", {}, ("t_pin",), lambda: "alt", gen)
+    bump("t_pin")
+    # unter der festgehaltenen Generation derselbe Eintrag, unter der aktuellen ein neuer
+    assert cache.get_or_compute("e", {}, ("t_pin",), lambda: "neu", gen) == "alt"
+    assert cache.get_or_compute("e", {}, ("t_pin",), lambda: "neu") == "neu"
+
+
+def test_disabled_cache_always_computes():
+    cache = ResponseCache(max_size=0, ttl=60)
+    values = iter((1, 2))
+    assert cache.get_or_compute("e", {}, (), lambda: next(values)) == 1
+    assert cache.get_or_compute("e", {}, (), lambda: next(values)) == 2
+
+
+def test_write_endpoint_invalidates_list(client, make_guild):
+    url = "/api/guilds?realm=Thunderstrike&limit=100"
+    before = {g["id"] for g in client.get(url).json()["items"]}
+    gid, _ = make_guild(realm="Thunderstrike")
+    after = {g["id"] for g in client.get(url).json()["items"]}
+    assert after == before | {gid}
@@ -0,0 +1,77 @@
+"""
+Change Feed: was /api/stream ohne Token verteilt, Filter pro Client, und dass ein Client erst
+mit dem Start des Streams einen Platz belegt.
+"""
+import asyncio
+
+import pytest
+
+import changefeed
+from changefeed import broker, matches
+
+
+@pytest.fixture
+def published(monkeypatch):
+    events = []
+    monkeypatch.setattr(broker, "dispatch", events.append)
+    return events
+
+
+def test_application_event_is_public_safe(client, make_guild, published):
+    gid, _ = make_guild(realm="Thunderstrike", faction="Alliance")
+    r = client.post("/api/players", json={
+        "name": "Bewerberin", "realm": "Thunderstrike", "faction": "Alliance",
+        "class_name": "Druid", "spec": "Resto", "role": "Heal",
+    })
+    assert r.status_code == 200, r.text
+    pid = r.json()["player"]["id"]
+
+    published.clear()
+    assert client.post("/api/applications", json={"guild_id": gid, "player_id": pid}).status_code == 200
+    assert published == [{"type": "application", "realm": "Thunderstrike", "faction": "Alliance"}]
+
+
+@pytest.mark.parametrize("ev, filters, expected", [
+    ({"type": "player", "realm": "A", "faction": "Horde", "class_name": "Mage", "role": "DPS"}, {"class_name": "Mage"}, True),
+    ({"type": "player", "realm": "A", "faction": "Horde", "class_name": "Mage", "role": "DPS"}, {"role": "Heal"}, False),
+    ({"type": "guild", "realm": "A", "faction": "Horde", "need_classes": ["Mage"], "need_roles": []}, {"class_name": "Mage"}, True),
+    ({"type": "guild", "realm": "A", "faction": "Horde", "need_classes": [], "need_roles": ["Tank"]}, {"role": "Heal"}, False),
+    ({"type": "application", "realm": "A", "faction": "Horde"}, {"realm": "A", "faction": "Horde"}, True),
+    ({"type": "application", "realm": "A", "faction": "Horde"}, {"faction": "Alliance"}, False),
+    ({"type": "application", "realm": "A", "faction": "Horde"}, {"class_name": "Mage"}, False),
+])
+def test_matches(ev, filters, expected):
+    assert matches(ev, filters) is expected
+
+
+def test_full_broker_rejects_stream(client, monkeypatch):
+    monkeypatch.setattr(changefeed, "STREAM_MAX_CLIENTS", 0)
+    r = client.get("/api/stream")
+    assert r.status_code == 503
+
+
+def test_subscribes_when_stream_starts(app):
+    import main
+    from starlette.requests import Request
+
+    async def receive():
+        await asyncio.Event().wait()   # Client bleibt verbunden
+
+    async def run():
+        request = Request({"type": "http", "method": "GET", "path": "/api/stream", "headers": [], "query_string": b""}, receive)
+        response = await main.stream(request, realm=None, faction=None, class_name=None, role=None)
+        # Response gebaut, aber noch nicht gesendet: kein Platz belegt
+        assert broker.stats()["clients"] == 0
+
+        body = response.body_iterator
+        assert await body.__anext__() == "retry: 3000\n\n"
+        pending = asyncio.ensure_future(body.__anext__())
+        await asyncio.sleep(0.05)
+        assert broker.stats()["clients"] == 1
+
+        broker.dispatch(changefeed.application_event(type("G", (), {"realm": "Thunderstrike", "faction": "Horde"})))
+        assert (await asyncio.wait_for(pending, 1)).startswith("event: application\n")
+        await body.aclose()
+        assert broker.stats()["clients"] == 0
+
+    asyncio.run(run())
@@ -0,0 +1,78 @@
+"""
+Kompression: Varianten am Body-Eintrag, und der Wettlauf Write waehrend der Listen-Query
+(kein alter gzip-Body unter neuem ETag).
+"""
+import asyncio
+
+import pytest
+
+from cache import bump
+from compression import COMPRESSION_MIN_SIZE, EncodedBody, choose_encoding
+
+
+def test_choose_encoding():
+    assert choose_encoding("gzip") == "gzip"
+    assert choose_encoding("identity") is None
+    assert choose_encoding(None) is None
+    assert choose_encoding("gzip;q=0, deflate") is None
+
+
+def test_encoded_body_keeps_variants():
+    entry = EncodedBody(b"x" * COMPRESSION_MIN_SIZE, validator=("v", 1))
+    gz, headers = asyncio.run(entry.encoded("gzip"))
+    assert headers["Content-Encoding"] == "gzip"
+    assert asyncio.run(entry.encoded("gzip"))[0] is gz
+    body, headers = asyncio.run(entry.encoded("identity"))
+    assert body == entry.body and "Content-Encoding" not in headers
+
+    small = EncodedBody(b"{}")
+    assert "Content-Encoding" not in asyncio.run(small.encoded("gzip"))[1]
+
+
+@pytest.fixture
+def racing_list(monkeypatch):
+    """
+    query_guilds, die nach ihrem SELECT einmal einen Write samt bump("guilds") erlebt.
+    """
+    import main
+    from db import SessionLocal
+    from models import Guild
+
+    original = main.query_guilds
+    state = {"rename": None}
+
+    def query(s, **kw):
+        out = original(s, **kw)
+        gid, state["rename"] = state["rename"], None
+        if gid is not None:
+            with SessionLocal() as db:
+                db.get(Guild, gid).name = "Umbenannt waehrend Query"
+                db.commit()
+            bump("guilds")
+        return out
+
+    monkeypatch.setattr(main, "query_guilds", query)
+    return state
+
+
+def test_write_during_list_query(client, make_guild, racing_list):
+    ids = [make_guild(realm="Thunderstrike", description="d" * 80)[0] for _ in range(15)]
+    url = "/api/guilds?realm=Thunderstrike&limit=100"
+    gzip = {"Accept-Encoding": "gzip"}
+
+    racing_list["rename"] = ids[0]
+    r1 = client.get(url, headers=gzip)
+    assert r1.headers["content-encoding"] == "gzip"
+    assert "Umbenannt" not in r1.text
+
+    r2 = client.get(url, headers=gzip)
+    assert r2.headers["content-encoding"] == "gzip"
+    assert "Umbenannt" in r2.text
+    assert r2.headers["etag"] != r1.headers["etag"]
+
+    r3 = client.get(url, headers={"Accept-Encoding": "identity"})
+    assert "Umbenannt" in r3.text
+    assert r3.headers["etag"] == r2.headers["etag"]
+
+    assert client.get(url, headers={**gzip, "If-None-Match": r1.headers["etag"]}).status_code == 200
+    assert client.get(url, headers={**gzip, "If-None-Match": r2.headers["etag"]}).status_code == 304
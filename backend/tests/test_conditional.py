@@ -0,0 +1,55 @@
+"""
+ETag/304 fuer Detail und Liste: unveraendert -> 304, nach einem Edit (auch in derselben
+Sekunde) -> 200 mit neuem ETag.
+"""
+
+
+def test_detail_not_modified_until_edit(client, make_guild, guild_body):
+    gid, token = make_guild()
+    r = client.get(f"/api/guilds/{gid}")
+    etag = r.headers["etag"]
+    assert "last-modified" in r.headers
+
+    r = client.get(f"/api/guilds/{gid}", headers={"If-None-Match": etag})
+    assert r.status_code == 304
+    assert r.headers["etag"] == etag
+
+    r = client.put(f"/api/guilds/{gid}", json=guild_body(description="v2"), headers={"X-Edit-Token": token})
+    assert r.status_code == 200
+
+    r = client.get(f"/api/guilds/{gid}", headers={"If-None-Match": etag})
+    assert r.status_code == 200
+    assert r.headers["etag"] != etag
+    assert r.json()["description"] == "v2"
+
+
+def test_same_second_edits_change_etag(client, make_guild, guild_body):
+    gid, token = make_guild()
+    etags = set()
+    for i in range(3):
+        r = client.put(f"/api/guilds/{gid}", json=guild_body(description=f"v{i}"), headers={"X-Edit-Token": token})
+        assert r.status_code == 200
+        etags.add(client.get(f"/api/guilds/{gid}").headers["etag"])
+    assert len(etags) == 3
+
+
+def test_list_not_modified_until_edit(client, make_guild, guild_body):
+    gid, token = make_guild(realm="Thunderstrike")
+    url = "/api/guilds?realm=Thunderstrike"
+    etag = client.get(url).headers["etag"]
+    assert client.get(url, headers={"If-None-Match": etag}).status_code == 304
+
+    r = client.put(
+        f"/api/guilds/{gid}", json=guild_body(realm="Thunderstrike", description="neu"),
+        headers={"X-Edit-Token": token},
+    )
+    assert r.status_code == 200
+
+    r = client.get(url, headers={"If-None-Match": etag})
+    assert r.status_code == 200
+    assert r.headers["etag"] != etag
+    assert any(g["description"] == "neu" for g in r.json()["items"])
+
+
+def test_unknown_guild_is_404(client):
+    assert client.get("/api/guilds/999999").status_code == 404
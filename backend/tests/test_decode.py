@@ -0,0 +1,81 @@
+"""
+Dekodieren der Addon-Exporte: Limits fuer Eingabe und dekomprimierte Groesse
+(Dekompressionsbomben) und der begrenzte Decode-Pool.
+"""
+import base64
+import json
+import zlib
+
+import pytest
+
+import decode_pool
+from decode_pool import DecodeBusy, DecodePool
+from import_wpe import MAX_DECODED_BYTES, MAX_EXPORT_CHARS, _inflate, decode_export_string
+
+
+def bomb(size: int) -> str:
+    raw = json.dumps({"character": {"core": {"name": "Bombe"}}, "pad": "x" * size}).encode()
+    return "WPE2|" + base64.b64encode(zlib.compress(raw, 9)).decode()
+
+
+def test_inflate_limit():
+    data = zlib.compress(b"x" * 1000)
+    assert _inflate(data, 1000) == b"x" * 1000
+    with pytest.raises(ValueError, match="too large after decompression"):
+        _inflate(data, 999)
+    assert _inflate(b'{"plain": "json"}', 1000) is None   # kein zlib: Aufrufer nimmt die Rohdaten
+    assert _inflate(data[:-4], 1000) is None              # abgeschnittener Stream
+
+
+def test_decode_limits():
+    assert len(bomb(MAX_DECODED_BYTES)) < MAX_EXPORT_CHARS   # klein genug fuer die Eingabegrenze
+    with pytest.raises(ValueError, match="too large after decompression"):
+        decode_export_string(bomb(MAX_DECODED_BYTES))
+    with pytest.raises(ValueError, match="too long"):
+        decode_export_string("WPE2J|" + " " * MAX_EXPORT_CHARS)
+
+
+def test_import_rejects_bomb(client):
+    r = client.post("/api/import", json={"exportString": bomb(MAX_DECODED_BYTES)})
+    assert r.status_code == 400
+    assert "too large after decompression" in r.json()["detail"]
+
+    r = client.post("/api/import", json={"exportString": "WPE2|" + "A" * MAX_EXPORT_CHARS})
+    assert r.status_code == 400
+    assert "too long" in r.json()["detail"]
+
+
+def test_batch_reports_bomb_per_item(client, wpe_export):
+    out = client.post("/api/import/batch", json=[bomb(MAX_DECODED_BYTES), wpe_export("Nach-Bombe")]).json()
+    assert [x["ok"] for x in out["results"]] == [False, True]
+    assert "too large after decompression" in out["results"][0]["error"]
+
+
+@pytest.fixture
+def busy_pool(monkeypatch):
+    monkeypatch.setattr(decode_pool, "DECODE_QUEUE_TIMEOUT", 0.01)
+    pool = DecodePool(kind="thread", workers=1, max_pending=1)
+    yield pool
+    pool.shutdown()
+
+
+def test_pool_rejects_when_full(busy_pool, wpe_export):
+    busy_pool._acquire()   # einziger Platz belegt
+    with pytest.raises(DecodeBusy):
+        busy_pool.submit(wpe_export("Wartend"))
+    assert busy_pool.stats()["rejected"] == 1
+    assert busy_pool.stats()["in_flight"] == 1
+
+    busy_pool._release()
+    payload, summary, blob = busy_pool.decode(wpe_export("Frei"))
+    assert summary["name"] == "Frei" and blob is None
+    assert busy_pool.stats()["in_flight"] == 0
+
+
+def test_import_busy_is_503(client, busy_pool, monkeypatch, wpe_export):
+    import main
+
+    busy_pool._acquire()
+    monkeypatch.setattr(main, "decode_pool", busy_pool)
+    r = client.post("/api/import", json={"exportString": wpe_export("Abgewiesen")})
+    assert r.status_code == 503
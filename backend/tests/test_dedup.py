@@ -0,0 +1,81 @@
+"""
+Dedup der Imports ueber payload_hash: unveraenderte Exporte schreiben weder character_imports
+noch players neu, und die Antwort sagt, ob sich etwas geaendert hat.
+"""
+from sqlalchemy import select
+
+from import_wpe import payload_hash
+
+
+def do_import(client, export: str) -> dict:
+    r = client.post("/api/import", json={"exportString": export})
+    assert r.status_code == 200, r.text
+    return r.json()
+
+
+def timestamps(name: str):
+    from db import SessionLocal
+    from models import CharacterImport, Player
+
+    with SessionLocal() as db:
+        imp = db.execute(select(CharacterImport.updated_at).where(CharacterImport.name == name)).scalar_one()
+        player = db.execute(select(Player.updated_at).where(Player.name == name)).scalar_one_or_none()
+    return imp, player
+
+
+def test_hash_is_canonical():
+    assert payload_hash({"a": 1, "b": [1, {"c": "ü"}]}) == payload_hash({"b": [1, {"c": "ü"}], "a": 1})
+    assert payload_hash({"a": 1}) != payload_hash({"a": 2})
+
+
+def test_unchanged_export_writes_nothing(client, wpe_export):
+    first = do_import(client, wpe_export("Wiederholt"))
+    assert first["changed"]
+    before = timestamps("Wiederholt")
+
+    again = do_import(client, wpe_export("Wiederholt"))
+    same_json = do_import(client, wpe_export("Wiederholt", fmt="WPE2J"))   # gleicher Inhalt, anderes Format
+    assert (again["changed"], again["id"]) == (False, first["id"])
+    assert (same_json["changed"], same_json["id"]) == (False, first["id"])
+    assert timestamps("Wiederholt") == before
+
+
+def test_changed_export_updates_both(client, wpe_export):
+    from db import SessionLocal
+    from models import Player
+
+    first = do_import(client, wpe_export("Umgeskillt", level=69))
+    before = timestamps("Umgeskillt")
+
+    changed = do_import(client, wpe_export("Umgeskillt", level=70, cls="PRIEST"))
+    assert (changed["changed"], changed["id"]) == (True, first["id"])
+    after = timestamps("Umgeskillt")
+    assert after[0] > before[0] and after[1] > before[1]
+    with SessionLocal() as db:
+        assert db.execute(select(Player.class_name).where(Player.name == "Umgeskillt")).scalar_one() == "PRIEST"
+
+
+def test_unchanged_export_recreates_missing_player(client, wpe_export):
+    from db import SessionLocal
+    from models import Player
+
+    do_import(client, wpe_export("Geloescht"))
+    with SessionLocal() as db:
+        db.delete(db.execute(select(Player).where(Player.name == "Geloescht")).scalar_one())
+        db.commit()
+
+    assert do_import(client, wpe_export("Geloescht"))["changed"] is False
+    assert timestamps("Geloescht")[1] is not None
+
+
+def test_guid_follows_rename(client, wpe_export):
+    first = do_import(client, wpe_export("Altname", guid="Player-4711-0001"))
+    renamed = do_import(client, wpe_export("Neuname", guid="Player-4711-0001"))
+    assert (renamed["changed"], renamed["id"]) == (True, first["id"])
+
+
+def test_batch_reports_changed(client, wpe_export):
+    do_import(client, wpe_export("Batch-Alt"))
+    out = client.post("/api/import/batch", json=[wpe_export("Batch-Alt"), wpe_export("Batch-Neu")]).json()
+    assert [(x["name"], x["changed"]) for x in out["results"]] == [("Batch-Alt", False), ("Batch-Neu", True)]
+    assert all(x["id"] for x in out["results"])
@@ -0,0 +1,59 @@
+"""
+Facetten-Zaehler: Anzahl pro Wert fuer die aktuellen Filter, auf SQLite per UNION ALL.
+Die Tests grenzen ihre Zeilen ueber eine eigene language ab.
+"""
+
+
+def add_player(client, name: str, class_name: str, spec: str, role: str, faction: str = "Horde"):
+    r = client.post("/api/players", json={
+        "name": name, "realm": "Spineshatter", "faction": faction, "language": "fac-p",
+        "class_name": class_name, "spec": spec, "role": role,
+    })
+    assert r.status_code == 200, r.text
+
+
+def test_player_facets(client):
+    add_player(client, "Facette 1", "Priest", "Holy", "Heal")
+    add_player(client, "Facette 2", "Priest", "Shadow", "DPS")
+    add_player(client, "Facette 3", "Warrior", "Prot", "Tank", faction="Alliance")
+
+    facets = client.get("/api/facets/players?language=fac-p").json()
+    assert facets == {
+        "class_name": {"Priest": 2, "Warrior": 1},
+        "spec": {"Holy": 1, "Prot": 1, "Shadow": 1},
+        "role": {"DPS": 1, "Heal": 1, "Tank": 1},
+        "language": {"fac-p": 3},
+        "faction": {"Horde": 2, "Alliance": 1},
+    }
+
+    # gleiche Filter wie die Liste
+    facets = client.get("/api/facets/players?language=fac-p&class_name=Priest").json()
+    assert facets["faction"] == {"Horde": 2} and facets["spec"] == {"Holy": 1, "Shadow": 1}
+    listed = client.get("/api/players?language=fac-p&class_name=Priest&role=Heal").json()["items"]
+    assert len(listed) == client.get("/api/facets/players?language=fac-p&class_name=Priest").json()["role"]["Heal"]
+
+    # ein neuer Spieler invalidiert den gecachten Eintrag
+    add_player(client, "Facette 4", "Warrior", "Arms", "DPS")
+    assert client.get("/api/facets/players?language=fac-p").json()["class_name"] == {"Warrior": 2, "Priest": 2}
+
+
+def test_guild_facets(client, make_guild):
+    make_guild(language="fac-g", needs=[{"class": "Mage", "role": "DPS"}, {"class": "Mage", "spec": "Frost", "role": "DPS"}])
+    make_guild(language="fac-g", faction="Alliance", needs=[{"class": "Mage", "role": "DPS"}, {"class": "Priest", "role": "Heal"}])
+    make_guild(language="fac-g")
+
+    facets = client.get("/api/facets/guilds?language=fac-g").json()
+    assert facets["faction"] == {"Horde": 2, "Alliance": 1}   # Gilden ohne Needs zaehlen mit
+    assert facets["language"] == {"fac-g": 3}
+    assert facets["need_class"] == {"Mage": 2, "Priest": 1}    # pro Gilde, nicht pro Need
+    assert facets["need_role"] == {"DPS": 2, "Heal": 1}
+
+    facets = client.get("/api/facets/guilds?language=fac-g&need_role=Heal").json()
+    assert facets["faction"] == {"Alliance": 1}
+    assert facets["need_class"] == {"Mage": 1, "Priest": 1}
+
+
+def test_empty_facets(client):
+    assert client.get("/api/facets/players?language=fac-leer").json() == {
+        "class_name": {}, "spec": {}, "role": {}, "language": {}, "faction": {},
+    }
@@ -0,0 +1,91 @@
+"""
+Bewerbungs-Inbox: Paging neueste zuerst mit Kurzprofil, Status-Filter, und der Bulk-PATCH
+fuer den Status (updated / not_found).
+"""
+import pytest
+
+
+@pytest.fixture
+def inbox(client, make_guild):
+    """
+    Gilde mit 5 Bewerbungen; liefert (guild_id, token, [application ids, aelteste zuerst]).
+    """
+    gid, token = make_guild(realm="Thunderstrike")
+    apps = []
+    for i in range(5):
+        r = client.post("/api/players", json={
+            "name": f"Bewerber {gid}-{i}", "realm": "Thunderstrike", "faction": "Horde",
+            "class_name": "Shaman", "spec": "Resto", "role": "Heal", "skill_rating": 4,
+        })
+        assert r.status_code == 200, r.text
+        r = client.post("/api/applications", json={"guild_id": gid, "player_id": r.json()["player"]["id"], "message": f"Hallo {i}"})
+        assert r.status_code == 200, r.text
+        apps.append(r.json()["id"])
+    return gid, token, apps
+
+
+def read_all(client, gid: int, token: str, **params) -> list:
+    items, cursor = [], None
+    while True:
+        query = dict(params, limit=2, **({"cursor": cursor} if cursor else {}))
+        r = client.get(f"/api/guilds/{gid}/applications", params=query, headers={"X-Edit-Token": token})
+        assert r.status_code == 200, r.text
+        items += r.json()["items"]
+        cursor = r.json()["next_cursor"]
+        if cursor is None:
+            return items
+
+
+def test_paging_newest_first_with_player(client, inbox):
+    gid, token, apps = inbox
+    items = read_all(client, gid, token)
+    assert [a["id"] for a in items] == apps[::-1]
+    first = items[-1]
+    assert first["message"] == "Hallo 0" and first["status"] == "pending"
+    assert first["player"]["name"] == f"Bewerber {gid}-0"
+    assert first["player"]["class_name"] == "Shaman" and first["player"]["skill_rating"] == 4
+
+
+def test_requires_token(client, inbox):
+    gid, _, _ = inbox
+    assert client.get(f"/api/guilds/{gid}/applications").status_code == 401
+    assert client.get(f"/api/guilds/{gid}/applications", headers={"X-Edit-Token": "falsch"}).status_code == 401
+    assert client.patch(f"/api/guilds/{gid}/applications", json={"ids": [1], "status": "accepted"}).status_code == 401
+    assert client.get("/api/guilds/999999/applications", headers={"X-Edit-Token": "x"}).status_code == 404
+
+
+def test_status_update_and_filter(client, inbox, make_guild):
+    gid, token, apps = inbox
+    other_gid, other_token = make_guild(realm="Thunderstrike")
+    r = client.post("/api/players", json={
+        "name": f"Fremd {other_gid}", "realm": "Thunderstrike", "faction": "Horde",
+        "class_name": "Rogue", "spec": "Combat", "role": "DPS",
+    })
+    foreign = client.post("/api/applications", json={"guild_id": other_gid, "player_id": r.json()["player"]["id"]}).json()["id"]
+
+    r = client.patch(
+        f"/api/guilds/{gid}/applications", headers={"X-Edit-Token": token},
+        json={"ids": [apps[3], apps[1], apps[1], foreign, 999999], "status": "accepted"},
+    )
+    assert r.status_code == 200, r.text
+    assert r.json() == {"updated": [apps[1], apps[3]], "not_found": sorted([foreign, 999999])}
+
+    assert [a["id"] for a in read_all(client, gid, token, status="accepted")] == [apps[3], apps[1]]
+    assert [a["id"] for a in read_all(client, gid, token, status="pending")] == [apps[4], apps[2], apps[0]]
+    # fremde Bewerbung unveraendert
+    assert [a["status"] for a in read_all(client, other_gid, other_token)] == ["pending"]
+
+
+def test_cursor_bound_to_status(client, inbox):
+    gid, token, _ = inbox
+    headers = {"X-Edit-Token": token}
+    cursor = client.get(f"/api/guilds/{gid}/applications?status=pending&limit=2", headers=headers).json()["next_cursor"]
+    assert cursor
+    assert client.get(f"/api/guilds/{gid}/applications?status=accepted&cursor={cursor}", headers=headers).status_code == 400
+    assert client.get(f"/api/guilds/{gid}/applications?cursor={cursor}", headers=headers).status_code == 400
+
+
+@pytest.mark.parametrize("body", [{"ids": [], "status": "accepted"}, {"ids": [1], "status": "archived"}])
+def test_patch_validation(client, inbox, body):
+    gid, token, _ = inbox
+    assert client.patch(f"/api/guilds/{gid}/applications", headers={"X-Edit-Token": token}, json=body).status_code == 422
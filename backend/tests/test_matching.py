@@ -0,0 +1,84 @@
+"""
+Match-Index: Scores beim Schreiben, Top-K Endpunkte, und Needs ohne Schema (needs ist
+List[dict]): unbrauchbare prio/class duerfen keinen Write mit 500 beenden.
+"""
+import pytest
+
+import matching
+
+
+def player_body(name: str, **overrides) -> dict:
+    body = {
+        "name": name, "realm": "Thunderstrike", "faction": "Alliance",
+        "class_name": "Priest", "spec": "Holy", "role": "Heal",
+    }
+    body.update(overrides)
+    return body
+
+
+@pytest.mark.parametrize("need, expected", [
+    ({"class": "Priest", "role": "Heal", "prio": 5}, 1.0),
+    ({"class": " priest ", "role": "HEAL", "prio": "4"}, 0.8),
+    ({"class": "Priest", "role": "Heal", "prio": "high"}, 0.6),   # wie fehlende prio (3)
+    ({"class": "Priest", "role": "Heal", "prio": 9}, 1.0),
+    ({"class": "Priest", "role": "Heal", "spec": "Shadow", "prio": 5}, 0.7),
+    ({"class_name": "Priest", "role": "Heal"}, 0.6),
+    ({"class": 5, "role": "Heal"}, 0.0),
+    ({"class": ["Priest"], "role": "Heal"}, 0.0),
+    ({"class": "Priest", "role": None}, 0.0),
+])
+def test_need_score(need, expected):
+    assert matching.need_score([need], "Priest", "Holy", "Heal") == pytest.approx(expected)
+
+
+def test_need_score_skips_non_objects():
+    assert matching.need_score(["Priest", 3, None, {"class": "Priest", "role": "Heal"}], "Priest", "Holy", "Heal") == 0.6
+
+
+def test_malformed_needs_do_not_break_writes(client, make_guild):
+    needs = [
+        {"class": "Priest", "role": "Heal", "prio": "high"},
+        {"class": 5, "role": "Tank"},
+        {"class": "Warrior", "role": 7, "prio": None},
+    ]
+    gid, token = make_guild(realm="Thunderstrike", faction="Alliance", needs=needs)
+
+    r = client.post("/api/players", json=player_body("Heilerin"))
+    assert r.status_code == 200, r.text
+    pid = r.json()["player"]["id"]
+    assert client.post("/api/players", json=player_body("Krieger", class_name="Warrior", spec="Prot", role="Tank")).status_code == 200
+
+    matches = client.get(f"/api/guilds/{gid}/matches").json()
+    assert [m["player"]["id"] for m in matches] == [pid]
+
+    r = client.put(
+        f"/api/guilds/{gid}", headers={"X-Edit-Token": token},
+        json={"name": "Kaputte Needs", "realm": "Thunderstrike", "faction": "Alliance", "needs": needs + [{"class": 1}]},
+    )
+    assert r.status_code == 200, r.text
+    from realm_stats import stats
+
+    stats.refresh_now()
+    for path in ("/api/stats", "/api/facets/guilds?realm=Thunderstrike", "/api/matches?realm=Thunderstrike&faction=Alliance"):
+        assert client.get(path).status_code == 200, path
+
+
+def test_refresh_guild_scores_only_matching_players(client, make_guild):
+    from db import SessionLocal
+    from models import Guild, MatchScore
+    from sqlalchemy import select
+
+    gid, _ = make_guild(realm="Thunderstrike", faction="Horde", needs=[{"class": "mage", "role": "dps", "prio": 5}])
+    ids = {}
+    for name, cls, spec, role in (
+        ("Magier", "Mage", "Frost", "DPS"), ("Heilmagier", "Mage", "Arcane", "Heal"), ("Schurke", "Rogue", "Combat", "DPS"),
+    ):
+        r = client.post("/api/players", json=player_body(name, faction="Horde", class_name=cls, spec=spec, role=role))
+        assert r.status_code == 200, r.text
+        ids[name] = r.json()["player"]["id"]
+
+    with SessionLocal() as db:
+        matching.refresh_guild(db, db.get(Guild, gid))
+        scored = db.execute(select(MatchScore.player_id, MatchScore.score).where(MatchScore.guild_id == gid)).all()
+        db.rollback()
+    assert [pid for pid, _ in scored] == [ids["Magier"]]
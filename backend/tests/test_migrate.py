@@ -0,0 +1,60 @@
+"""
+Migrations-Runner gegen eine eigene, leere SQLite-Datei (nicht die App-Datenbank).
+"""
+import re
+
+import pytest
+from sqlalchemy import create_engine, inspect, text
+
+import migrate
+
+
+@pytest.fixture
+def bind(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'migrate.db'}")
+    yield engine
+    engine.dispose()
+
+
+def test_versions_are_contiguous():
+    versions = [mig.version for mig in migrate.discover()]
+    assert versions == list(range(1, len(versions) + 1))
+
+
+def test_upgrade_in_steps_and_idempotent(bind):
+    done = migrate.upgrade(bind, target=3)
+    assert [mig.version for mig in done] == [1, 2, 3]
+    assert migrate.applied_versions(bind) == {1, 2, 3}
+    assert "character_import_payloads" in inspect(bind).get_table_names()
+
+    rest = migrate.upgrade(bind)
+    assert [mig.version for mig in rest] == list(range(4, len(migrate.discover()) + 1))
+    assert migrate.pending(bind) == []
+    assert migrate.upgrade(bind) == []
+
+
+def test_schema_matches_models(bind):
+    from models import Base
+
+    migrate.upgrade(bind)
+    insp = inspect(bind)
+    for table in Base.metadata.sorted_tables:
+        columns = {c["name"]: c for c in insp.get_columns(table.name)}
+        assert set(columns) == set(table.columns.keys()), table.name
+        for column in table.columns:
+            assert columns[column.name]["nullable"] == column.nullable, f"{table.name}.{column.name}"
+
+
+def test_backfill_on_empty_database(bind):
+    migrate.upgrade(bind)
+    migrate.backfill(bind)
+
+
+def test_sqlite_server_default_has_microseconds(bind):
+    migrate.upgrade(bind)
+    with bind.begin() as conn:
+        conn.execute(text("INSERT INTO character_imports (name, realm, payload) VALUES ('a', 'b', '{}')"))
+        created, updated = conn.execute(text("SELECT created_at, updated_at FROM character_imports")).one()
+    # Format von models.TIMESTAMPTZ, sonst vergleichen Keyset-Cursor und ETags falsch
+    for value in (created, updated):
+        assert re.fullmatch(r"\d{4}-\d\d-\d\d \d\d:\d\d:\d\d\.\d{6}", value), value
@@ -0,0 +1,54 @@
+"""
+need_class/need_role in SQL (JSONB-Containment bzw. JSON1 auf SQLite), auch fuer Altdaten
+mit "class_name" statt "class" in needs.
+"""
+from sqlalchemy import update
+
+
+def listed(client, **params) -> set:
+    query = "&".join(f"{k}={v}" for k, v in dict(language="needs-t", limit=100, **params).items())
+    r = client.get(f"/api/guilds?{query}")
+    assert r.status_code == 200, r.text
+    return {g["id"] for g in r.json()["items"]}
+
+
+def test_need_filters(client, make_guild):
+    healer, _ = make_guild(language="needs-t", needs=[{"class": "Druid", "role": "Heal", "prio": 5}])
+    tank, _ = make_guild(language="needs-t", needs=[{"class": "Warrior", "role": "Tank"}, {"class": "Druid", "role": "Tank"}])
+    # per API mit class_name angelegt: wird beim Schreiben auf "class" normalisiert
+    renamed, _ = make_guild(language="needs-t", needs=[{"class_name": "Mage", "role": "DPS"}])
+    make_guild(language="needs-t")
+
+    assert client.get(f"/api/guilds/{renamed}").json()["needs"] == [{"class": "Mage", "role": "DPS"}]
+
+    assert listed(client, need_class="Druid") == {healer, tank}
+    assert listed(client, need_role="Tank") == {tank}
+    assert listed(client, need_class="Druid", need_role="Heal") == {healer}
+    assert listed(client, need_class="Mage") == {renamed}
+    assert listed(client, need_class="Paladin") == set()
+
+
+def test_legacy_class_name_key(client, make_guild):
+    from db import SessionLocal
+    from models import Guild
+
+    gid, _ = make_guild(language="needs-t")
+    with SessionLocal() as db:
+        # Zeile aus der Zeit vor normalize_needs
+        db.execute(update(Guild).where(Guild.id == gid).values(needs=[{"class_name": "Hunter", "role": "DPS"}]))
+        db.commit()
+
+    assert listed(client, need_class="Hunter") == {gid}
+    facets = client.get("/api/facets/guilds?language=needs-t&need_class=Hunter").json()
+    assert facets["need_class"] == {"Hunter": 1}
+
+
+def test_filter_with_pagination(client, make_guild):
+    ids = [make_guild(language="needs-p", needs=[{"class": "Rogue", "role": "DPS"}])[0] for _ in range(3)]
+    for _ in range(3):
+        make_guild(language="needs-p", needs=[{"class": "Priest", "role": "Heal"}])
+
+    first = client.get("/api/guilds?language=needs-p&need_class=Rogue&limit=2").json()
+    rest = client.get(f"/api/guilds?language=needs-p&need_class=Rogue&limit=2&cursor={first['next_cursor']}").json()
+    assert [g["id"] for g in first["items"] + rest["items"]] == ids[::-1]
+    assert rest["next_cursor"] is None
@@ -0,0 +1,81 @@
+"""
+Keyset-Pagination der Listen: jede Zeile genau einmal, auch wenn zwischen zwei Seiten
+geschrieben wird, und ungueltige Cursor als 400. Die Tests grenzen ihre Zeilen ueber
+eine eigene language ab.
+"""
+import pytest
+
+import pagination
+
+
+def player_body(name: str, language: str, **overrides) -> dict:
+    body = {
+        "name": name, "realm": "Spineshatter", "faction": "Horde", "language": language,
+        "class_name": "Warrior", "spec": "Arms", "role": "DPS",
+    }
+    body.update(overrides)
+    return body
+
+
+def pages(client, url: str):
+    cursor, out = None, []
+    while True:
+        r = client.get(url + (f"&cursor={cursor}" if cursor else ""))
+        assert r.status_code == 200, r.text
+        page = r.json()
+        out.append([item["id"] for item in page["items"]])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return out
+
+
+def test_guild_pages_without_duplicates_or_gaps(client, make_guild):
+    ids = [make_guild(language="pag-g")[0] for _ in range(7)]
+    got = pages(client, "/api/guilds?language=pag-g&limit=3")
+    assert [len(p) for p in got] == [3, 3, 1]
+    assert sum(got, []) == ids[::-1]   # neueste zuerst
+
+
+def test_write_between_pages(client):
+    ids = []
+    for i in range(5):
+        r = client.post("/api/players", json=player_body(f"Seite {i}", "pag-w"))
+        assert r.status_code == 200, r.text
+        ids.append(r.json()["player"]["id"])
+
+    first = client.get("/api/players?language=pag-w&limit=2").json()
+    assert [p["id"] for p in first["items"]] == ids[:-3:-1]
+
+    # neue Zeile vor dem Cursor: weder doppelt noch verschiebt sie die folgenden Seiten
+    assert client.post("/api/players", json=player_body("Nachzuegler", "pag-w")).status_code == 200
+    rest = client.get(f"/api/players?language=pag-w&limit=10&cursor={first['next_cursor']}").json()
+    assert [p["id"] for p in rest["items"]] == ids[-3::-1]
+    assert rest["next_cursor"] is None
+
+
+def test_skill_sort(client):
+    ids = {}
+    for skill in (2, 5, 3, 5, 1):
+        r = client.post("/api/players", json=player_body(f"Skill {len(ids)}", "pag-s", skill_rating=skill))
+        ids[r.json()["player"]["id"]] = skill
+    got = sum(pages(client, "/api/players?language=pag-s&sort=skill&limit=2"), [])
+    assert sorted(got) == sorted(ids)
+    assert [ids[i] for i in got] == [5, 5, 3, 2, 1]
+
+
+def test_page_size_is_capped(client, make_guild, monkeypatch):
+    monkeypatch.setattr(pagination, "MAX_PAGE_SIZE", 2)
+    for _ in range(3):
+        make_guild(language="pag-max")
+    page = client.get("/api/guilds?language=pag-max&limit=1000").json()
+    assert len(page["items"]) == 2 and page["next_cursor"]
+
+
+@pytest.mark.parametrize("cursor", [
+    "nicht-base64!",
+    pagination.encode_cursor("relevance", [1.0, 1]),     # andere Sortierung
+    pagination.encode_cursor("recent", [1]),             # falsche Anzahl Schluessel
+])
+def test_invalid_cursor(client, cursor):
+    assert client.get(f"/api/guilds?cursor={cursor}").status_code == 400
+    assert client.get(f"/api/players?cursor={cursor}").status_code == 400
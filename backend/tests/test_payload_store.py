@@ -0,0 +1,57 @@
+"""
+Komprimierte Ablage der Exporte (IMPORT_PAYLOAD_STORAGE=compressed): Versionen, Retention
+und der Lazy-Zugriff load_payload.
+"""
+import pytest
+from sqlalchemy import select
+
+import payload_store
+from payload_store import decompress_payload, load_payload
+
+
+@pytest.fixture
+def compressed(monkeypatch):
+    monkeypatch.setattr(payload_store, "IMPORT_PAYLOAD_STORAGE", "compressed")
+
+
+def _import(client, export: str) -> int:
+    r = client.post("/api/import", json={"exportString": export})
+    assert r.status_code == 200, r.text
+    return r.json()["id"]
+
+
+def test_inline_payload(client, wpe_export):
+    from db import SessionLocal
+    from models import CharacterImport
+
+    iid = _import(client, wpe_export("Inlinia", level=60))
+    with SessionLocal() as db:
+        imp = db.get(CharacterImport, iid)
+        assert load_payload(db, imp)["character"]["core"]["level"] == 60
+
+
+def test_compressed_versions(client, wpe_export, compressed):
+    from db import SessionLocal
+    from models import CharacterImport, CharacterImportPayload
+
+    for level in (60, 61, 62, 63):
+        iid = _import(client, wpe_export("Packerin", level=level))
+    _import(client, wpe_export("Packerin", level=63))   # unveraendert: keine neue Version
+
+    with SessionLocal() as db:
+        imp = db.get(CharacterImport, iid)
+        assert imp.payload == {}
+        versions = db.scalars(
+            select(CharacterImportPayload.version).where(CharacterImportPayload.import_id == iid)
+            .order_by(CharacterImportPayload.version)
+        ).all()
+        assert versions == [2, 3, 4]   # IMPORT_PAYLOAD_KEEP_VERSIONS
+
+        assert load_payload(db, imp)["character"]["core"]["level"] == 63
+        assert load_payload(db, imp, version=2)["character"]["core"]["level"] == 61
+        assert load_payload(db, imp, version=1) == {}   # weggeraeumt
+
+
+def test_unknown_encoding():
+    with pytest.raises(ValueError):
+        decompress_payload("zstd+json", b"")
@@ -0,0 +1,181 @@
+"""
+GCRA Rate Limit mit injiziertem Store: MemoryStore gegen eine feste Uhr, RedisStore gegen
+fakeredis (Lua-Script laeuft echt), PostgresStore gegen einen Ersatz fuer die Engine und,
+mit TEST_POSTGRES_URL, gegen ein echtes Postgres. Dazu die Middleware mit einem eigenen
+RateLimiter statt des globalen.
+"""
+import os
+from contextlib import contextmanager
+from decimal import Decimal
+from types import SimpleNamespace
+
+import pytest
+
+import ratelimit
+from ratelimit import PERIOD, MemoryStore, PostgresStore, RateLimiter, RedisStore, parse_rules, retry_after_header
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = SimpleNamespace(t=1000.0)
+    monkeypatch.setattr(ratelimit, "time", SimpleNamespace(monotonic=lambda: now.t, time=lambda: now.t))
+    return now
+
+
+def test_burst_then_one_per_interval(clock):
+    limiter = RateLimiter(MemoryStore(), 3)
+    assert [limiter.hit("/api/guilds", "a") for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert limiter.hit("/api/guilds", "a") == pytest.approx(20.0)
+
+    clock.t += 19.9
+    assert limiter.hit("/api/guilds", "a") > 0
+    clock.t += 0.1
+    assert limiter.hit("/api/guilds", "a") == 0.0
+    assert limiter.hit("/api/guilds", "a") > 0
+
+
+def test_clients_and_routes_have_separate_buckets(clock):
+    limiter = RateLimiter(MemoryStore(), 1, parse_rules("/api/import=1,/api/import/batch=2"))
+    assert limiter.budget_for("/api/import/batch") == ("/api/import/batch", 2)
+    assert limiter.budget_for("/api/import") == ("/api/import", 1)
+    assert limiter.budget_for("/api/guilds") == ("*", 1)
+
+    assert limiter.hit("/api/import", "a") == 0.0
+    assert limiter.hit("/api/import", "a") > 0
+    assert limiter.hit("/api/import", "b") == 0.0
+    assert limiter.hit("/api/guilds", "a") == 0.0
+    assert limiter.hit("/api/import/batch", "a") == 0.0
+
+
+def test_default_rules_keep_single_import_in_shared_bucket():
+    limiter = RateLimiter(MemoryStore(), 30, parse_rules(ratelimit.RATE_LIMIT_RULES))
+    assert limiter.budget_for("/api/import") == ("*", 30)
+    assert limiter.budget_for("/api/import/batch")[0] == "/api/import/batch"
+
+
+def test_zero_budget_blocks(clock):
+    assert RateLimiter(MemoryStore(), 0).hit("/api/guilds", "a") == PERIOD
+
+
+def test_memory_store_is_bounded(clock):
+    store = MemoryStore(max_keys=2)
+    for key in ("a", "b", "c"):
+        store.hit(key, 1.0, PERIOD)
+    assert len(store) == 2
+
+    # idle Keys (tat in der Vergangenheit) fallen beim naechsten Zugriff raus
+    clock.t += 2
+    store.hit("d", 1.0, PERIOD)
+    assert len(store) == 1
+
+
+def test_redis_store(clock):
+    fakeredis = pytest.importorskip("fakeredis")
+    client = fakeredis.FakeRedis()
+    limiter = RateLimiter(RedisStore(client), 3)
+
+    assert [limiter.hit("/api/guilds", "a") for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert limiter.hit("/api/guilds", "a") == pytest.approx(20.0)
+    clock.t += 5
+    assert limiter.hit("/api/guilds", "a") == pytest.approx(15.0)
+    clock.t += 15
+    assert limiter.hit("/api/guilds", "a") == 0.0
+    assert limiter.hit("/api/guilds", "b") == 0.0
+
+    # ein Key pro Bucket und Client, laeuft idle von selbst ab
+    assert sorted(client.keys()) == [b"rl:*|a", b"rl:*|b"]
+    assert 0 < client.pttl("rl:*|a") <= PERIOD * 1000
+
+
+class FakePostgres:
+    """
+    Ersatz fuer die Engine von PostgresStore: fuehrt dessen Statements auf einem Dict aus,
+    mit der Semantik von Postgres (now() fest pro Transaktion, EXTRACT liefert numeric).
+    """
+
+    def __init__(self, clock):
+        self.clock = clock
+        self.rows = {}
+        self.statements = []
+
+    @contextmanager
+    def begin(self):
+        yield self
+
+    def execute(self, stmt, params=None):
+        now, params = self.clock.t, params or {}
+        self.statements.append(stmt)
+        key, interval, period = params.get("key"), params.get("interval"), params.get("period")
+        value = None
+        if stmt is PostgresStore.HIT_SQL:
+            new_tat = max(self.rows.get(key, now), now) + interval
+            if key not in self.rows or new_tat - now <= period:
+                self.rows[key] = value = new_tat
+        elif stmt is PostgresStore.WAIT_SQL:
+            if key in self.rows:
+                value = Decimal(str(max(self.rows[key], now) + interval - now - period))
+        elif stmt is PostgresStore.CLEANUP_SQL:
+            self.rows = {k: tat for k, tat in self.rows.items() if tat >= now}
+        else:
+            raise AssertionError(f"unexpected statement: {stmt}")
+        return SimpleNamespace(scalar=lambda: value)
+
+
+def test_postgres_store_wait_from_stored_tat(clock):
+    db = FakePostgres(clock)
+    store = PostgresStore(db)
+    limiter = RateLimiter(store, 3)
+
+    assert [limiter.hit("/api/guilds", "a") for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert db.statements == [PostgresStore.HIT_SQL] * 3   # erlaubt: ein Statement
+
+    assert limiter.hit("/api/guilds", "a") == pytest.approx(20.0)
+    clock.t += 5
+    # die echte Restzeit, nicht das Intervall (20 s)
+    assert limiter.hit("/api/guilds", "a") == pytest.approx(15.0)
+    assert db.statements[-2:] == [PostgresStore.HIT_SQL, PostgresStore.WAIT_SQL]
+
+    store.CLEANUP_EVERY = 1
+    clock.t += 60
+    assert limiter.hit("/api/guilds", "b") == 0.0
+    assert list(db.rows) == ["*|b"]
+
+
+@pytest.mark.skipif(not os.getenv("TEST_POSTGRES_URL"), reason="TEST_POSTGRES_URL nicht gesetzt")
+def test_postgres_store_against_postgres():
+    from sqlalchemy import create_engine, text
+
+    engine = create_engine(os.environ["TEST_POSTGRES_URL"])
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE IF NOT EXISTS rate_limits (key VARCHAR(128) PRIMARY KEY, tat DOUBLE PRECISION NOT NULL)"))
+        conn.execute(text("DELETE FROM rate_limits WHERE key LIKE 'test|%'"))
+    try:
+        store = PostgresStore(engine)
+        assert [store.hit("test|a", 20.0, PERIOD) for _ in range(3)] == [0.0, 0.0, 0.0]
+        assert 19.0 < store.hit("test|a", 20.0, PERIOD) <= 20.0
+    finally:
+        with engine.begin() as conn:
+            conn.execute(text("DELETE FROM rate_limits WHERE key LIKE 'test|%'"))
+        engine.dispose()
+
+
+def test_retry_after_rounds_up():
+    assert retry_after_header(0.2) == {"Retry-After": "1"}
+    assert retry_after_header(20.4) == {"Retry-After": "21"}
+
+
+@pytest.mark.parametrize("method, path", [
+    ("PUT", "/api/guilds/999999"),
+    ("PATCH", "/api/guilds/999999/applications"),
+    ("DELETE", "/api/players/999999"),
+])
+def test_middleware_limits_writes(client, monkeypatch, method, path):
+    import main
+
+    monkeypatch.setattr(main, "rate_limiter", RateLimiter(MemoryStore(), 1))
+    first = client.request(method, path, json={})
+    assert first.status_code != 429
+    second = client.request(method, path, json={})
+    assert second.status_code == 429
+    assert int(second.headers["Retry-After"]) >= 1
+    assert client.get("/api/guilds").status_code == 200
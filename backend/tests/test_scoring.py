@@ -0,0 +1,110 @@
+"""
+Vektorisierte Scores (scoring.py) gegen die Referenz matching.score: gleiche Werte fuer jedes
+Paar eines zufaelligen Realms, gleiche Top-K, Snapshot nur nach einem bump neu.
+"""
+import random
+
+import numpy as np
+import pytest
+from sqlalchemy import select
+
+import matching
+from cache import bump
+from models import Guild, Player
+from scoring import ScoringEngine, build_snapshot, popcount, score_matrix
+
+REALM, FACTION = "Scoretest", "Horde"   # kein erlaubter Realm: taucht in keiner Liste auf
+
+CLASSES = {"Warrior": ["Arms", "Fury", "Prot"], "Priest": ["Holy", "Shadow"], "Druid": ["Resto", "Feral"]}
+ROLES = ["DPS", "Tank", "Heal"]
+DAYS = ["Mo", "Di", "Mi", "Do", "Fr", "Sa", "So"]
+RAIDS = ["Kara", "SSC", "TK", "Gruul"]
+
+
+def random_need(rng: random.Random) -> dict:
+    cls = rng.choice(list(CLASSES))
+    need = {"class": rng.choice([cls, cls.lower(), f" {cls.upper()} "]), "role": rng.choice(ROLES)}
+    if rng.random() < 0.5:
+        need["spec"] = rng.choice(CLASSES[cls])
+    need["prio"] = rng.choice([1, 3, 5, "4", None, "high", 9])
+    return need
+
+
+@pytest.fixture
+def realm_db(app):
+    from db import SessionLocal
+
+    rng = random.Random(14)
+    db = SessionLocal()
+    for i in range(25):
+        db.add(Guild(
+            edit_token="t", name=f"Scoregilde {i}", realm=REALM, faction=FACTION,
+            language=rng.choice(["DE", "EN", "de"]),
+            raid_days=rng.sample(DAYS, rng.randint(0, 4)),
+            progress={r: "1/1" for r in rng.sample(RAIDS, rng.randint(0, 3))},
+            needs=[random_need(rng) for _ in range(rng.randint(0, 4))] + ([{"class": 5}] if i % 7 == 0 else []),
+        ))
+    for i in range(80):
+        cls = rng.choice(list(CLASSES))
+        db.add(Player(
+            edit_token="t", name=f"Scorespieler {i}", realm=REALM, faction=FACTION,
+            language=rng.choice(["DE", "EN"]), class_name=cls, spec=rng.choice(CLASSES[cls]), role=rng.choice(ROLES),
+            availability=[d.lower() if rng.random() < 0.3 else d for d in rng.sample(DAYS, rng.randint(0, 5))],
+            attunements=rng.sample(RAIDS, rng.randint(0, 4)),
+        ))
+    db.flush()
+    yield db
+    db.rollback()
+    db.close()
+
+
+def test_popcount():
+    a = np.array([0, 1, 0b1011, 2**63 + 1], dtype=np.uint64)
+    assert popcount(a).tolist() == [0, 1, 3, 2]
+
+
+def test_matrix_equals_reference(realm_db):
+    snap = build_snapshot(realm_db, REALM, FACTION)
+    guilds = {g.id: g for g in realm_db.scalars(select(Guild).where(Guild.realm == REALM))}
+    players = {p.id: p for p in realm_db.scalars(select(Player).where(Player.realm == REALM))}
+
+    m = score_matrix(snap)
+    assert m.shape == (len(guilds), len(players))
+    expected = np.array([
+        [matching.score(guilds[int(gid)], players[int(pid)]) for pid in snap.player_ids]
+        for gid in snap.guild_ids
+    ])
+    assert (expected > 0).sum() > 50   # genug echte Matches, nicht nur Nullen
+    # float32 und Rundung auf 2 Stellen: hoechstens ein Cent Abweichung an Rundungsgrenzen
+    np.testing.assert_allclose(m, expected, atol=0.011)
+
+    # blockweise (Teilmenge der Spieler) dieselben Spalten
+    idx = np.arange(0, len(players), 3)
+    np.testing.assert_array_equal(score_matrix(snap, idx), m[:, idx])
+
+
+def test_best_matches_equal_reference(realm_db):
+    engine = ScoringEngine()
+    got = engine.best_matches(realm_db, REALM, FACTION, limit=15, role="Heal")
+
+    guilds = realm_db.scalars(select(Guild).where(Guild.realm == REALM)).all()
+    players = realm_db.scalars(select(Player).where(Player.realm == REALM, Player.role == "Heal")).all()
+    pairs = sorted(
+        ((matching.score(g, p), g.id, p.id) for g in guilds for p in players),
+        key=lambda t: -t[0],
+    )
+    pairs = [t for t in pairs if t[0] > 0][:15]
+    assert [m["score"] for m in got] == pytest.approx([s for s, _, _ in pairs], abs=0.011)
+    assert all(matching.score(realm_db.get(Guild, m["guild_id"]), realm_db.get(Player, m["player_id"])) ==
+               pytest.approx(m["score"], abs=0.011) for m in got)
+
+
+def test_snapshot_rebuilt_only_after_bump(realm_db):
+    engine = ScoringEngine()
+    engine.best_matches(realm_db, REALM, FACTION, limit=5)
+    engine.best_matches(realm_db, REALM, FACTION, limit=5, class_name="Druid")
+    assert engine.builds == 1
+
+    bump("players")
+    engine.best_matches(realm_db, REALM, FACTION, limit=5)
+    assert engine.builds == 2
@@ -0,0 +1,69 @@
+"""
+q= Suche: auf SQLite ueber die FTS5 trigram Tabellen (per Trigger synchron), Relevanz ueber
+bm25, kurze Begriffe per ILIKE.
+"""
+
+
+def search(client, q: str, **params) -> list:
+    query = "&".join(f"{k}={v}" for k, v in dict(language="search-t", limit=100, q=q, **params).items())
+    r = client.get(f"/api/guilds?{query}")
+    assert r.status_code == 200, r.text
+    return [g["id"] for g in r.json()["items"]]
+
+
+def test_substring_in_name_and_description(client, make_guild):
+    by_name, _ = make_guild(language="search-t", name="Die Zwielichtwache")
+    by_text, _ = make_guild(language="search-t", description="Wir suchen Leute fuer Zwielicht-Raids.")
+    make_guild(language="search-t", description="Nichts davon")
+
+    assert set(search(client, "zwielicht")) == {by_name, by_text}
+    assert search(client, "wache") == [by_name]
+
+
+def test_relevance_order(client, make_guild):
+    often, _ = make_guild(language="search-t", name="Mondfels", description="Mondfels Mondfels")
+    once, _ = make_guild(language="search-t", description="Kurz: Mondfels. " + "Lange Beschreibung ohne Treffer. " * 20)
+
+    assert search(client, "mondfels") == [often, once]
+    assert search(client, "mondfels", sort="relevance") == [often, once]
+    # recent: neueste zuerst, unabhaengig von der Relevanz
+    assert search(client, "mondfels", sort="recent") == [once, often]
+
+
+def test_relevance_pages(client, make_guild):
+    ids = {make_guild(language="search-t", name=f"Sternfall {i}", description="sternfall " * i)[0] for i in range(1, 6)}
+    first = client.get("/api/guilds?language=search-t&q=sternfall&limit=3").json()
+    rest = client.get(f"/api/guilds?language=search-t&q=sternfall&limit=3&cursor={first['next_cursor']}").json()
+    got = [g["id"] for g in first["items"] + rest["items"]]
+    assert sorted(got) == sorted(ids) and rest["next_cursor"] is None
+
+
+def test_index_follows_updates_and_deletes(client, make_guild, guild_body):
+    gid, token = make_guild(language="search-t", description="Glutfeuer")
+    assert search(client, "glutfeuer") == [gid]
+
+    body = guild_body(language="search-t", description="Frostbrand")
+    assert client.put(f"/api/guilds/{gid}", headers={"X-Edit-Token": token}, json=body).status_code == 200
+    assert search(client, "glutfeuer") == []
+    assert search(client, "frostbrand") == [gid]
+
+    assert client.delete(f"/api/guilds/{gid}", headers={"X-Edit-Token": token}).status_code == 200
+    assert search(client, "frostbrand") == []
+
+
+def test_short_query_and_players(client):
+    r = client.post("/api/players", json={
+        "name": "Xu", "realm": "Spineshatter", "faction": "Horde", "language": "search-t",
+        "class_name": "Mage", "spec": "Fire", "role": "DPS", "note": "Suche Gilde mit Aschenbringer-Fans",
+    })
+    assert r.status_code == 200, r.text
+    pid = r.json()["player"]["id"]
+
+    players = lambda q: [p["id"] for p in client.get(f"/api/players?language=search-t&q={q}").json()["items"]]
+    assert players("xu") == [pid]          # unter 3 Zeichen: ILIKE statt FTS5
+    assert players("aschenbringer") == [pid]
+
+
+def test_relevance_requires_q(client):
+    assert client.get("/api/guilds?sort=relevance").status_code == 400
+    assert client.get("/api/players?sort=relevance").status_code == 400
@@ -0,0 +1,71 @@
+"""
+PUT auf Gilden und Spieler als ein UPDATE ... WHERE id AND edit_token RETURNING: 404 vs. 401
+erst im Fehlerfall, Realm-Pruefung nach dem Token, und Fehlschlaege aendern nichts.
+"""
+import itertools
+
+import pytest
+
+_names = itertools.count(1)
+
+
+def player_body(**overrides) -> dict:
+    body = {
+        "name": "Editierbar", "realm": "Spineshatter", "faction": "Horde",
+        "class_name": "Hunter", "spec": "BM", "role": "DPS",
+    }
+    body.update(overrides)
+    return body
+
+
+@pytest.fixture(params=["guilds", "players"])
+def entity(request, client, make_guild, guild_body):
+    """
+    (url, token, body_factory) fuer eine frisch angelegte Gilde bzw. einen Spieler.
+    """
+    if request.param == "guilds":
+        gid, token = make_guild()
+        return f"/api/guilds/{gid}", token, guild_body
+    r = client.post("/api/players", json=player_body(name=f"Editierbar {next(_names)}"))
+    assert r.status_code == 200, r.text
+    created = r.json()
+    name = created["player"]["name"]
+    return f"/api/players/{created['player']['id']}", created["edit_token"], lambda **kw: player_body(name=name, **kw)
+
+
+def test_update(client, entity):
+    url, token, body = entity
+    r = client.put(url, headers={"X-Edit-Token": token}, json=body(realm="Thunderstrike", language="EN"))
+    assert r.status_code == 200, r.text
+    assert (r.json()["realm"], r.json()["language"]) == ("Thunderstrike", "EN")
+    assert client.get(url).json()["language"] == "EN"
+
+    # Token bleibt gueltig
+    assert client.put(url, headers={"X-Edit-Token": token}, json=body(language="FR")).status_code == 200
+
+
+@pytest.mark.parametrize("headers", [{}, {"X-Edit-Token": ""}, {"X-Edit-Token": "falsch"}])
+def test_bad_token_is_401_and_changes_nothing(client, entity, headers):
+    url, _, body = entity
+    before = client.get(url).json()
+    assert client.put(url, headers=headers, json=body(language="EN")).status_code == 401
+    assert client.get(url).json() == before
+
+
+def test_unknown_id_is_404(client, entity):
+    url, token, body = entity
+    missing = url.rsplit("/", 1)[0] + "/999999"
+    assert client.put(missing, headers={"X-Edit-Token": token}, json=body()).status_code == 404
+    assert client.put(missing, json=body()).status_code == 404
+
+
+def test_realm_checked_after_token(client, entity):
+    url, token, body = entity
+    before = client.get(url).json()
+    missing = url.rsplit("/", 1)[0] + "/999999"
+
+    assert client.put(missing, headers={"X-Edit-Token": token}, json=body(realm="Nowhere")).status_code == 404
+    assert client.put(url, headers={"X-Edit-Token": "falsch"}, json=body(realm="Nowhere")).status_code == 401
+    r = client.put(url, headers={"X-Edit-Token": token}, json=body(realm="Nowhere"))
+    assert r.status_code == 400 and "Realm not allowed" in r.json()["detail"]
+    assert client.get(url).json() == before
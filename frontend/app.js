@@ -309,10 +309,11 @@ function setupActions() {
     };
     qs("guildResults").textContent = "Lade...";
     try {
+      // nur erste Seite laden (Backend paginiert per next_cursor)
       const data = await apiGet("/api/guilds", params);
       qs("guildResults").innerHTML = "";
-      if (!data.length) qs("guildResults").textContent = "Keine Treffer.";
-      data.forEach(g => qs("guildResults").appendChild(renderGuild(g)));
+      if (!data.items.length) qs("guildResults").textContent = "Keine Treffer.";
+      data.items.forEach(g => qs("guildResults").appendChild(renderGuild(g)));
     } catch (e) {
       qs("guildResults").textContent = "Fehler: " + e.message;
     }
@@ -333,8 +334,8 @@ function setupActions() {
     try {
       const data = await apiGet("/api/players", params);
       qs("playerResults").innerHTML = "";
-      if (!data.length) qs("playerResults").textContent = "Keine Treffer.";
-      data.forEach(p => qs("playerResults").appendChild(renderPlayer(p)));
+      if (!data.items.length) qs("playerResults").textContent = "Keine Treffer.";
+      data.items.forEach(p => qs("playerResults").appendChild(renderPlayer(p)));
     } catch (e) {
       qs("playerResults").textContent = "Fehler: " + e.message;
     }